@@ -8,6 +8,7 @@ from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 load_dotenv()
 from typing import Union
+import asyncio
 
 from app.db.database import SessionDep
 from app.models.models import User
@@ -125,7 +126,8 @@ async def get_current_user(token: Annotated[str, Depends(oauth_scheme2)], sessio
         token_data = TokenData(username=username)
     except InvalidTokenError:
         raise credentials_exception
-    user = get_user(username=token_data.username, session=session)
+    # Sync session query: run it on a worker thread so the event loop (chat streams) never waits on it
+    user = await asyncio.to_thread(get_user, token_data.username, session)
     if user is None:
         raise credentials_exception
     return user
@@ -2,39 +2,36 @@
 A chatbot module that integrates with main FastAPI app
 """
 import os
-from pydantic import BaseModel
-from fastapi import HTTPException, Depends
+import time
 from dotenv import load_dotenv, find_dotenv
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import PromptTemplate
-from langchain_community.tools import DuckDuckGoSearchRun
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
- 
-from app.classify.classify_query import get_classifier
-from langchain_core.runnables import RunnablePassthrough 
-from langchain_core.output_parsers import StrOutputParser
-from langchain_groq import ChatGroq
+from app.classify.classify_query import get_classifier, get_classification_cache
+from app.utilities.cache import normalize_query
+from app.classify.executor import run_inference
+from app.classify.batcher import get_classify_batcher
+from app.classify.rules import get_rule_matcher
+from app.classify.cascade import get_student, get_cascade_stats, get_traffic_log
+from app.chat.llm_router import get_llm_router
 
 from app.models.schemas import QueryType
 load_dotenv(find_dotenv(), override=True)
 
-from langchain_pinecone import PineconeVectorStore
-from pinecone import Pinecone
 from typing import Dict
 
 from app.logger.logger import logger
-from langchain_community.embeddings import HuggingFaceEmbeddings
-
-pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-genai_key = os.environ.get("GOOGLE_API_KEY")
+from app.chat.vectorstore import get_college_vectorstore, COLLEGE_INDEX_NAME
+from app.chat.semantic_cache import get_semantic_cache
+from app.chat.search import get_web_search, NO_RESULTS
+from app.chat.lexical_index import reciprocal_rank_fusion
+from app.utilities.resilience import get_dependency
+from app.config import settings
 
 def normalize_label(label):
     """Convert any label format to a standard key"""
     return label.lower().replace(" ", "_").strip()
 
 # =============== Query Classification ==================
-def classify_query(query: str) -> QueryType:
+async def classify_query(query: str) -> QueryType:
     """
     Classify the user query using the trained model
     """
@@ -42,9 +39,53 @@ def classify_query(query: str) -> QueryType:
         # Get the trained classifier instance
         clf = get_classifier()
         
-        # Predict query type
-        prediction = clf.predict(query)
-        logger.info(f"query classified into : {prediction}")
+        started = time.perf_counter()
+        stage = "rules"
+
+        # Short, unambiguous messages ("my attendance") are routed by rules
+        prediction = None
+        if settings.CLASSIFIER_RULES:
+            matcher = get_rule_matcher()
+            prediction = matcher.match(query)
+            if prediction is not None:
+                matcher.maybe_shadow(query, prediction["query_type"])
+
+        # Repeated / trivially rephrased queries skip the model entirely
+        cache = get_classification_cache()
+        cache_key = normalize_query(query)
+        # A model swap clears the cache; predictions made before it must not be stored after it
+        generation = cache.generation
+        if prediction is None:
+            stage = "cache"
+            prediction = cache.get(cache_key)
+
+        # Cascade stage one: the hashed n-gram student, trusted above its calibrated threshold
+        # (only if it was distilled from the model version now being served)
+        model_version = getattr(clf, "version", None) or "default"
+        student = get_student(model_version) if settings.CLASSIFIER_CASCADE else None
+        if prediction is None and student is not None:
+            candidate = student.predict(query)
+            if candidate["confidence"] >= student.threshold:
+                stage = "student"
+                prediction = candidate
+                cache.set(cache_key, prediction, generation=generation)
+
+        if prediction is None:
+            stage = "model"
+            # Predict query type (forward pass runs on the inference executor,
+            # batched with concurrent queries when micro-batching is on)
+            if settings.CLASSIFIER_BATCHING:
+                prediction = await get_classify_batcher().submit(query)
+            else:
+                prediction = await run_inference(clf.predict, query)
+            if "error" not in prediction and cache.generation == generation:
+                cache.set(cache_key, prediction, generation=generation)
+                # Confident model predictions become distillation data for the student (the log filters),
+                # tagged with the version that made them; skipped if a swap landed mid-prediction
+                get_traffic_log().record(query, prediction, model_version)
+
+        get_cascade_stats().record(stage, time.perf_counter() - started)
+        logger.info(f"query classified into : {prediction} (stage: {stage})")
         
         # Check for errors
         if "error" in prediction:
@@ -88,21 +129,12 @@ def classify_query(query: str) -> QueryType:
 
 
 # =============== Loading pinecone index ==============
-def load_existing_vectorstore(index_name):
-    """Load existing Pinecone vectorstore without re-indexing"""
-    embeddings = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2",
-        model_kwargs={'device': 'cpu'},  # or 'cuda' if available
-        encode_kwargs={'normalize_embeddings': True}
-    )
-    
-    vectorstore = PineconeVectorStore(
-        index_name=index_name,
-        embedding=embeddings,
-        pinecone_api_key=os.getenv("PINECONE_API_KEY")
-    )
-
-    return vectorstore
+def load_existing_vectorstore(index_name=COLLEGE_INDEX_NAME):
+    """Return the shared Pinecone vectorstore, loading it on first use"""
+    store = get_college_vectorstore()
+    if index_name != store.index_name:
+        raise ValueError(f"Unknown index '{index_name}', expected '{store.index_name}'")
+    return store.load().vectorstore
     
 # =============== Data Formatters ==================
 def format_attendance_data(attendance_records: list) -> str:
@@ -198,109 +230,165 @@ def format_notice_data(notice_records: list) -> str:
         formatted += "   " + "-"*50 + "\n"
     return formatted
 
+# =============== Prompt Chains ==================
+def stream_chain(name: str, inputs: dict):
+    """Yield the text of each streamed chunk from a prompt | llm chain (hedged across providers)"""
+    return get_llm_router().astream(name, inputs)
+
+# =============== Retrieval ==================
+async def get_loaded_vectorstore():
+    """Shared college vector store, loading it on the inference executor if needed"""
+    store = get_college_vectorstore()
+    if not store.loaded:
+        await run_inference(store.load)
+    elif store.index_changed():
+        await run_inference(store.reload_indexes)
+    return store.vectorstore
+
+async def embed_college_query(query: str) -> list:
+    """Embed a query with the shared MiniLM model on the inference executor"""
+    vectorstore = await get_loaded_vectorstore()
+    return await run_inference(vectorstore.embeddings.embed_query, query)
+
+async def dense_search(vectorstore, query_vector: list, k: int) -> list:
+    """Vector store search; Pinecone calls go through its deadline, retries and breaker"""
+    if settings.VECTOR_BACKEND != "pinecone":
+        return await vectorstore.asimilarity_search_by_vector(query_vector, k=k)
+    return await get_dependency("pinecone").call(vectorstore.asimilarity_search_by_vector, query_vector, k=k)
+
+async def retrieve_college_context(query: str, query_vector: list | None = None) -> tuple[str, list]:
+    """Retrieve top college website chunks, returns (prompt context, source documents)"""
+    vectorstore = await get_loaded_vectorstore()
+    lexical = get_college_vectorstore().lexical
+
+    # Embed on the inference executor, then query the vector store asynchronously
+    if query_vector is None:
+        query_vector = await embed_college_query(query)
+
+    hybrid = settings.HYBRID_RETRIEVAL and lexical is not None
+    try:
+        dense_docs = await dense_search(vectorstore, query_vector, settings.HYBRID_CANDIDATES if hybrid else settings.RETRIEVAL_K)
+    except Exception as e:
+        # Vector backend down: the BM25 index alone still grounds the answer
+        if lexical is None:
+            raise
+        logger.warning(f"Vector search failed, retrieving from the BM25 index only: {e}")
+        dense_docs, hybrid = [], True
+
+    if hybrid:
+        lexical_docs = [doc for doc, _ in lexical.search(query, k=settings.HYBRID_CANDIDATES)]
+        retrieved_docs = reciprocal_rank_fusion(
+            [dense_docs, lexical_docs], k=settings.RRF_K, limit=settings.HYBRID_K
+        )
+    else:
+        retrieved_docs = dense_docs
+
+    # Extract document information
+    doc_info = []
+    for i, doc in enumerate(retrieved_docs):
+        doc_info.append({
+            'index': i + 1,
+            'content': doc.page_content,
+            'metadata': doc.metadata
+        })
+
+    # Format context
+    context = "\n\n".join([
+        f"Document {i+1}:\n{doc.page_content}" 
+        for i, doc in enumerate(retrieved_docs)
+    ])
+    return context, doc_info
+
+async def search_web(query: str) -> str:
+    """Cached, deadline-bounded web search, degrading to a placeholder on failure"""
+    return await get_web_search().search(query)
+
+# =============== Degraded Responses ==================
+# Returned when the LLM providers fail or their breakers are open, instead of an error
+ASSISTANT_UNAVAILABLE = "I can't reach the assistant right now, so here is the information directly:"
+TRY_AGAIN = "I can't reach the assistant right now. Please try again in a minute."
+STREAM_INTERRUPTED = "\n\n(The answer was interrupted. Please ask again.)"
+
+def degraded_records_response(formatted_data: str) -> str:
+    """Structured records shown as-is"""
+    return f"{ASSISTANT_UNAVAILABLE}\n\n{formatted_data}"
+
+def degraded_college_response(doc_info: list) -> str:
+    """Excerpt of the best retrieved website chunk"""
+    if not doc_info:
+        return TRY_AGAIN
+    return f"{ASSISTANT_UNAVAILABLE}\n\n{doc_info[0]['content'][:800].strip()}"
+
+def degraded_search_response(search_results: str) -> str:
+    """Raw web search results"""
+    if not search_results or search_results == NO_RESULTS:
+        return TRY_AGAIN
+    return f"{ASSISTANT_UNAVAILABLE}\n\n{search_results}"
+
+async def stream_with_fallback(tokens, fallback):
+    """Pass `tokens` through; if the LLM fails before the first token, yield `await fallback()` instead"""
+    started = False
+    try:
+        async for text in tokens:
+            started = True
+            yield text
+    except Exception as e:
+        logger.warning(f"LLM stream failed{' mid-answer' if started else ''}, degrading: {e}")
+        yield STREAM_INTERRUPTED if started else await fallback()
+
 # =============== LLM Response Generators ==================
-def get_conversational_response(user_data: str, query: str) -> str:
+async def get_conversational_response(user_data: str, query: str) -> str:
     """Generate a natural, friendly response using LLM"""
-    
-    llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.7, google_api_key=genai_key)
-    
-    template = """You are a friendly and helpful college student assistant chatbot.
-Your tone should be warm, professional, and encouraging - like a helpful friend.
-Keep responses concise and natural.
-
-User Query: {query}
-
-Student Information:
-{user_data}
-
-Please provide a helpful response based on the student's information. 
-Be warm, supportive, and conversational."""
-
-    prompt = PromptTemplate(
-        input_variables=["query", "user_data"],
-        template=template
-    )
-    
-    chain = prompt | llm
-    response = chain.invoke({"query": query, "user_data": user_data})
+    response = await get_llm_router().ainvoke("conversational", {"query": query, "user_data": user_data})
     
     return response.content.strip()
 
+def stream_conversational_response(user_data: str, query: str):
+    """Streaming variant of get_conversational_response"""
+    return stream_chain("conversational", {"query": query, "user_data": user_data})
+
 
-def get_college_info_response(query: str) -> Dict[str, str]:
+async def get_college_info_response(query: str) -> Dict[str, str]:
     """
     Alternative implementation using LLMChain for more control.
+    Paraphrases of earlier questions are answered from the semantic cache.
     """
-    index_name = "mbmc-college-website"
     try:
-        vectorstore = load_existing_vectorstore(index_name)
-        
-        # Initialize LLM
-        llm = ChatGroq(
-            model="llama-3.3-70b-versatile",
-            temperature=0.3,
-            groq_api_key=os.getenv("GROQ_API_KEY")
-        )
-        
-        # Configure retriever
-        retriever = vectorstore.as_retriever(
-            search_type='similarity',
-            search_kwargs={'k': 5}
-        )
-        
-        # Retrieve relevant documents
-        retrieved_docs = retriever.invoke(query)
-        
-        # Extract document information
-        doc_info = []
-        for i, doc in enumerate(retrieved_docs):
-            doc_info.append({
-                'index': i + 1,
-                'content': doc.page_content,
-                'metadata': doc.metadata
-            })
-        
-        # Format context
-        context = "\n\n".join([
-            f"Document {i+1}:\n{doc.page_content}" 
-            for i, doc in enumerate(retrieved_docs)
-        ])
-        
-        # Create prompt
-        template = """You are a knowledgeable and friendly college information assistant.
-
-Context Information:
-{context}
-
-Student's Question: {query}
-
-Instructions:
-- Provide accurate information based on the context
-- Be warm, professional, and encouraging
-- If information is not in the context, acknowledge this honestly
-- Use bullet points for lists when appropriate
-- Keep responses concise but comprehensive
-
-Response:"""
-
-        prompt = PromptTemplate(
-            input_variables=["context", "query"],
-            template=template
-        )
+        query_vector = await embed_college_query(query)
+        cache = get_semantic_cache()
+        if settings.SEMANTIC_CACHE_ENABLED:
+            cached = cache.lookup(query, query_vector)
+            if cached is not None:
+                logger.info(f"Semantic cache hit for college query (similarity {cached['similarity']})")
+                return {**cached, 'query': query, 'cached': True}
+
+        context, doc_info = await retrieve_college_context(query, query_vector)
         
         # Create and run chain
-        chain = prompt | llm
-        result = chain.invoke({"context": context, "query": query})
+        try:
+            result = await get_llm_router().ainvoke("college_info", {"context": context, "query": query})
+        except Exception as e:
+            logger.warning(f"College info LLM unavailable, answering from the retrieved chunks: {e}")
+            return {
+                'answer': degraded_college_response(doc_info),
+                'source_documents': doc_info,
+                'query': query,
+                'num_sources': len(doc_info),
+                'degraded': True
+            }
         
         # Extract content from AIMessage object
         response_text = result.content if hasattr(result, 'content') else str(result)
         
-        return {
+        result = {
             'answer': response_text.strip(),
             'source_documents': doc_info,
             'query': query,
-            'num_sources': len(retrieved_docs)
+            'num_sources': len(doc_info)
         }
+        if settings.SEMANTIC_CACHE_ENABLED:
+            cache.store(query, query_vector, result)
+        return result
         
     except Exception as e:
         return {
@@ -311,32 +399,60 @@ Response:"""
             'error': str(e)
         }
 
-def get_general_search_response(query: str) -> str:
+async def stream_college_info_response(query: str, sources: list):
+    """
+    Streaming variant of get_college_info_response.
+    Retrieved source documents are appended to `sources` before the first token.
+    """
+    query_vector = await embed_college_query(query)
+    cache = get_semantic_cache()
+    if settings.SEMANTIC_CACHE_ENABLED:
+        cached = cache.lookup(query, query_vector)
+        if cached is not None:
+            sources.extend(cached['source_documents'])
+            yield cached['answer']
+            return
+
+    context, doc_info = await retrieve_college_context(query, query_vector)
+    sources.extend(doc_info)
+    parts = []
+    failed = False
+    try:
+        async for text in stream_chain("college_info", {"context": context, "query": query}):
+            parts.append(text)
+            yield text
+    except Exception as e:
+        logger.warning(f"College info LLM stream failed, degrading: {e}")
+        failed = True
+        yield STREAM_INTERRUPTED if parts else degraded_college_response(doc_info)
+
+    if settings.SEMANTIC_CACHE_ENABLED and not failed:
+        cache.store(query, query_vector, {
+            'answer': "".join(parts).strip(),
+            'source_documents': doc_info,
+            'query': query,
+            'num_sources': len(doc_info)
+        })
+
+async def get_general_search_response(query: str) -> str:
     """Handle general queries with web search"""
-    
+    search_results = await search_web(query)
+
     try:
-        search = DuckDuckGoSearchRun()
-        search_results = search.run(query)
+        response = await get_llm_router().ainvoke("general_search", {"query": query, "search_results": search_results})
     except Exception as e:
-        search_results = "Unable to search at the moment."
-    
-    llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.7, google_api_key=genai_key)
+        logger.warning(f"General search LLM unavailable, returning the raw results: {e}")
+        return degraded_search_response(search_results)
     
-    template = """You are a friendly and helpful assistant.
-        Help answer questions with a warm, conversational tone.
-
-        User Question: {query}
+    return response.content.strip()
 
-        Search Results: {search_results}
+async def stream_general_search_response(query: str):
+    """Streaming variant of get_general_search_response"""
+    search_results = await search_web(query)
 
-        Please provide a helpful and friendly response."""
+    async def fallback():
+        return degraded_search_response(search_results)
 
-    prompt = PromptTemplate(
-        input_variables=["query", "search_results"],
-        template=template
-    )
-    
-    chain = prompt | llm
-    response = chain.invoke({"query": query, "search_results": search_results})
-    
-    return response.content.strip()
\ No newline at end of file
+    tokens = stream_chain("general_search", {"query": query, "search_results": search_results})
+    async for text in stream_with_fallback(tokens, fallback):
+        yield text
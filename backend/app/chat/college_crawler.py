@@ -11,6 +11,11 @@ from langchain_pinecone import PineconeVectorStore
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from pinecone import Pinecone, ServerlessSpec
 
+from app.config import settings
+from app.chat.vectorstore import mark_index_rebuilt, load_embeddings
+from app.chat.local_index import build_local_index
+from app.chat.lexical_index import build_lexical_index
+
 # Load environment variables
 load_dotenv()
 
@@ -146,14 +151,22 @@ async def main():
     # Step 2: Chunk the documents
     chunks = chunk_documents(documents, chunk_size=512, chunk_overlap=50)
     
-    # step 3: Delete pinecone index 
-    delete_pinecone_index()
+    # Step 3: Build the local in-process index (always, so we can run offline)
+    vectorstore = build_local_index(chunks, load_embeddings(), settings.LOCAL_INDEX_DIR)
+    build_lexical_index(chunks, settings.LEXICAL_INDEX_PATH)
 
-    # Step 4: Setting or create Pinecone index
-    index = get_or_create_index(index_name)
-    
-    # Step 5: Add to pinecone
-    vectorstore = add_to_pinecone(index_name, chunks)
+    if settings.VECTOR_BACKEND != "local":
+        # step 4: Delete pinecone index 
+        delete_pinecone_index()
+
+        # Step 5: Setting or create Pinecone index
+        index = get_or_create_index(index_name)
+        
+        # Step 6: Add to pinecone
+        vectorstore = add_to_pinecone(index_name, chunks)
+
+    # Tell running servers to drop answers cached against the old index
+    mark_index_rebuilt()
 
     test_query(vectorstore, "What is recent notices you can find on MBMC college website ?")
     test_query(vectorstore, "Tell me about MBMC college")
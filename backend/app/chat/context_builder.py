@@ -0,0 +1,278 @@
+"""
+Token-budgeted prompt context for structured answers.
+
+The format_*_data helpers in chatbot.py are written for people: one
+decorated line per field, full descriptions, separators. For the LLM the
+same records are encoded as a compact pipe-separated table (one header, one
+line per row), long text fields are cut to their first sentence / a
+character limit, and rows are dropped, least relevant first, until the
+table fits the QueryType's token budget. Relevance is word overlap with the
+query, then recency.
+
+Tokens are estimated (~4 characters per token for Gemini / Llama on
+English text); the budget is a size bound, not an exact count.
+
+/stats -> prompt_context compares the verbose and compact sizes per
+QueryType and the conversational LLM latency per mode (toggle
+COMPACT_PROMPT_CONTEXT to measure before/after). Offline size report over
+the database:
+
+    python -m app.chat.context_builder
+"""
+import re
+import threading
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+from app.config import settings
+from app.utilities.latency import latency_summary
+from app.models.schemas import QueryType
+from app.utilities.cache import normalize_query
+from app.utilities.stopwords import STOPWORDS
+from app.logger.logger import logger
+
+CHARS_PER_TOKEN = 4
+
+# Max estimated tokens of structured context per QueryType
+TOKEN_BUDGETS = {
+    QueryType.ATTENDANCE: 250,
+    QueryType.MARKS: 350,
+    QueryType.FEES: 200,
+    QueryType.COURSE: 200,
+    QueryType.USER_INFO: 150,
+    QueryType.ASSIGNMENT: 450,
+    QueryType.NOTICES: 450,
+}
+
+def estimate_tokens(text: str) -> int:
+    return max(1, round(len(text) / CHARS_PER_TOKEN)) if text else 0
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+_WHITESPACE = re.compile(r"\s+")
+
+def summarize(text, max_chars: int) -> str:
+    """First sentence, cut at a word boundary to at most max_chars"""
+    text = _WHITESPACE.sub(" ", str(text or "")).strip().replace("|", "/")
+    text = _SENTENCE_END.split(text, maxsplit=1)[0]
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + "…"
+
+def _date(value) -> str:
+    return value.strftime("%Y-%m-%d") if value else ""
+
+# ===== Encodings =====
+# QueryType -> (title, [(column, getter)], row timestamp)
+COLUMNS = {
+    QueryType.ATTENDANCE: ("attendance", [
+        ("month", lambda r: r.month),
+        ("semester", lambda r: r.semester),
+        ("percent", lambda r: r.total),
+        ("status", lambda r: r.attendee_status),
+    ], lambda r: r.created_at),
+    QueryType.FEES: ("fees (Rs.)", [
+        ("semester", lambda r: r.semester),
+        ("paid", lambda r: r.total_paid),
+        ("due", lambda r: r.amount_due),
+        ("status", lambda r: r.payment_status),
+    ], lambda r: r.created_at),
+    QueryType.MARKS: ("marks (out of 100)", [
+        ("subject", lambda r: summarize(r.subject, 40)),
+        ("semester", lambda r: r.semester),
+        ("marks", lambda r: r.total_marks),
+        ("grade", lambda r: r.grade or ""),
+        ("status", lambda r: r.status),
+    ], lambda r: r.exam_date),
+    QueryType.COURSE: ("enrolled courses", [
+        ("name", lambda r: summarize(r.name, 50)),
+        ("code", lambda r: r.code),
+        ("teacher_id", lambda r: r.teacher_id or ""),
+    ], lambda r: None),
+    QueryType.USER_INFO: ("profile", [
+        ("full_name", lambda r: r.full_name),
+        ("username", lambda r: r.username),
+        ("email", lambda r: r.email),
+        ("batch", lambda r: r.batch),
+        ("program", lambda r: r.program),
+        ("role", lambda r: getattr(r.role, "value", r.role)),
+        ("account", lambda r: "disabled" if r.disabled else "active"),
+        ("since", lambda r: _date(r.created_at)),
+    ], lambda r: r.created_at),
+    QueryType.ASSIGNMENT: ("recent assignments", [
+        ("title", lambda r: summarize(r.title, 60)),
+        ("course_id", lambda r: r.course_id or ""),
+        ("due", lambda r: r.due_date.strftime("%Y-%m-%d %H:%M") if r.due_date else ""),
+        ("summary", lambda r: summarize(r.description, 120)),
+    ], lambda r: r.created_at),
+    QueryType.NOTICES: ("recent notices", [
+        ("title", lambda r: summarize(r.title, 60)),
+        ("posted", lambda r: _date(r.created_at)),
+        ("for", lambda r: " ".join(str(v) for v in (r.target_batch, r.target_program) if v) or "all"),
+        ("summary", lambda r: summarize(r.content, 160)),
+    ], lambda r: r.created_at),
+}
+
+
+class ContextTable:
+    """Compact, query-independent encoding of a user's records; rendered per query within a token budget"""
+
+    def __init__(self, query_type: QueryType, header: str, rows: list, verbose_tokens: int, summary: str = ""):
+        self.query_type = query_type
+        self.header = header
+        self.rows = rows                  # (line, words, timestamp)
+        self.verbose_tokens = verbose_tokens
+        self.summary = summary
+
+    def render(self, query: str, budget: Optional[int] = None) -> tuple[str, int]:
+        """Table text within `budget` tokens, and the number of rows dropped"""
+        if not self.rows:
+            return self.header, 0
+        budget = budget or TOKEN_BUDGETS[self.query_type]
+        used = estimate_tokens(self.header) + estimate_tokens(self.summary)
+
+        # Most relevant first: words shared with the query, then newest
+        words = set(normalize_query(query).split()) - STOPWORDS
+        ranked = sorted(
+            range(len(self.rows)),
+            key=lambda i: (len(words & self.rows[i][1]), self.rows[i][2] or datetime.min),
+            reverse=True,
+        )
+        kept = []
+        for i in ranked:
+            cost = estimate_tokens(self.rows[i][0])
+            if kept and used + cost > budget:
+                continue
+            kept.append(i)
+            used += cost
+
+        # Keep the table in its original order
+        lines = [self.header] + [self.rows[i][0] for i in sorted(kept)]
+        dropped = len(self.rows) - len(kept)
+        if dropped:
+            lines.append(f"(+{dropped} less relevant rows omitted)")
+        if self.summary:
+            lines.append(self.summary)
+        return "\n".join(lines), dropped
+
+
+def encode_records(query_type: QueryType, records, verbose_text: str) -> ContextTable:
+    """Encode the records behind a structured QueryType as a ContextTable"""
+    title, columns, timestamp = COLUMNS[query_type]
+    if records is None:
+        records = []
+    elif not isinstance(records, (list, tuple)):
+        records = [records]
+    if not records:
+        return ContextTable(query_type, f"{title}: none", [], estimate_tokens(verbose_text))
+
+    header = f"{title} ({'|'.join(name for name, _ in columns)}):"
+    rows = []
+    for record in records:
+        line = "|".join(str(getter(record)) for _, getter in columns)
+        rows.append((line, set(normalize_query(line).split()), timestamp(record)))
+
+    summary = ""
+    if query_type == QueryType.FEES:
+        summary = f"total due: {sum(record.amount_due for record in records)}"
+    elif query_type == QueryType.ATTENDANCE:
+        summary = f"average percent: {sum(record.total for record in records) / len(records):.0f}"
+    return ContextTable(query_type, header, rows, estimate_tokens(verbose_text), summary)
+
+
+# ===== Metrics =====
+class PromptContextStats:
+    """Verbose vs compact context size per QueryType, and conversational LLM latency per mode"""
+
+    def __init__(self, window: int = 2000):
+        self.sizes = defaultdict(lambda: {"contexts": 0, "verbose_tokens": 0, "prompt_tokens": 0, "rows_dropped": 0})
+        self.llm_latency = defaultdict(lambda: deque(maxlen=window))
+        self.llm_prompt_tokens = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def record_context(self, query_type: QueryType, verbose_tokens: int, prompt_tokens: int, rows_dropped: int = 0):
+        with self._lock:
+            entry = self.sizes[query_type.value]
+            entry["contexts"] += 1
+            entry["verbose_tokens"] += verbose_tokens
+            entry["prompt_tokens"] += prompt_tokens
+            entry["rows_dropped"] += rows_dropped
+
+    def record_llm(self, prompt_tokens: int, seconds: float):
+        mode = "compact" if settings.COMPACT_PROMPT_CONTEXT else "verbose"
+        with self._lock:
+            self.llm_latency[mode].append(seconds)
+            self.llm_prompt_tokens[mode].append(prompt_tokens)
+
+    def stats(self) -> dict:
+        with self._lock:
+            by_type = {}
+            for query_type, entry in self.sizes.items():
+                n = entry["contexts"]
+                by_type[query_type] = {
+                    "contexts": n,
+                    "avg_verbose_tokens": round(entry["verbose_tokens"] / n, 1),
+                    "avg_prompt_tokens": round(entry["prompt_tokens"] / n, 1),
+                    "reduction": round(1 - entry["prompt_tokens"] / entry["verbose_tokens"], 4) if entry["verbose_tokens"] else 0.0,
+                    "rows_dropped": entry["rows_dropped"],
+                }
+            llm = {}
+            for mode, samples in self.llm_latency.items():
+                llm[mode] = {
+                    "calls": len(samples),
+                    "avg_prompt_tokens": round(float(np.mean(self.llm_prompt_tokens[mode])), 1),
+                    **latency_summary(samples, (50, 95)),
+                }
+            return {
+                "compact": settings.COMPACT_PROMPT_CONTEXT,
+                "budgets": {query_type.value: budget for query_type, budget in TOKEN_BUDGETS.items()},
+                "by_query_type": by_type,
+                "conversational_llm": llm,
+            }
+
+
+# ============================================
+# GLOBAL INSTANCE (Initialize once)
+# ============================================
+
+prompt_context_stats = PromptContextStats()
+
+def get_prompt_context_stats() -> PromptContextStats:
+    return prompt_context_stats
+
+
+# ===== Offline size report =====
+def size_report() -> str:
+    """Verbose vs compact context size for every user and structured QueryType in the database"""
+    from sqlmodel import Session, select
+    from app.db.database import engine
+    from app.models.models import User
+    from app.chat.pipeline import STRUCTURED_SOURCES
+
+    totals = defaultdict(lambda: [0, 0, 0])
+    with Session(engine) as session:
+        users = session.exec(select(User)).all()
+        for query_type, (loader, formatter, per_user) in STRUCTURED_SOURCES.items():
+            for user in (users if per_user else users[:1]):
+                records = loader(session, user.id) if per_user else loader(session)
+                verbose = formatter(records)
+                compact, _ = encode_records(query_type, records, verbose).render("")
+                totals[query_type.value][0] += 1
+                totals[query_type.value][1] += estimate_tokens(verbose)
+                totals[query_type.value][2] += estimate_tokens(compact)
+
+    lines = [f"{'query type':<12} {'contexts':>8} {'verbose':>9} {'compact':>9} {'saved':>7}"]
+    for query_type, (n, verbose, compact) in totals.items():
+        saved = 1 - compact / verbose if verbose else 0.0
+        lines.append(f"{query_type:<12} {n:>8} {verbose / n:>9.1f} {compact / n:>9.1f} {saved:>7.1%}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    try:
+        print(size_report())
+    except Exception as e:
+        logger.error(f"Prompt context size report failed: {e}")
+        raise
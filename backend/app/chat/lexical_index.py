@@ -0,0 +1,128 @@
+"""
+BM25 inverted index over the college website chunks, fused with dense
+results by reciprocal rank fusion (RRF) in the college-info retriever.
+
+Exact tokens such as course codes, "BSc CSIT", names and phone numbers rank
+poorly under pure embedding similarity; the lexical side catches them.
+"""
+import re
+import json
+import math
+from collections import Counter, defaultdict
+from typing import List
+
+from langchain_core.documents import Document
+
+from app.chat.local_index import write_json_atomic
+
+_DOTTED = re.compile(r"(?<=\w)\.(?=\w)")  # B.Sc -> BSc, 01.234 -> 01234
+_TOKEN = re.compile(r"\w+")
+
+def tokenize(text: str) -> list:
+    """Lowercase word/number tokens, with dotted abbreviations joined"""
+    return _TOKEN.findall(_DOTTED.sub("", text.lower()))
+
+def document_key(doc: Document) -> tuple:
+    """Identity of a chunk across the dense and lexical result lists"""
+    return (doc.metadata.get("source"), doc.page_content)
+
+
+class BM25Index:
+    """Okapi BM25 over an inverted index: term -> [(doc id, term frequency)]"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.doc_lengths = []
+        self.documents = []
+        self.avg_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    # ===== Build =====
+    @classmethod
+    def from_documents(cls, documents: List[Document], **kwargs):
+        index = cls(**kwargs)
+        postings = defaultdict(list)
+        for doc_id, doc in enumerate(documents):
+            tokens = tokenize(doc.page_content)
+            index.doc_lengths.append(len(tokens))
+            index.documents.append({"page_content": doc.page_content, "metadata": doc.metadata})
+            for term, tf in Counter(tokens).items():
+                postings[term].append((doc_id, tf))
+        index.postings = dict(postings)
+        index.avg_length = sum(index.doc_lengths) / max(len(index.doc_lengths), 1)
+        return index
+
+    # ===== Persistence =====
+    def save(self, path: str):
+        """Replace the index at `path` atomically (readers never see a half-written file)"""
+        write_json_atomic(path, {
+            "k1": self.k1,
+            "b": self.b,
+            "postings": self.postings,
+            "doc_lengths": self.doc_lengths,
+            "documents": self.documents,
+        })
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, "r") as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"])
+        index.postings = {term: [tuple(p) for p in plist] for term, plist in data["postings"].items()}
+        index.doc_lengths = data["doc_lengths"]
+        index.documents = data["documents"]
+        index.avg_length = sum(index.doc_lengths) / max(len(index.doc_lengths), 1)
+        return index
+
+    # ===== Search =====
+    def _idf(self, doc_freq: int) -> float:
+        n = len(self.documents)
+        return math.log(1 + (n - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def search(self, query: str, k: int = 10) -> list:
+        """Top-k (Document, score) by BM25, touching only postings of the query terms"""
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = self._idf(len(plist))
+            for doc_id, tf in plist:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / self.avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [
+            (Document(page_content=self.documents[doc_id]["page_content"],
+                      metadata=self.documents[doc_id]["metadata"]), score)
+            for doc_id, score in top
+        ]
+
+    def stats(self) -> dict:
+        return {"documents": len(self), "terms": len(self.postings), "avg_length": round(self.avg_length, 1)}
+
+
+# ===== Fusion =====
+def reciprocal_rank_fusion(result_lists: List[List[Document]], k: int = 60, limit: int = 5) -> List[Document]:
+    """Merge ranked lists: score(d) = sum over lists of 1 / (k + rank of d)"""
+    scores = defaultdict(float)
+    documents = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = document_key(doc)
+            scores[key] += 1.0 / (k + rank)
+            documents.setdefault(key, doc)
+    ranked = sorted(scores, key=scores.get, reverse=True)[:limit]
+    return [documents[key] for key in ranked]
+
+
+def build_lexical_index(chunks: List[Document], path: str) -> BM25Index:
+    """Build and save the BM25 index from the same chunks as the dense index"""
+    index = BM25Index.from_documents(chunks)
+    index.save(path)
+    print(f"✓ BM25 index saved to '{path}' ({len(index)} chunks, {len(index.postings)} terms)")
+    return index
@@ -0,0 +1,192 @@
+"""
+Process-wide registry of LLM provider clients and compiled prompt chains.
+
+Clients and `prompt | llm` chains are built once (in the background warmup
+after startup, or on first use) and reused by every request, so HTTP
+connection pools and TLS sessions survive between chat turns. Provider SDKs
+are imported only when their client is first built.
+"""
+import os
+import time
+import threading
+
+import httpx
+
+from app.config import settings
+from app.chat.prompts import (
+    CONVERSATIONAL_TEMPLATE,
+    COLLEGE_INFO_TEMPLATE,
+    GENERAL_SEARCH_TEMPLATE,
+)
+from app.logger.logger import logger
+
+# chain name -> (provider, template, input variables)
+CHAIN_SPECS = {
+    "conversational": ("gemini", CONVERSATIONAL_TEMPLATE, ["query", "user_data"]),
+    "college_info": ("groq", COLLEGE_INFO_TEMPLATE, ["context", "query"]),
+    "general_search": ("gemini", GENERAL_SEARCH_TEMPLATE, ["query", "search_results"]),
+}
+
+# Transport of Gemini's async client (the SDK's only async option); the LLM_MAX_* pool settings do not apply to it
+GEMINI_TRANSPORT = "grpc_asyncio"
+
+# Cheap authenticated GET per pooled provider, used to open connections during warmup
+WARMUP_ENDPOINTS = {
+    "groq": ("https://api.groq.com/openai/v1/models", "GROQ_API_KEY"),
+}
+
+class LLMRegistry:
+    """Builds each provider client and chain once and hands them out per request"""
+
+    def __init__(self):
+        self.clients = {}
+        self.chains = {}
+        self.http_clients = {}
+        self.build_times_ms = {}
+        self._lock = threading.Lock()
+
+    # ===== HTTP pools =====
+    def _pool_limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+        )
+
+    def _http_client(self, provider: str) -> httpx.AsyncClient:
+        if provider not in self.http_clients:
+            self.http_clients[provider] = httpx.AsyncClient(
+                limits=self._pool_limits(),
+                timeout=httpx.Timeout(settings.LLM_TIMEOUT),
+            )
+        return self.http_clients[provider]
+
+    # ===== Provider clients =====
+    def _build_client(self, provider: str):
+        if provider == "gemini":
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            # The Gemini SDK talks gRPC and accepts no httpx client or pool limits:
+            # its async client is one multiplexed HTTP/2 channel per instance,
+            # so reusing the instance is what keeps the connection warm
+            return ChatGoogleGenerativeAI(
+                model="gemini-2.5-flash",
+                temperature=0.7,
+                google_api_key=os.environ.get("GOOGLE_API_KEY"),
+                timeout=settings.LLM_TIMEOUT,
+            )
+        if provider == "groq":
+            from langchain_groq import ChatGroq
+            return ChatGroq(
+                model="llama-3.3-70b-versatile",
+                temperature=0.3,
+                groq_api_key=os.getenv("GROQ_API_KEY"),
+                http_async_client=self._http_client(provider),
+            )
+        raise ValueError(f"Unknown LLM provider: {provider}")
+
+    def client(self, provider: str):
+        """Shared client for a provider, built on first use"""
+        if provider not in self.clients:
+            with self._lock:
+                if provider not in self.clients:
+                    start_time = time.time()
+                    self.clients[provider] = self._build_client(provider)
+                    self.build_times_ms[provider] = round((time.time() - start_time) * 1000, 2)
+                    logger.info(f"LLM client '{provider}' built in {self.build_times_ms[provider]}ms")
+        return self.clients[provider]
+
+    def chain(self, name: str, provider: str | None = None):
+        """Compiled `prompt | llm` chain, built on first use (on its own provider unless one is given)"""
+        default_provider, template, input_variables = CHAIN_SPECS[name]
+        provider = provider or default_provider
+        key = name if provider == default_provider else f"{name}@{provider}"
+        if key not in self.chains:
+            # langchain_core.prompts pulls in transformers (token counting) when it is installed
+            from langchain_core.prompts import PromptTemplate
+            prompt = PromptTemplate(input_variables=input_variables, template=template)
+            self.chains[key] = prompt | self.client(provider)
+        return self.chains[key]
+
+    # ===== Lifecycle =====
+    def startup(self):
+        """Build every chain up front; a provider that fails is retried on first use"""
+        for name in CHAIN_SPECS:
+            try:
+                self.chain(name)
+            except Exception as e:
+                logger.warning(f"Could not build LLM chain '{name}' at startup: {e}")
+
+    async def warm_connections(self) -> dict:
+        """Open TCP + TLS connections in the provider pools before the first chat"""
+        warmed = {}
+        for provider, (url, key_name) in WARMUP_ENDPOINTS.items():
+            api_key = os.getenv(key_name)
+            if provider not in self.http_clients or not api_key:
+                continue
+            start_time = time.time()
+            response = await self.http_clients[provider].get(url, headers={"Authorization": f"Bearer {api_key}"})
+            warmed[provider] = {"status": response.status_code, "ms": round((time.time() - start_time) * 1000, 2)}
+        logger.info(f"LLM connection warmup: {warmed}")
+        return warmed
+
+    async def aclose(self):
+        """Close pooled HTTP connections (server shutdown)"""
+        for client in self.http_clients.values():
+            await client.aclose()
+        self.http_clients.clear()
+        self.clients.clear()
+        self.chains.clear()
+
+    # ===== Stats =====
+    def pool_stats(self) -> dict:
+        """Per-provider client and connection pool statistics"""
+        stats = {}
+        for provider in {spec[0] for spec in CHAIN_SPECS.values()}:
+            provider_stats = {
+                "client_built": provider in self.clients,
+                "build_time_ms": self.build_times_ms.get(provider),
+                "chains": [name for name, spec in CHAIN_SPECS.items()
+                           if spec[0] == provider and name in self.chains],
+            }
+            http_client = self.http_clients.get(provider)
+            if http_client is not None:
+                provider_stats["pool"] = _httpx_pool_stats(http_client)
+            elif provider == "gemini":
+                client = self.clients.get(provider)
+                provider_stats["pool"] = {
+                    "transport": GEMINI_TRANSPORT,
+                    "channel_open": getattr(client, "async_client_running", None) is not None,
+                    "note": "not an httpx pool: one multiplexed gRPC channel per client, LLM_MAX_* settings do not apply",
+                }
+            stats[provider] = provider_stats
+        return stats
+
+
+def _httpx_pool_stats(client: httpx.AsyncClient) -> dict:
+    """Connection counts from the httpcore pool behind an httpx client"""
+    stats = {
+        "max_connections": settings.LLM_MAX_CONNECTIONS,
+        "max_keepalive_connections": settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+    }
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []))
+    stats.update({
+        "open": len(connections),
+        "idle": sum(1 for conn in connections if conn.is_idle()),
+        "active": sum(1 for conn in connections if not conn.is_idle()),
+    })
+    return stats
+
+
+# ============================================
+# GLOBAL INSTANCE (Initialize once)
+# ============================================
+
+llm_registry = None
+
+def get_llm_registry() -> LLMRegistry:
+    """Get or create the LLM registry"""
+    global llm_registry
+    if llm_registry is None:
+        llm_registry = LLMRegistry()
+    return llm_registry
@@ -0,0 +1,275 @@
+"""
+Hedged, failover LLM calls across providers.
+
+Every chain has a primary provider (CHAIN_SPECS in llm_registry.py) and an
+alternate (ALTERNATE_PROVIDERS). A call starts on the primary; if it has not
+finished by the primary's LLM_HEDGE_PERCENTILE latency, the same prompt is
+sent to the alternate and the first completion wins, the other request is
+cancelled. A primary that fails outright fails over to the alternate
+immediately. Streams are hedged on time to first token and committed to
+whichever provider yields first. After that, a stream that errors or goes
+LLM_STREAM_IDLE_TIMEOUT seconds without a chunk counts as a failure of its
+provider (health and circuit breaker) and raises, so the caller ends the
+answer with its degraded tail.
+
+Each provider call also runs through its resilience Dependency (adaptive
+deadline, retries, circuit breaker); a provider whose breaker is open fails
+immediately, so the call goes straight to the alternate.
+
+Per provider, an EWMA of latency, time to first token and error rate is
+kept, along with hedge / failover counts (/stats -> llm_routing).
+"""
+import time
+import asyncio
+import threading
+from collections import deque
+
+from app.config import settings
+from app.utilities.latency import latency_percentile, latency_summary
+from app.chat.llm_registry import CHAIN_SPECS, get_llm_registry
+from app.utilities.resilience import get_dependency
+from app.logger.logger import logger
+
+ALTERNATE_PROVIDERS = {"gemini": "groq", "groq": "gemini"}
+
+
+class ProviderHealth:
+    """EWMA latency / error rate and hedging counters for one provider"""
+
+    def __init__(self, window: int = 500):
+        self.latency = deque(maxlen=window)
+        self.first_token = deque(maxlen=window)
+        self.ewma_latency = None
+        self.ewma_first_token = None
+        self.error_rate = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.hedges = 0          # times a hedge was sent because this provider was slow
+        self.hedge_wins = 0      # times this provider, as the hedge, answered first
+        self.failovers = 0       # times this provider failed and the alternate took over
+        self.cancelled = 0
+        self.stream_failures = 0 # streams that broke or stalled after their first token
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _ewma(current, sample: float) -> float:
+        alpha = settings.LLM_EWMA_ALPHA
+        return sample if current is None else alpha * sample + (1 - alpha) * current
+
+    def record(self, seconds: float, ok: bool, stream: bool = False):
+        with self._lock:
+            self.calls += 1
+            self.error_rate = self._ewma(self.error_rate, 0.0 if ok else 1.0)
+            if not ok:
+                self.errors += 1
+                return
+            if stream:
+                self.first_token.append(seconds)
+                self.ewma_first_token = self._ewma(self.ewma_first_token, seconds)
+            else:
+                self.latency.append(seconds)
+                self.ewma_latency = self._ewma(self.ewma_latency, seconds)
+
+    def record_stream_failure(self):
+        with self._lock:
+            self.errors += 1
+            self.stream_failures += 1
+            self.error_rate = self._ewma(self.error_rate, 1.0)
+
+    def hedge_delay(self, stream: bool = False) -> float:
+        """Seconds to wait before hedging: the LLM_HEDGE_PERCENTILE of recent latency"""
+        samples = self.first_token if stream else self.latency
+        with self._lock:
+            if len(samples) < settings.LLM_HEDGE_MIN_SAMPLES:
+                delay = settings.LLM_HEDGE_DEFAULT_DELAY
+            else:
+                delay = latency_percentile(samples, settings.LLM_HEDGE_PERCENTILE)
+        return min(max(delay, settings.LLM_HEDGE_MIN_DELAY), settings.LLM_HEDGE_MAX_DELAY)
+
+    def stats(self) -> dict:
+        def ms(value):
+            return round(value * 1000, 1) if value is not None else None
+        with self._lock:
+            latency = latency_summary(self.latency)
+            first_token = latency_summary(self.first_token)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "ewma_error_rate": round(self.error_rate, 4),
+            "ewma_latency_ms": ms(self.ewma_latency),
+            "ewma_first_token_ms": ms(self.ewma_first_token),
+            "latency": latency,
+            "first_token_latency": first_token,
+            "hedge_delay_ms": ms(self.hedge_delay()),
+            "stream_hedge_delay_ms": ms(self.hedge_delay(stream=True)),
+            "hedges_sent": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "cancelled": self.cancelled,
+            "stream_failures": self.stream_failures,
+        }
+
+
+class LLMRouter:
+    """Routes chain calls to a primary provider, hedging / failing over to an alternate"""
+
+    def __init__(self):
+        self.health = {provider: ProviderHealth() for provider in ALTERNATE_PROVIDERS}
+
+    def providers(self, name: str) -> tuple:
+        primary = CHAIN_SPECS[name][0]
+        return primary, ALTERNATE_PROVIDERS.get(primary) if settings.LLM_FAILOVER or settings.LLM_HEDGING else None
+
+    # ===== Single provider calls =====
+    async def _invoke(self, name: str, provider: str, inputs: dict):
+        chain = get_llm_registry().chain(name, provider)
+        # With failover on, the alternate provider is the retry
+        retries = 0 if settings.LLM_FAILOVER and self.providers(name)[1] else None
+        started = time.perf_counter()
+        try:
+            result = await get_dependency(provider).call(chain.ainvoke, inputs, retries=retries)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.health[provider].record(time.perf_counter() - started, ok=False)
+            raise
+        self.health[provider].record(time.perf_counter() - started, ok=True)
+        return result
+
+    async def _stream(self, name: str, provider: str, inputs: dict):
+        chain = get_llm_registry().chain(name, provider)
+        async for chunk in chain.astream(inputs):
+            text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+            if text:
+                yield text
+
+    async def _first_chunk(self, name: str, provider: str, iterator):
+        """First streamed token, under the provider's breaker and deadline"""
+        dependency = get_dependency(provider)
+        dependency.check()
+        started = time.perf_counter()
+        try:
+            text = await asyncio.wait_for(anext(iterator, ""), timeout=dependency.timeout())
+        except asyncio.CancelledError:
+            dependency.breaker.probe_in_flight = False
+            raise
+        except Exception as e:
+            seconds = time.perf_counter() - started
+            self.health[provider].record(seconds, ok=False, stream=True)
+            dependency.record(seconds, ok=False, timed_out=isinstance(e, asyncio.TimeoutError))
+            raise
+        seconds = time.perf_counter() - started
+        self.health[provider].record(seconds, ok=True, stream=True)
+        # Time to first token is not a completion latency: it closes the breaker but is not a sample
+        dependency.record(seconds, ok=True, sample=False)
+        return text
+
+    # ===== Race =====
+    async def _race(self, name: str, launch, stream: bool = False) -> tuple:
+        """
+        Run `launch(provider)` on the primary, hedge / fail over to the alternate,
+        and return (winning provider, result); the loser is cancelled
+        """
+        primary, alternate = self.providers(name)
+        tasks = {asyncio.create_task(launch(primary)): primary}
+        launched = {primary}
+        hedged = False
+        hedge_at = time.perf_counter() + self.health[primary].hedge_delay(stream) if settings.LLM_HEDGING else None
+        last_error = None
+        try:
+            while tasks:
+                can_hedge = hedge_at is not None and alternate is not None and alternate not in launched
+                timeout = max(0.0, hedge_at - time.perf_counter()) if can_hedge else None
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Primary is slower than its usual tail: send the same request to the alternate
+                    self.health[primary].hedges += 1
+                    tasks[asyncio.create_task(launch(alternate))] = alternate
+                    launched.add(alternate)
+                    hedged = True
+                    continue
+                for task in done:
+                    provider = tasks.pop(task)
+                    if task.exception() is None:
+                        if hedged and provider != primary:
+                            self.health[provider].hedge_wins += 1
+                        return provider, task.result()
+                    last_error = task.exception()
+                    logger.warning(f"LLM chain '{name}' failed on {provider}: {last_error}")
+                    if settings.LLM_FAILOVER and alternate is not None and alternate not in launched:
+                        self.health[primary].failovers += 1
+                        tasks[asyncio.create_task(launch(alternate))] = alternate
+                        launched.add(alternate)
+            raise last_error
+        finally:
+            for task, provider in tasks.items():
+                task.cancel()
+                self.health[provider].cancelled += 1
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def ainvoke(self, name: str, inputs: dict):
+        """Complete `prompt | llm` chain `name`, hedged across providers"""
+        async def invoke(provider):
+            return await self._invoke(name, provider, inputs)
+        _, result = await self._race(name, invoke)
+        return result
+
+    async def astream(self, name: str, inputs: dict):
+        """Stream chain `name` from whichever provider yields its first token first"""
+        iterators = {}
+
+        async def first_chunk(provider):
+            iterators[provider] = self._stream(name, provider, inputs)
+            return await self._first_chunk(name, provider, iterators[provider])
+
+        provider, text = await self._race(name, first_chunk, stream=True)
+        for other, iterator in iterators.items():
+            if other != provider:
+                await iterator.aclose()
+        iterator = iterators[provider]
+        try:
+            if text:
+                yield text
+            while True:
+                text = await self._next_chunk(provider, iterator)
+                if text is None:
+                    return
+                yield text
+        finally:
+            await iterator.aclose()
+
+    async def _next_chunk(self, provider: str, iterator):
+        """Next streamed token (None at the end); an error or an idle gap is recorded as a provider failure"""
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(anext(iterator), timeout=settings.LLM_STREAM_IDLE_TIMEOUT or None)
+        except StopAsyncIteration:
+            return None
+        except Exception as e:
+            timed_out = isinstance(e, asyncio.TimeoutError)
+            self.health[provider].record_stream_failure()
+            get_dependency(provider).record(time.perf_counter() - started, ok=False, timed_out=timed_out)
+            logger.warning(f"LLM stream from {provider} {'stalled' if timed_out else 'failed'} mid-answer: {e}")
+            if timed_out:
+                raise TimeoutError(f"{provider} sent no tokens for {settings.LLM_STREAM_IDLE_TIMEOUT}s") from e
+            raise
+
+    def stats(self) -> dict:
+        return {
+            "hedging": settings.LLM_HEDGING,
+            "failover": settings.LLM_FAILOVER,
+            "hedge_percentile": settings.LLM_HEDGE_PERCENTILE,
+            "stream_idle_timeout_s": settings.LLM_STREAM_IDLE_TIMEOUT,
+            "providers": {provider: health.stats() for provider, health in self.health.items()},
+        }
+
+
+# ============================================
+# GLOBAL INSTANCE (Initialize once)
+# ============================================
+
+llm_router = LLMRouter()
+
+def get_llm_router() -> LLMRouter:
+    return llm_router
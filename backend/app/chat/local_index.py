@@ -0,0 +1,251 @@
+"""
+In-process vector index for the college website chunks.
+
+Embeddings are kept as one L2-normalized float32 NumPy matrix saved as a
+.npy file and memory-mapped on load, next to a JSON file with the chunk
+texts and metadata. Search is an exact cosine scan (a few hundred 384-dim
+rows is sub-millisecond) or an approximate inverted-file (IVF) probe over
+k-means clusters for larger indexes.
+
+Each save writes a new generation directory (built under a temporary name,
+then renamed into place) and switches the CURRENT_FILE pointer to it with
+an atomic os.replace. Files are never rewritten in place, so a worker that
+still has the previous generation memory-mapped keeps a valid mapping, and
+a loader always sees vectors and documents from the same build.
+"""
+import os
+import json
+import time
+import shutil
+import tempfile
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+VECTORS_FILE = "vectors.npy"
+DOCUMENTS_FILE = "documents.json"
+CENTROIDS_FILE = "centroids.npy"
+ASSIGNMENTS_FILE = "assignments.npy"
+META_FILE = "meta.json"
+CURRENT_FILE = "current.json"  # {"generation": <subdirectory>} of the live build
+
+def write_json_atomic(path: str, data):
+    """Write JSON to a temporary file next to `path`, then rename it over `path`"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, default=str)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def current_generation_dir(directory: str) -> str:
+    """Directory holding the live index files (the directory itself for indexes saved before generations)"""
+    try:
+        with open(os.path.join(directory, CURRENT_FILE), "r") as f:
+            return os.path.join(directory, json.load(f)["generation"])
+    except FileNotFoundError:
+        return directory
+
+def _prune_generations(directory: str, keep: set):
+    """Remove old generations (open memory maps of removed files stay valid)"""
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith("gen-") and name not in keep and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+def _kmeans(vectors: np.ndarray, n_clusters: int, iterations: int = 20, seed: int = 42):
+    """Spherical k-means, returns (centroids, assignment per row)"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(n_clusters):
+            members = vectors[assignments == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+        centroids = _normalize(centroids)
+    return centroids.astype(np.float32), np.argmax(vectors @ centroids.T, axis=1).astype(np.int32)
+
+
+class LocalVectorIndex(VectorStore):
+    """LangChain-compatible vector store backed by a (memory-mapped) NumPy matrix"""
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        vectors: Optional[np.ndarray] = None,
+        documents: Optional[List[dict]] = None,
+        search_type: str = "exact",
+        nprobe: int = 4,
+    ):
+        self._embedding = embedding
+        self.vectors = vectors
+        self.documents = documents or []
+        self.search_type = search_type
+        self.nprobe = nprobe
+        self.centroids = None
+        self.assignments = None
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def __len__(self) -> int:
+        return 0 if self.vectors is None else len(self.vectors)
+
+    # ===== Build =====
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs) -> List[str]:
+        """Embed and append texts (kept in memory until `save`)"""
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        new_vectors = _normalize(np.asarray(self._embedding.embed_documents(texts), dtype=np.float32))
+
+        start = len(self)
+        self.vectors = new_vectors if self.vectors is None else np.vstack([self.vectors, new_vectors])
+        self.documents.extend({"page_content": t, "metadata": m} for t, m in zip(texts, metadatas))
+        # Clusters no longer cover the new rows
+        self.centroids = self.assignments = None
+        return [str(i) for i in range(start, len(self))]
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, **kwargs):
+        index = cls(embedding=embedding, **kwargs)
+        index.add_texts(texts, metadatas)
+        return index
+
+    def build_clusters(self, n_clusters: Optional[int] = None):
+        """Partition rows into k-means clusters for approximate (IVF) search"""
+        n_clusters = n_clusters or max(1, int(np.sqrt(len(self))))
+        self.centroids, self.assignments = _kmeans(np.asarray(self.vectors), min(n_clusters, len(self)))
+
+    # ===== Persistence =====
+    def save(self, directory: str) -> str:
+        """Write vectors, documents and IVF clusters as a new generation of `directory` and switch to it"""
+        os.makedirs(directory, exist_ok=True)
+        if self.centroids is None:
+            self.build_clusters()
+        previous = os.path.basename(current_generation_dir(directory))
+        generation = f"gen-{datetime.now().strftime('%Y%m%dT%H%M%S%f')}"
+
+        staging = tempfile.mkdtemp(prefix=".build-", dir=directory)
+        try:
+            np.save(os.path.join(staging, VECTORS_FILE), np.ascontiguousarray(self.vectors, dtype=np.float32))
+            np.save(os.path.join(staging, CENTROIDS_FILE), self.centroids)
+            np.save(os.path.join(staging, ASSIGNMENTS_FILE), self.assignments)
+            with open(os.path.join(staging, DOCUMENTS_FILE), "w") as f:
+                json.dump(self.documents, f, default=str)
+            with open(os.path.join(staging, META_FILE), "w") as f:
+                json.dump({
+                    "count": len(self),
+                    "dimension": int(self.vectors.shape[1]),
+                    "clusters": int(len(self.centroids)),
+                    "generation": generation,
+                    "built_at": datetime.now().isoformat(),
+                }, f)
+            os.replace(staging, os.path.join(directory, generation))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        write_json_atomic(os.path.join(directory, CURRENT_FILE), {"generation": generation})
+        _prune_generations(directory, keep={generation, previous})
+        return generation
+
+    @classmethod
+    def load(cls, directory: str, embedding: Embeddings, search_type: str = "exact", nprobe: int = 4, mmap: bool = True):
+        """Open the live generation of a saved index; vectors are memory-mapped read-only by default"""
+        directory = current_generation_dir(directory)
+        mmap_mode = "r" if mmap else None
+        index = cls(
+            embedding=embedding,
+            vectors=np.load(os.path.join(directory, VECTORS_FILE), mmap_mode=mmap_mode),
+            search_type=search_type,
+            nprobe=nprobe,
+        )
+        with open(os.path.join(directory, DOCUMENTS_FILE), "r") as f:
+            index.documents = json.load(f)
+        if os.path.exists(os.path.join(directory, CENTROIDS_FILE)):
+            index.centroids = np.load(os.path.join(directory, CENTROIDS_FILE))
+            index.assignments = np.load(os.path.join(directory, ASSIGNMENTS_FILE))
+        return index
+
+    # ===== Search =====
+    def _candidates(self, query_vector: np.ndarray) -> Optional[np.ndarray]:
+        """Row ids in the `nprobe` closest clusters, or None for a full scan"""
+        if self.search_type != "ivf" or self.centroids is None:
+            return None
+        probes = np.argsort(self.centroids @ query_vector)[::-1][:self.nprobe]
+        return np.flatnonzero(np.isin(self.assignments, probes))
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4, **kwargs):
+        if not len(self):
+            return []
+        query_vector = _normalize(np.asarray(embedding, dtype=np.float32))
+        candidates = self._candidates(query_vector)
+        if candidates is None:
+            scores = self.vectors @ query_vector
+            ids = np.arange(len(scores))
+        else:
+            scores = self.vectors[candidates] @ query_vector
+            ids = candidates
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (Document(page_content=self.documents[ids[i]]["page_content"],
+                      metadata=self.documents[ids[i]]["metadata"]), float(scores[i]))
+            for i in top
+        ]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k, **kwargs)]
+
+    async def asimilarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs) -> List[Document]:
+        # Sub-millisecond scan; an executor hop would cost more than the search
+        return self.similarity_search_by_vector(embedding, k, **kwargs)
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs):
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k, **kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        # Scores are cosine similarities already
+        return lambda score: score
+
+    def stats(self) -> dict:
+        return {
+            "count": len(self),
+            "dimension": None if self.vectors is None else int(self.vectors.shape[1]),
+            "search_type": self.search_type,
+            "clusters": None if self.centroids is None else int(len(self.centroids)),
+            "nprobe": self.nprobe,
+            "memory_mapped": isinstance(self.vectors, np.memmap),
+        }
+
+
+def build_local_index(chunks: List[Document], embedding: Embeddings, directory: str) -> LocalVectorIndex:
+    """Embed chunked documents and save them as a local index"""
+    start_time = time.time()
+    index = LocalVectorIndex.from_texts(
+        [chunk.page_content for chunk in chunks],
+        embedding=embedding,
+        metadatas=[chunk.metadata for chunk in chunks],
+    )
+    index.save(directory)
+    print(f"✓ Local index saved to '{directory}' ({len(index)} chunks, {time.time() - start_time:.2f}s)")
+    return index
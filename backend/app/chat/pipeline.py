@@ -0,0 +1,243 @@
+"""
+Per-QueryType dispatch shared by the JSON, SSE and WebSocket chat endpoints.
+Identical in-flight work (same type, normalized query and context) is
+coalesced through app/utilities/singleflight.py.
+"""
+import time
+from typing import AsyncIterator, Optional
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config import settings
+from app.models.schemas import QueryType
+from app.models.models import User
+from app.db.database import async_engine
+from app.utilities.crud import (
+    get_attendance_by_user_id,
+    get_marks_by_user_id,
+    get_fees_by_user_id,
+    get_courses_for_student,
+    get_recent_assignment_per_course,
+    get_user_by_user_id,
+    get_recent_notices,
+    get_cache_version,
+)
+from app.chat.chatbot import (
+    classify_query,
+    format_attendance_data,
+    format_fees_data,
+    format_marks_data,
+    format_course_data,
+    format_assignment_data,
+    format_user_data,
+    format_notice_data,
+    get_conversational_response,
+    get_college_info_response,
+    get_general_search_response,
+    stream_conversational_response,
+    stream_college_info_response,
+    stream_general_search_response,
+    stream_with_fallback,
+    degraded_records_response,
+)
+from app.chat.templates import match_template, get_template_stats
+from app.chat.context_builder import ContextTable, encode_records, estimate_tokens, get_prompt_context_stats
+from app.chat.vectorstore import get_index_version
+from app.utilities.context_cache import get_context_cache, version_scope
+from app.utilities.singleflight import coalesce_key, get_single_flight
+from app.logger.logger import logger
+
+# QueryType -> (crud loader, formatter, loader takes the requesting user's id)
+STRUCTURED_SOURCES = {
+    QueryType.ATTENDANCE: (get_attendance_by_user_id, format_attendance_data, True),
+    QueryType.MARKS: (get_marks_by_user_id, format_marks_data, True),
+    QueryType.FEES: (get_fees_by_user_id, format_fees_data, True),
+    QueryType.COURSE: (get_courses_for_student, format_course_data, True),
+    QueryType.USER_INFO: (get_user_by_user_id, format_user_data, True),
+    QueryType.ASSIGNMENT: (get_recent_assignment_per_course, format_assignment_data, False),
+    QueryType.NOTICES: (get_recent_notices, format_notice_data, False),
+}
+
+# ===== Structured context =====
+class StructuredContext:
+    """What the context cache holds for a structured QueryType: the records and their prompt encoding"""
+
+    def __init__(self, records, context):
+        self.records = records
+        self.context = context   # formatted text, or a ContextTable
+
+async def load_structured_records(session, query_type: QueryType, user_id: int):
+    """Fetch the records behind a structured QueryType"""
+    loader, _, per_user = STRUCTURED_SOURCES[query_type]
+    if per_user:
+        return await session.run_sync(loader, user_id)
+    return await session.run_sync(loader)
+
+def render_context(query_type: QueryType, context, query: str) -> str:
+    """Prompt text for a cached context: compact tables are cut to the QueryType's token budget"""
+    stats = get_prompt_context_stats()
+    if isinstance(context, ContextTable):
+        text, dropped = context.render(query)
+        stats.record_context(query_type, context.verbose_tokens, estimate_tokens(text), dropped)
+        return text
+    stats.record_context(query_type, estimate_tokens(context), estimate_tokens(context))
+    return context
+
+async def load_structured(session, query_type: QueryType, user_id: int) -> StructuredContext:
+    """Records for a structured QueryType and their prompt encoding (cached per user, misses loaded once)"""
+    cache = get_context_cache()
+    entry = version = None
+    if settings.CONTEXT_CACHE_ENABLED:
+        # Writes from any worker bump this version, outdating what this worker cached
+        version = await session.run_sync(get_cache_version, version_scope(query_type, user_id))
+        entry = cache.get(query_type, user_id, version)
+    if entry is None:
+        async def load():
+            # Shared by coalesced callers, so it reads through its own session, not the first caller's
+            generation = cache.generation
+            async with AsyncSession(async_engine) as load_session:
+                records = await load_structured_records(load_session, query_type, user_id)
+            formatted_data = STRUCTURED_SOURCES[query_type][1](records)
+            context = encode_records(query_type, records, formatted_data) if settings.COMPACT_PROMPT_CONTEXT else formatted_data
+            entry = StructuredContext(records, context)
+            if settings.CONTEXT_CACHE_ENABLED:
+                cache.set(query_type, user_id, entry, generation, version)
+            return entry
+
+        # A burst of misses (e.g. right after a notice is posted) loads the records once
+        key = cache.key(query_type, user_id) + (version,)
+        entry = await get_single_flight().run(f"context:{query_type.value}", key, load)
+    return entry
+
+async def load_structured_context(session, query_type: QueryType, user_id: int, query: str = "") -> str:
+    """The cached records of a structured QueryType, rendered for the prompt"""
+    entry = await load_structured(session, query_type, user_id)
+    return render_context(query_type, entry.context, query)
+
+# ===== Template answers =====
+async def answer_from_template(session, user: User, query_type: QueryType, query: str) -> Optional[str]:
+    """Deterministic answer when the query matches a template intent, else None (use the LLM)"""
+    if not settings.TEMPLATE_ANSWERS:
+        return None
+    stats = get_template_stats()
+    stats.record_query(query_type)
+    template = match_template(query_type, query)
+    if template is None:
+        return None
+
+    started = time.perf_counter()
+    try:
+        answer = template.render((await load_structured(session, query_type, user.id)).records)
+    except Exception as e:
+        stats.record(template, time.perf_counter() - started, ok=False)
+        logger.warning(f"Template '{template.name}' failed, falling back to the LLM: {e}")
+        return None
+    stats.record(template, time.perf_counter() - started)
+    logger.info(f"Response created from template '{template.name}' for user {user.username}")
+    return answer
+
+async def _single_chunk(text: str):
+    yield text
+
+async def degraded_structured_response(session, user: User, query_type: QueryType) -> str:
+    """The user's records in the human-readable format, for when the LLM is unavailable"""
+    entry = await load_structured(session, query_type, user.id)
+    return degraded_records_response(STRUCTURED_SOURCES[query_type][1](entry.records))
+
+async def _timed_conversational_response(user_data: str, query: str) -> str:
+    started = time.perf_counter()
+    response = await get_conversational_response(user_data, query)
+    get_prompt_context_stats().record_llm(estimate_tokens(user_data + query), time.perf_counter() - started)
+    return response
+
+async def _timed_conversational_stream(user_data: str, query: str):
+    started = time.perf_counter()
+    async for text in stream_conversational_response(user_data, query):
+        yield text
+    get_prompt_context_stats().record_llm(estimate_tokens(user_data + query), time.perf_counter() - started)
+
+# ===== Full responses =====
+async def generate_response(session, user: User, query_type: QueryType, query: str) -> str:
+    """Build the complete chatbot answer for an already classified query"""
+    if query_type in STRUCTURED_SOURCES:
+        response = await answer_from_template(session, user, query_type, query)
+        if response is None:
+            formatted_data = await load_structured_context(session, query_type, user.id, query)
+            try:
+                response = await get_single_flight().run(
+                    query_type.value,
+                    coalesce_key(query_type, query, formatted_data),
+                    lambda: _timed_conversational_response(formatted_data, query),
+                )
+                logger.info(f"Response created using {query_type.value} records of user {user.username} by chatbot")
+            except Exception as e:
+                logger.warning(f"Conversational LLM unavailable, returning {query_type.value} records directly: {e}")
+                response = await degraded_structured_response(session, user, query_type)
+
+    elif query_type == QueryType.COLLEGE_INFO:
+        # The retrieved context is a function of the query and the index build
+        result = await get_single_flight().run(
+            query_type.value,
+            coalesce_key(query_type, query, get_index_version()),
+            lambda: get_college_info_response(query),
+        )
+        response = result["answer"]
+        logger.info("Fetched result from pinecone and given to LLM")
+
+    else:  # GENERAL
+        response = await get_single_flight().run(
+            query_type.value, coalesce_key(query_type, query), lambda: get_general_search_response(query)
+        )
+        logger.info("General query response created")
+
+    return response
+
+# ===== Streamed responses =====
+async def stream_events(session, user: User, query: str) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Yield (event, payload) pairs for a chat turn:
+    one `classification`, then `token` chunks, then a final `done` with metadata.
+    """
+    query_type = await classify_query(query)
+    logger.info(f"Query classified as: {query_type}")
+    yield "classification", {"query_type": query_type.value}
+
+    flights = get_single_flight()
+    sources = []
+    if query_type in STRUCTURED_SOURCES:
+        answer = await answer_from_template(session, user, query_type, query)
+        if answer is not None:
+            tokens = _single_chunk(answer)
+        else:
+            formatted_data = await load_structured_context(session, query_type, user.id, query)
+            _, tokens = flights.stream(
+                query_type.value,
+                coalesce_key(query_type, query, formatted_data),
+                lambda state: _timed_conversational_stream(formatted_data, query),
+            )
+            tokens = stream_with_fallback(tokens, lambda: degraded_structured_response(session, user, query_type))
+    elif query_type == QueryType.COLLEGE_INFO:
+        # Joined streams share the sources retrieved by the first request
+        state, tokens = flights.stream(
+            query_type.value,
+            coalesce_key(query_type, query, get_index_version()),
+            lambda state: stream_college_info_response(query, state.setdefault("sources", [])),
+        )
+        sources = state.setdefault("sources", [])
+    else:  # GENERAL
+        _, tokens = flights.stream(
+            query_type.value, coalesce_key(query_type, query), lambda state: stream_general_search_response(query)
+        )
+
+    parts = []
+    async for text in tokens:
+        parts.append(text)
+        yield "token", {"text": text}
+
+    logger.info(f"Streamed response generated for user_id={user.id}: type={query_type}")
+    yield "done", {
+        "query_type": query_type.value,
+        "response": "".join(parts).strip(),
+        "num_sources": len(sources),
+        "sources": [doc["metadata"] for doc in sources],
+    }
@@ -11,6 +11,11 @@ from langchain_pinecone import PineconeVectorStore
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from pinecone import Pinecone, ServerlessSpec
 
+from app.config import settings
+from app.chat.vectorstore import mark_index_rebuilt, load_embeddings
+from app.chat.local_index import build_local_index
+from app.chat.lexical_index import build_lexical_index
+
 # Load environment variables
 load_dotenv()
 
@@ -152,17 +157,26 @@ async def main():
     print("\n[Step 2] Chunking documents...")
     chunks = chunk_documents(documents, chunk_size=512, chunk_overlap=50)
     
-    # Step 3: Delete the Pinecone index
-    print("\n[Step 3] Deleting the index")
-    delete_pinecone_index()
+    # Step 3: Build the local in-process index
+    print("\n[Step 3] Building local index...")
+    vectorstore = build_local_index(chunks, load_embeddings(), settings.LOCAL_INDEX_DIR)
+    build_lexical_index(chunks, settings.LEXICAL_INDEX_PATH)
 
-    # Step 4: Get or create Pinecone index
-    print("\n[Step 4] Setting up Pinecone index...")
-    index = get_or_create_index(index_name)
-    
-    # Step 5: Add to Pinecone (UPDATE MODE = True)
-    print("\n[Step 5] Updating Pinecone index...")
-    vectorstore = add_to_pinecone(index_name, chunks)
+    if settings.VECTOR_BACKEND != "local":
+        # Step 4: Delete the Pinecone index
+        print("\n[Step 4] Deleting the index")
+        delete_pinecone_index()
+
+        # Step 5: Get or create Pinecone index
+        print("\n[Step 5] Setting up Pinecone index...")
+        index = get_or_create_index(index_name)
+        
+        # Step 6: Add to Pinecone (UPDATE MODE = True)
+        print("\n[Step 6] Updating Pinecone index...")
+        vectorstore = add_to_pinecone(index_name, chunks)
+
+    # Tell running servers to drop answers cached against the old index
+    mark_index_rebuilt()
     
     print("\n" + "=" * 70)
     print("✅ Process completed successfully!")
@@ -0,0 +1,209 @@
+"""
+Web search for GENERAL queries: shared HTTP session, strict deadline, TTL
+cache, and an optional local backend raced against the web.
+
+DuckDuckGo is queried through one shared duckduckgo_search DDGS session
+(its HTTP client, keep-alive and TLS sessions survive between queries)
+instead of building a new DuckDuckGoSearchRun per question. Every search is
+bounded by SEARCH_TIMEOUT: whatever has arrived by then is used, otherwise
+the placeholder answer is returned. Results are cached by normalized query.
+A search with no hits is a normal answer, not a dependency failure; only
+rate limits, timeouts and transport errors count against the breaker.
+
+With SEARCH_LOCAL_BACKEND=lexical the BM25 index of the college website
+(SEARCH_LOCAL_INDEX_PATH) is searched concurrently. A local hit scoring at
+least SEARCH_LOCAL_MIN_SCORE wins the race immediately; a weaker one (above
+SEARCH_LOCAL_FALLBACK_SCORE) is only used when the web search fails or misses
+the deadline.
+"""
+import time
+import asyncio
+import threading
+from collections import Counter, deque
+
+from app.config import settings
+from app.utilities.latency import latency_summary
+from app.utilities.cache import TTLCache, normalize_query
+from app.utilities.resilience import get_dependency
+from app.logger.logger import logger
+
+NO_RESULTS = "Unable to search at the moment."
+
+def format_results(hits: list) -> str:
+    """Prompt text for DDGS text() hits ({"title", "body", "href"} dicts); empty when there are none"""
+    return "\n".join(f"{hit.get('title', '')}: {hit.get('body', '')}" for hit in hits or [])
+
+
+# ===== Metrics =====
+class SearchStats:
+    """Which source answered each search, and end-to-end search latency"""
+
+    SOURCES = ("cache", "web", "local", "local_fallback", "none")
+
+    def __init__(self, window: int = 2000):
+        self.answered_by = Counter()
+        self.web_errors = 0
+        self.web_timeouts = 0
+        self.web_empty = 0
+        self.latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, source: str, seconds: float):
+        with self._lock:
+            self.answered_by[source] += 1
+            self.latencies.append(seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = sum(self.answered_by.values())
+            return {
+                "searches": total,
+                "answered_by": {source: self.answered_by[source] for source in self.SOURCES},
+                "web_errors": self.web_errors,
+                "web_timeouts": self.web_timeouts,
+                "web_empty": self.web_empty,
+                "latency": latency_summary(self.latencies),
+            }
+
+
+class WebSearch:
+    """Cached, deadline-bounded search over the web and an optional local index"""
+
+    def __init__(self):
+        self.cache = TTLCache(maxsize=settings.SEARCH_CACHE_SIZE, ttl=settings.SEARCH_CACHE_TTL)
+        self.stats = SearchStats()
+        self._client = None
+        self._local_index = None
+        self._local_checked = False
+
+    # ===== Backends =====
+    def client(self):
+        """Shared DDGS session, created on first use"""
+        if self._client is None:
+            from duckduckgo_search import DDGS
+            self._client = DDGS(timeout=max(1, round(settings.SEARCH_TIMEOUT)))
+        return self._client
+
+    def local_index(self):
+        """BM25 index for the local backend, loaded on first use (None when disabled or missing)"""
+        if not self._local_checked:
+            self._local_checked = True
+            if settings.SEARCH_LOCAL_BACKEND == "lexical":
+                from app.chat.lexical_index import BM25Index
+                try:
+                    self._local_index = BM25Index.load(settings.SEARCH_LOCAL_INDEX_PATH)
+                    logger.info(f"Local search backend: {len(self._local_index)} documents")
+                except FileNotFoundError:
+                    logger.warning(f"No local search index at '{settings.SEARCH_LOCAL_INDEX_PATH}'")
+        return self._local_index
+
+    async def search_web(self, query: str) -> str:
+        """DuckDuckGo results ("" when there are none), under the duckduckgo breaker and adaptive deadline"""
+        hits = await get_dependency("duckduckgo").call(asyncio.to_thread, self._fetch_web, query)
+        return format_results(hits)
+
+    def _fetch_web(self, query: str) -> list:
+        """DDGS text() hits; an empty list when DuckDuckGo has nothing for the query"""
+        from duckduckgo_search.exceptions import DuckDuckGoSearchException, RatelimitException, TimeoutException
+        try:
+            return self.client().text(query, max_results=settings.SEARCH_MAX_RESULTS) or []
+        except (RatelimitException, TimeoutException):
+            raise
+        except DuckDuckGoSearchException as e:
+            # DDGS reports an empty result page as an exception; that is an answer, not an outage
+            if "no results" in str(e).lower():
+                return []
+            raise
+
+    async def search_local(self, query: str) -> tuple[str, float]:
+        """(joined top chunks, best BM25 score) from the local index"""
+        index = self.local_index()
+        if index is None:
+            return "", 0.0
+        hits = await asyncio.to_thread(index.search, query, settings.SEARCH_MAX_RESULTS)
+        if not hits:
+            return "", 0.0
+        return "\n\n".join(doc.page_content for doc, _ in hits), hits[0][1]
+
+    # ===== Search =====
+    async def search(self, query: str) -> str:
+        """Search results for the LLM prompt, within SEARCH_TIMEOUT; never raises"""
+        started = time.perf_counter()
+        key = normalize_query(query)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats.record("cache", time.perf_counter() - started)
+            return cached
+
+        web = asyncio.create_task(self.search_web(query))
+        local = asyncio.create_task(self.search_local(query)) if self.local_index() is not None else None
+        pending = {task for task in (web, local) if task is not None}
+        deadline = started + settings.SEARCH_TIMEOUT
+        result, source, weak_local = None, "none", None
+
+        try:
+            while pending and result is None:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0.0, deadline - time.perf_counter()), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    if not web.done():
+                        # Cancelled below, so count the miss against the dependency here
+                        self.stats.web_timeouts += 1
+                        get_dependency("duckduckgo").record(time.perf_counter() - started, ok=False, timed_out=True)
+                    break
+                for task in done:
+                    if task is web:
+                        if task.exception() is None:
+                            if task.result():
+                                result, source = task.result(), "web"
+                            else:
+                                self.stats.web_empty += 1
+                        else:
+                            self.stats.web_errors += 1
+                            logger.warning(f"Web search failed: {task.exception()}")
+                    elif task.exception() is None:
+                        text, score = task.result()
+                        if text and score >= settings.SEARCH_LOCAL_MIN_SCORE:
+                            result, source = text, "local"
+                        elif text and score >= settings.SEARCH_LOCAL_FALLBACK_SCORE:
+                            weak_local = text
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if result is None and weak_local is not None:
+            result, source = weak_local, "local_fallback"
+        self.stats.record(source, time.perf_counter() - started)
+        if result is None:
+            return NO_RESULTS
+        # A weak local fallback is not cached, so the next ask can still get web results
+        if source != "local_fallback":
+            self.cache.set(key, result)
+        return result
+
+    def get_stats(self) -> dict:
+        return {
+            "timeout_s": settings.SEARCH_TIMEOUT,
+            "local_backend": settings.SEARCH_LOCAL_BACKEND or None,
+            "local_index_loaded": self._local_index is not None,
+            "cache": self.cache.stats(),
+            **self.stats.stats(),
+        }
+
+    async def aclose(self):
+        # DDGS closes its HTTP client when released
+        self._client = None
+
+
+# ============================================
+# GLOBAL INSTANCE (Initialize once)
+# ============================================
+
+web_search = None
+
+def get_web_search() -> WebSearch:
+    global web_search
+    if web_search is None:
+        web_search = WebSearch()
+    return web_search
@@ -0,0 +1,214 @@
+"""
+Semantic answer cache for COLLEGE_INFO queries.
+
+Answers are stored with the (normalized) MiniLM embedding of the question.
+A new question reuses a cached answer when its cosine similarity to a stored
+question clears the threshold, skipping Pinecone retrieval and the Groq call.
+
+Embeddings live in one matrix allocated for `maxsize` rows; a store writes
+its row in place (reusing the slot of an expired or least recently used
+entry), so a lookup is a single matrix-vector product.
+
+Embeddings barely separate questions that differ only in a program code or
+a number ("BCA fees" vs "BBA fees", "2080 batch" vs "2081 batch"), so a
+similar entry is only a hit when both questions name the same key terms:
+numbers, and acronyms (BCA, BSc, CSIT) written in capitals in either
+question or in any question stored before.
+"""
+import re
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from app.config import settings
+from app.utilities.cache import normalize_query
+from app.chat.lexical_index import tokenize
+from app.chat.vectorstore import get_index_version
+from app.logger.logger import logger
+
+_RAW_TOKEN = re.compile(r"[\w.]+")
+
+def key_terms(text: str) -> set:
+    """Numbers and capitalized acronyms in the question, lowercased like `tokenize`"""
+    terms = set()
+    for token in _RAW_TOKEN.findall(text):
+        token = token.replace(".", "")
+        if any(c.isdigit() for c in token) or sum(c.isupper() for c in token) >= 2:
+            terms.add(token.lower())
+    return terms
+
+
+class SemanticCache:
+    """TTL + LRU cache of RAG answers, looked up by embedding similarity"""
+
+    def __init__(self, threshold: float, maxsize: int, ttl: float, version_check_interval: float = 30):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self.index_version = get_index_version()
+        self._last_version_check = time.monotonic()
+        self._lock = threading.Lock()
+        self._reset()
+        self.acronyms = set()     # acronyms seen in capitals, matched in lowercase questions too
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.term_mismatches = 0  # similar enough, but naming a different program / number
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _reset(self):
+        self.vectors = None                          # (maxsize, dim) float32, allocated on first store
+        self.expires_at = np.full(self.maxsize, -np.inf)  # -inf marks a free row
+        self.rows = [None] * self.maxsize            # row -> (key, tokens, key terms, result)
+        self.slots = OrderedDict()                   # normalized query -> row, in LRU order
+        self.free = list(range(self.maxsize - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    # ===== Invalidation =====
+    def invalidate(self, reason: str = "manual"):
+        """Drop every cached answer"""
+        with self._lock:
+            self._reset()
+        self.invalidations += 1
+        logger.info(f"Semantic cache invalidated ({reason})")
+
+    def _check_index_version(self):
+        """Clear the cache when the indexer has rebuilt the college index"""
+        now = time.monotonic()
+        if now - self._last_version_check < self.version_check_interval:
+            return
+        self._last_version_check = now
+        version = get_index_version()
+        if version != self.index_version:
+            self.index_version = version
+            self.invalidate(f"index rebuilt at {version}")
+
+    # ===== Rows (caller holds the lock) =====
+    def _release(self, row: int):
+        key = self.rows[row][0]
+        del self.slots[key]
+        self.rows[row] = None
+        self.expires_at[row] = -np.inf
+        self.free.append(row)
+
+    def _take_row(self) -> int:
+        """A free row, reclaiming expired rows first, then the least recently used one"""
+        if not self.free:
+            expired = np.flatnonzero(np.isfinite(self.expires_at) & (self.expires_at < time.monotonic()))
+            for row in expired:
+                self._release(int(row))
+            self.expirations += len(expired)
+        if not self.free:
+            _, row = self.slots.popitem(last=False)
+            self.rows[row] = None
+            self.expires_at[row] = -np.inf
+            self.free.append(row)
+            self.evictions += 1
+        return self.free.pop()
+
+    def _same_terms(self, tokens: set, terms: set, entry_tokens: set, entry_terms: set) -> bool:
+        """Whether every key term of either question appears in both"""
+        terms = terms | entry_terms | (self.acronyms & (tokens | entry_tokens))
+        return all(term in tokens and term in entry_tokens for term in terms)
+
+    # ===== Lookup / store =====
+    def lookup(self, query: str, query_vector) -> dict | None:
+        """Return a cached result for this query or a close paraphrase of it"""
+        self._check_index_version()
+        key = normalize_query(query)
+        now = time.monotonic()
+
+        with self._lock:
+            row = self.slots.get(key)
+            if row is not None:
+                if self.expires_at[row] >= now:
+                    self.slots.move_to_end(key)
+                    self.exact_hits += 1
+                    return {**self.rows[row][3], "similarity": 1.0}
+                self._release(row)
+                self.expirations += 1
+
+            if self.slots:
+                # Embeddings are L2-normalized, so the dot product is the cosine similarity
+                scores = self.vectors @ np.asarray(query_vector, dtype=np.float32)
+                scores[self.expires_at < now] = -np.inf  # free and expired rows
+                tokens, terms = set(tokenize(query)), key_terms(query)
+                candidates = np.flatnonzero(scores >= self.threshold)
+                for row in candidates[np.argsort(-scores[candidates])]:
+                    entry_key, entry_tokens, entry_terms, result = self.rows[row]
+                    if not self._same_terms(tokens, terms, entry_tokens, entry_terms):
+                        self.term_mismatches += 1
+                        continue
+                    self.slots.move_to_end(entry_key)
+                    self.semantic_hits += 1
+                    return {**result, "similarity": round(float(scores[row]), 4)}
+
+            self.misses += 1
+            return None
+
+    def store(self, query: str, query_vector, result: dict):
+        """Cache a successful RAG result under its query embedding"""
+        if result.get("error"):
+            return
+        key = normalize_query(query)
+        vector = np.asarray(query_vector, dtype=np.float32)
+        tokens, terms = set(tokenize(query)), key_terms(query)
+        with self._lock:
+            self.acronyms |= {term for term in terms if not term.isdigit()}
+            if self.vectors is None:
+                self.vectors = np.zeros((self.maxsize, len(vector)), dtype=np.float32)
+            row = self.slots.get(key)
+            if row is None:
+                row = self._take_row()
+                self.slots[key] = row
+            self.slots.move_to_end(key)
+            self.vectors[row] = vector
+            self.rows[row] = (key, tokens, terms, result)
+            self.expires_at[row] = time.monotonic() + self.ttl
+
+    def stats(self) -> dict:
+        hits = self.exact_hits + self.semantic_hits
+        lookups = hits + self.misses
+        return {
+            "enabled": settings.SEMANTIC_CACHE_ENABLED,
+            "threshold": self.threshold,
+            "size": len(self),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": hits,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "key_term_mismatches": self.term_mismatches,
+            "known_acronyms": len(self.acronyms),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "index_version": self.index_version,
+        }
+
+
+# ============================================
+# GLOBAL INSTANCE (Initialize once)
+# ============================================
+
+semantic_cache = None
+
+def get_semantic_cache() -> SemanticCache:
+    """Get or create the COLLEGE_INFO semantic cache"""
+    global semantic_cache
+    if semantic_cache is None:
+        semantic_cache = SemanticCache(
+            threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+            maxsize=settings.SEMANTIC_CACHE_MAXSIZE,
+            ttl=settings.SEMANTIC_CACHE_TTL,
+        )
+    return semantic_cache
@@ -0,0 +1,204 @@
+"""
+Deterministic answers for simple structured queries.
+
+"What is my attendance?" or "how much fee is due?" is fully answered by the
+user's records, so it is rendered from a template instead of a Gemini
+completion. A template only answers when the whole normalized query matches
+one of its intent patterns (optionally wrapped in polite filler such as
+"can you tell me ... please"); anything open-ended ("why is my attendance
+low?") still goes to the LLM.
+
+Each template has a latency budget for record loading + rendering. Calls
+over budget are logged and counted, and /stats reports per-template
+latency and how often each structured QueryType was answered without the LLM.
+"""
+import re
+import threading
+from collections import Counter, deque
+from typing import Optional
+
+from app.config import settings
+from app.utilities.latency import latency_summary
+from app.models.schemas import QueryType
+from app.utilities.cache import normalize_query
+from app.chat.chatbot import (
+    format_attendance_data,
+    format_fees_data,
+    format_marks_data,
+    format_course_data,
+    format_assignment_data,
+    format_user_data,
+    format_notice_data,
+)
+from app.logger.logger import logger
+
+# Polite lead-ins and trailers around an intent, on normalize_query() text
+_PREFIX = (
+    r"(?:(?:hi|hello|hey|please|pls|kindly|can you|could you|would you|can i|could i|may i|i want to|i d like to)\s+)*"
+    r"(?:(?:what is|what s|whats|what are|show|show me|tell me|check|get|give me|display|list|see|view|know|"
+    r"fetch|how much|how many|how is)\s+)?"
+)
+_SUFFIX = r"(?:\s+(?:please|pls|now|today|for me|thanks|thank you))*"
+
+def _intent(*patterns: str) -> re.Pattern:
+    return re.compile(_PREFIX + r"(?:" + "|".join(patterns) + r")" + _SUFFIX)
+
+# ===== Renderers =====
+def render_attendance(records) -> str:
+    if not records:
+        return format_attendance_data(records)
+    average = sum(record.total for record in records) / len(records)
+    return f"Your average attendance is {average:.0f}% across {len(records)} record(s).\n\n" + format_attendance_data(records)
+
+def render_fees_due(records) -> str:
+    if not records:
+        return format_fees_data(records)
+    due = [record for record in records if record.amount_due > 0]
+    if not due:
+        return "You have no fees due. All your fee records are cleared.\n\n" + format_fees_data(records)
+    lines = "\n".join(f"- Semester {record.semester}: Rs. {record.amount_due} ({record.payment_status})" for record in due)
+    return f"You have Rs. {sum(record.amount_due for record in due)} due in total:\n{lines}"
+
+def render_fees(records) -> str:
+    return format_fees_data(records)
+
+def render_marks(records) -> str:
+    if not records:
+        return format_marks_data(records)
+    failed = [record.subject for record in records if str(record.status).lower() == "fail"]
+    summary = f"You have marks recorded for {len(records)} subject(s)"
+    summary += f"; not yet passed: {', '.join(failed)}." if failed else "."
+    return summary + "\n\n" + format_marks_data(records)
+
+def render_courses(records) -> str:
+    return format_course_data(records)
+
+def render_profile(record) -> str:
+    return format_user_data(record)
+
+def render_assignments(records) -> str:
+    return format_assignment_data(records)
+
+def render_notices(records) -> str:
+    return format_notice_data(records)
+
+
+class AnswerTemplate:
+    """An intent pattern for one QueryType and the renderer that answers it"""
+
+    def __init__(self, name: str, query_type: QueryType, pattern: re.Pattern, render, budget_ms: Optional[float] = None):
+        self.name = name
+        self.query_type = query_type
+        self.pattern = pattern
+        self.render = render
+        self.budget_ms = budget_ms or settings.TEMPLATE_ANSWER_BUDGET_MS
+
+    def matches(self, normalized_query: str) -> bool:
+        return self.pattern.fullmatch(normalized_query) is not None
+
+
+# Checked in order; the first template of the query's type that matches answers it
+TEMPLATES = (
+    AnswerTemplate("attendance_summary", QueryType.ATTENDANCE, _intent(
+        r"(?:my\s+)?(?:current\s+|overall\s+|total\s+)?attendance(?:\s+(?:record|records|status|percentage|details|report))?",
+        r"(?:what\s+is\s+)?my\s+attendance\s+(?:percentage|status)",
+    ), render_attendance),
+    AnswerTemplate("fees_due", QueryType.FEES, _intent(
+        r"(?:my\s+)?(?:fee|fees)\s+(?:is\s+|are\s+)?(?:due|pending|remaining|left|unpaid)",
+        r"(?:my\s+)?(?:due|pending|remaining|unpaid)\s+(?:fee|fees|amount|dues)",
+        r"(?:my\s+)?dues",
+        r"do\s+i\s+(?:have|owe)\s+(?:any\s+)?(?:fee|fees|dues)(?:\s+(?:due|pending|left))?",
+        r"(?:fee|fees)\s+do\s+i\s+(?:owe|have\s+to\s+pay|need\s+to\s+pay)",
+        r"do\s+i\s+owe",
+    ), render_fees_due),
+    AnswerTemplate("fees_status", QueryType.FEES, _intent(
+        r"(?:my\s+)?(?:fee|fees)(?:\s+(?:status|details|records|record|payment|payments|payment\s+status))?",
+    ), render_fees),
+    AnswerTemplate("marks_summary", QueryType.MARKS, _intent(
+        r"(?:my\s+)?(?:marks|grades|results?|scores?)(?:\s+(?:details|records|report|list))?",
+    ), render_marks),
+    AnswerTemplate("courses_list", QueryType.COURSE, _intent(
+        r"(?:my\s+)?(?:enrolled\s+)?courses",
+        r"(?:which|what)\s+courses\s+(?:am\s+i\s+enrolled\s+in|do\s+i\s+have|i\s+am\s+enrolled\s+in)",
+    ), render_courses),
+    AnswerTemplate("profile", QueryType.USER_INFO, _intent(
+        r"my\s+(?:profile|account|details|info|information)(?:\s+(?:details|information|info))?",
+        r"who\s+am\s+i",
+    ), render_profile),
+    AnswerTemplate("assignments_recent", QueryType.ASSIGNMENT, _intent(
+        r"(?:my\s+|the\s+)?(?:recent\s+|latest\s+|new\s+)?assignments?",
+    ), render_assignments),
+    AnswerTemplate("notices_recent", QueryType.NOTICES, _intent(
+        r"(?:the\s+)?(?:recent\s+|latest\s+|new\s+|any\s+new\s+)?(?:notices?|announcements?)",
+    ), render_notices),
+)
+
+def match_template(query_type: QueryType, query: str) -> Optional[AnswerTemplate]:
+    """Template whose intent the whole query matches, or None (answer with the LLM)"""
+    key = normalize_query(query)
+    for template in TEMPLATES:
+        if template.query_type == query_type and template.matches(key):
+            return template
+    return None
+
+
+# ===== Metrics =====
+class TemplateStats:
+    """Structured queries per QueryType, how many each template answered, and its latency vs budget"""
+
+    def __init__(self, window: int = 2000):
+        self.considered = Counter()
+        self.answered = Counter()
+        self.over_budget = Counter()
+        self.errors = Counter()
+        self.latencies = {template.name: deque(maxlen=window) for template in TEMPLATES}
+        self._lock = threading.Lock()
+
+    def record_query(self, query_type: QueryType):
+        with self._lock:
+            self.considered[query_type.value] += 1
+
+    def record(self, template: AnswerTemplate, seconds: float, ok: bool = True):
+        with self._lock:
+            if not ok:
+                self.errors[template.name] += 1
+                return
+            self.answered[template.name] += 1
+            self.latencies[template.name].append(seconds)
+            if seconds * 1000 > template.budget_ms:
+                self.over_budget[template.name] += 1
+                logger.warning(f"Template '{template.name}' took {seconds * 1000:.1f}ms (budget {template.budget_ms}ms)")
+
+    def stats(self) -> dict:
+        with self._lock:
+            answered_by_type = Counter()
+            for template in TEMPLATES:
+                answered_by_type[template.query_type.value] += self.answered[template.name]
+            return {
+                "enabled": settings.TEMPLATE_ANSWERS,
+                "hit_rate": {
+                    query_type: round(answered_by_type[query_type] / total, 4)
+                    for query_type, total in self.considered.items()
+                },
+                "templates": {
+                    template.name: {
+                        "query_type": template.query_type.value,
+                        "answered": self.answered[template.name],
+                        "errors": self.errors[template.name],
+                        "budget_ms": template.budget_ms,
+                        "over_budget": self.over_budget[template.name],
+                        **latency_summary(self.latencies[template.name]),
+                    }
+                    for template in TEMPLATES
+                },
+            }
+
+
+# ============================================
+# GLOBAL INSTANCE (Initialize once)
+# ============================================
+
+template_stats = TemplateStats()
+
+def get_template_stats() -> TemplateStats:
+    return template_stats
@@ -0,0 +1,226 @@
+"""
+Singleton embedding model and vector store for college-info RAG.
+Loaded once during the FastAPI lifespan and shared by every request.
+The backend is Pinecone or the in-process LocalVectorIndex (VECTOR_BACKEND).
+When the crawler marks a rebuild (INDEX_VERSION_FILE), the local dense index
+and the BM25 index are reopened without a restart.
+"""
+import os
+import time
+import tempfile
+import threading
+from datetime import datetime
+
+import psutil
+
+from app.config import settings
+from app.classify.executor import configure_torch_threads
+from app.logger.logger import logger
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+COLLEGE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "mbmc-college-website")
+WARMUP_QUERY = "What courses does MBMC offer?"
+INDEX_VERSION_CHECK_INTERVAL = 30  # seconds between checks of the rebuild marker
+# Written by the indexer after every rebuild so caches in running workers can notice
+INDEX_VERSION_FILE = os.getenv("COLLEGE_INDEX_VERSION_FILE", os.path.join("data", "college_index.version"))
+
+# ===== Index version marker =====
+def get_index_version() -> str | None:
+    """Current index build marker, or None if the index was never marked"""
+    try:
+        with open(INDEX_VERSION_FILE, "r") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def mark_index_rebuilt() -> str:
+    """Record that the college index was (re)built; returns the new version"""
+    version = datetime.now().isoformat()
+    directory = os.path.dirname(INDEX_VERSION_FILE) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    with os.fdopen(fd, "w") as f:
+        f.write(version)
+    os.replace(tmp_path, INDEX_VERSION_FILE)
+    return version
+
+def load_embeddings():
+    """MiniLM embedding model, identical for indexing and querying"""
+    # sentence-transformers (and torch) load on first use, not at app import
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    configure_torch_threads()
+    return HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL_NAME,
+        model_kwargs={'device': 'cpu'},  # or 'cuda' if available
+        encode_kwargs={'normalize_embeddings': True}
+    )
+
+class CollegeVectorStore:
+    """
+    Singleton holder for the MiniLM embedding model and the vector store handle,
+    so the sentence-transformer is read from disk once per process.
+    Loads and index reloads are serialized by one lock (double-checked), so
+    concurrent first requests and the warmup thread load everything once.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is not None:
+                return cls._instance
+            cls._instance = super(CollegeVectorStore, cls).__new__(cls)
+            cls._instance.embeddings = None
+            cls._instance.vectorstore = None
+            cls._instance.lexical = None
+            cls._instance.index_name = COLLEGE_INDEX_NAME
+            cls._instance.stats = {}
+            cls._instance.index_version = None
+            cls._instance.reloads = 0
+            cls._instance._last_version_check = 0.0
+            return cls._instance
+
+    @property
+    def loaded(self) -> bool:
+        return self.vectorstore is not None
+
+    def load(self, warmup: bool = True):
+        """Load the embedding model and open the vector store, then warm both up"""
+        if self.loaded:
+            return self
+        with self._lock:
+            if self.loaded:
+                return self
+            return self._load(warmup)
+
+    def _load(self, warmup: bool):
+        process = psutil.Process()
+        rss_before = process.memory_info().rss
+        start_time = time.time()
+
+        self.embeddings = load_embeddings()
+        embeddings_loaded = time.time()
+
+        self.index_version = get_index_version()
+        self._last_version_check = time.monotonic()
+        vectorstore = self._open_vectorstore()
+        vectorstore_loaded = time.time()
+
+        self.stats = {
+            "backend": settings.VECTOR_BACKEND,
+            "embedding_model": EMBEDDING_MODEL_NAME,
+            "index_name": settings.LOCAL_INDEX_DIR if settings.VECTOR_BACKEND == "local" else self.index_name,
+            "embedding_load_ms": round((embeddings_loaded - start_time) * 1000, 2),
+            "vectorstore_load_ms": round((vectorstore_loaded - embeddings_loaded) * 1000, 2),
+            "rss_delta_mb": round((process.memory_info().rss - rss_before) / 1024 ** 2, 1),
+        }
+
+        self.lexical = self._open_lexical()
+        self._publish_index_stats(vectorstore)
+        self.vectorstore = vectorstore
+
+        if warmup:
+            self.warmup()
+
+        logger.info(f"College vector store ready: {self.stats}")
+        return self
+
+    def _open_vectorstore(self):
+        if settings.VECTOR_BACKEND == "local":
+            from app.chat.local_index import LocalVectorIndex
+            return LocalVectorIndex.load(
+                settings.LOCAL_INDEX_DIR,
+                embedding=self.embeddings,
+                search_type=settings.LOCAL_INDEX_SEARCH,
+                nprobe=settings.LOCAL_INDEX_NPROBE,
+            )
+        from langchain_pinecone import PineconeVectorStore
+        return PineconeVectorStore(
+            index_name=self.index_name,
+            embedding=self.embeddings,
+            pinecone_api_key=os.getenv("PINECONE_API_KEY")
+        )
+
+    def _open_lexical(self):
+        """BM25 side of hybrid retrieval, built by the crawler next to the dense index"""
+        if not settings.HYBRID_RETRIEVAL:
+            return None
+        from app.chat.lexical_index import BM25Index
+        try:
+            return BM25Index.load(settings.LEXICAL_INDEX_PATH)
+        except FileNotFoundError:
+            logger.warning(f"No BM25 index at {settings.LEXICAL_INDEX_PATH}, using dense retrieval only")
+            return None
+
+    def _publish_index_stats(self, vectorstore):
+        self.stats["index_version"] = self.index_version
+        if settings.VECTOR_BACKEND == "local":
+            self.stats["local_index"] = vectorstore.stats()
+        if self.lexical is not None:
+            self.stats["lexical_index"] = self.lexical.stats()
+
+    # ===== Index rebuilds =====
+    def index_changed(self) -> bool:
+        """Whether the crawler marked a rebuild since the indexes were opened (checked every INDEX_VERSION_CHECK_INTERVAL s)"""
+        now = time.monotonic()
+        if not self.loaded or now - self._last_version_check < INDEX_VERSION_CHECK_INTERVAL:
+            return False
+        self._last_version_check = now
+        return get_index_version() != self.index_version
+
+    def reload_indexes(self):
+        """Reopen the dense (local backend) and BM25 indexes after a rebuild; the embedding model is kept"""
+        if get_index_version() == self.index_version:
+            return self
+        with self._lock:
+            # Another thread may have reloaded (or loaded) while this one waited
+            version = get_index_version()
+            if version == self.index_version or not self.loaded:
+                return self
+            started = time.time()
+            # Build the new handles first; in-flight searches keep the old ones
+            vectorstore = self._open_vectorstore() if settings.VECTOR_BACKEND == "local" else self.vectorstore
+            lexical = self._open_lexical()
+            self.vectorstore, self.lexical, self.index_version = vectorstore, lexical, version
+            self._publish_index_stats(vectorstore)
+            self.reloads += 1
+            self.stats["index_reloads"] = self.reloads
+        logger.info(f"College indexes reloaded for version {version} in {(time.time() - started) * 1000:.1f}ms")
+        return self
+
+    def warmup(self):
+        """Run one embedding and one search so the first real query pays no setup cost"""
+        start_time = time.time()
+        vector = self.embeddings.embed_query(WARMUP_QUERY)
+        self.stats["warmup_embed_ms"] = round((time.time() - start_time) * 1000, 2)
+
+        start_time = time.time()
+        try:
+            self.vectorstore.similarity_search_by_vector(vector, k=1)
+            self.stats["warmup_search_ms"] = round((time.time() - start_time) * 1000, 2)
+        except Exception as e:
+            logger.warning(f"Vector store warmup search failed: {e}")
+            self.stats["warmup_search_error"] = str(e)
+
+    def health(self) -> dict:
+        """Load state, timings and memory for /health"""
+        return {
+            "loaded": self.loaded,
+            **self.stats,
+            "process_rss_mb": round(psutil.Process().memory_info().rss / 1024 ** 2, 1),
+        }
+
+
+# ============================================
+# GLOBAL INSTANCE (Initialize once)
+# ============================================
+
+college_vectorstore = None
+
+def get_college_vectorstore() -> CollegeVectorStore:
+    """Get or create the shared college vector store"""
+    global college_vectorstore
+    if college_vectorstore is None:
+        college_vectorstore = CollegeVectorStore()
+    return college_vectorstore
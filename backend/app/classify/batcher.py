@@ -0,0 +1,150 @@
+"""
+Dynamic micro-batching in front of QueryClassifier.
+
+Concurrent classify calls are queued and collected for up to
+`max_batch_size` items or `max_wait_ms` milliseconds, whichever comes
+first, then run as one `predict_batch` forward pass on the inference
+executor. Each caller gets its own result back through a future.
+"""
+import asyncio
+import time
+from collections import Counter
+
+from app.config import settings
+from app.classify.executor import run_inference
+from app.classify.classify_query import get_classifier
+from app.logger.logger import logger
+
+class MicroBatcher:
+    """Collects single predictions into batched forward passes"""
+
+    def __init__(self, predict_batch, predict_one, max_batch_size: int = 16, max_wait_ms: float = 5, max_queue: int = 256):
+        self.predict_batch = predict_batch
+        self.predict_one = predict_one
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.queue = None
+        self.worker = None
+
+        # Stats
+        self.batches = 0
+        self.items = 0
+        self.overflow = 0
+        self.max_queue_depth = 0
+        self.batch_sizes = Counter()
+        self.total_queue_wait = 0.0
+        self.total_batch_time = 0.0
+
+    def _ensure_worker(self):
+        if self.worker is None or self.worker.done():
+            self.queue = asyncio.Queue(maxsize=self.max_queue)
+            self.worker = asyncio.create_task(self._run())
+
+    async def submit(self, text: str) -> dict:
+        """Queue one text and wait for its prediction"""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((text, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            # Shed to a single forward pass rather than queueing without bound
+            self.overflow += 1
+            return await run_inference(self.predict_one, text)
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        return await future
+
+    async def _collect(self, batch: list):
+        """Wait for one item, then gather more until the batch is full or the window closes"""
+        batch.append(await self.queue.get())
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self):
+        batch = []
+        try:
+            while True:
+                # Items taken off the queue live in `batch` until answered, so a cancel can fail them
+                batch = []
+                await self._collect(batch)
+                texts = [text for text, _, _ in batch]
+                started = time.perf_counter()
+                try:
+                    results = await run_inference(self.predict_batch, texts)
+                    if len(results) != len(batch):
+                        raise RuntimeError(f"predict_batch returned {len(results)} results for {len(batch)} inputs")
+                except Exception as e:
+                    logger.error(f"Batched classification failed: {e}")
+                    results = [{"error": str(e), "query_type": "unknown"}] * len(batch)
+                finished = time.perf_counter()
+
+                self.batches += 1
+                self.items += len(batch)
+                self.batch_sizes[len(batch)] += 1
+                self.total_batch_time += finished - started
+                for (_, future, enqueued), result in zip(batch, results):
+                    self.total_queue_wait += started - enqueued
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            # Stopped (shutdown / reload): nobody will answer these callers otherwise
+            pending = [future for _, future, _ in batch]
+            while not self.queue.empty():
+                pending.append(self.queue.get_nowait()[1])
+            for future in pending:
+                if not future.done():
+                    future.set_exception(RuntimeError("Classifier batcher stopped"))
+
+    async def stop(self):
+        """Cancel the worker (server shutdown)"""
+        if self.worker is not None:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+            self.worker = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.CLASSIFIER_BATCHING,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_queue": self.max_queue,
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "batches": self.batches,
+            "items": self.items,
+            "overflow": self.overflow,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+            "avg_queue_wait_ms": round(self.total_queue_wait / self.items * 1000, 2) if self.items else 0.0,
+            "avg_batch_time_ms": round(self.total_batch_time / self.batches * 1000, 2) if self.batches else 0.0,
+        }
+
+
+# ============================================
+# GLOBAL INSTANCE (Initialize once)
+# ============================================
+
+classify_batcher = None
+
+def get_classify_batcher() -> MicroBatcher:
+    """Get or create the classifier micro-batcher"""
+    global classify_batcher
+    if classify_batcher is None:
+        classify_batcher = MicroBatcher(
+            predict_batch=lambda texts: get_classifier().predict_batch(texts),
+            predict_one=lambda text: get_classifier().predict(text),
+            max_batch_size=settings.CLASSIFIER_MAX_BATCH_SIZE,
+            max_wait_ms=settings.CLASSIFIER_MAX_WAIT_MS,
+            max_queue=settings.CLASSIFIER_MAX_QUEUE,
+        )
+    return classify_batcher
@@ -0,0 +1,399 @@
+"""
+Two-stage classifier cascade.
+
+Stage one is a softmax-regression model over hashed word and character
+n-grams (NumPy only, well under a millisecond per query). It answers on
+its own when its confidence clears a threshold calibrated on held-out
+predictions; otherwise
+the query goes to the transformer classifier. The student is trained on
+data/college_queries.csv plus confident transformer predictions logged
+from live traffic (distillation).
+
+Logged predictions and the student carry the transformer version they came
+from. Training only distils entries from one version, and a student
+distilled from another version than the one being served is not used
+(retrain it after activating a new model).
+
+Usage (from backend/):
+    python -m app.classify.cascade train [version]   # fit, calibrate, save CASCADE_MODEL_PATH
+"""
+import os
+import sys
+import csv
+import json
+import time
+import zlib
+import asyncio
+import hashlib
+import threading
+from collections import Counter, deque
+
+import numpy as np
+
+from app.config import settings
+from app.utilities.latency import latency_summary
+from app.utilities.cache import normalize_query
+from app.logger.logger import logger
+
+# ===== Features =====
+def hashed_features(text: str, n_features: int) -> np.ndarray:
+    """Bucket ids of word 1-2 grams and character 3-grams (stable crc32 hashing)"""
+    words = normalize_query(text).split()
+    grams = [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"<{w}>"
+        grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    if not grams:
+        return np.zeros(0, dtype=np.int64)
+    return np.unique([zlib.crc32(g.encode()) % n_features for g in grams]).astype(np.int64)
+
+
+class HashedLinearClassifier:
+    """Multinomial logistic regression over hashed n-gram indicators"""
+
+    def __init__(self, labels: list, n_features: int = 2 ** 16, threshold: float = 1.0):
+        self.labels = list(labels)
+        self.n_features = n_features
+        self.threshold = threshold
+        self.weights = np.zeros((n_features, len(self.labels)), dtype=np.float32)
+        self.bias = np.zeros(len(self.labels), dtype=np.float32)
+        self.meta = {}
+
+    @property
+    def teacher_version(self) -> str:
+        """Transformer version whose logged predictions the student was distilled from"""
+        return self.meta.get("teacher_version", "default")
+
+    # ===== Train =====
+    def fit(self, texts: list, labels: list, epochs: int = 30, lr: float = 0.1, l2: float = 1e-4, seed: int = 42):
+        """Full-pass SGD on sparse rows; features are binary so a row's logits are a sum of weight rows"""
+        label_ids = {label: i for i, label in enumerate(self.labels)}
+        rows = [hashed_features(t, self.n_features) for t in texts]
+        targets = np.array([label_ids[label] for label in labels])
+        rng = np.random.default_rng(seed)
+
+        for epoch in range(epochs):
+            step = lr / (1 + epoch * 0.1)
+            for i in rng.permutation(len(rows)):
+                idx = rows[i]
+                probs = self._softmax(self.weights[idx].sum(axis=0) + self.bias)
+                probs[targets[i]] -= 1.0
+                self.weights[idx] -= step * (probs + l2 * self.weights[idx])
+                self.bias -= step * probs
+        return self
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        exp = np.exp(logits - logits.max())
+        return exp / exp.sum()
+
+    # ===== Inference =====
+    def predict_proba(self, text: str) -> np.ndarray:
+        return self._softmax(self.weights[hashed_features(text, self.n_features)].sum(axis=0) + self.bias)
+
+    def predict(self, text: str) -> dict:
+        """Prediction dict in the same shape as QueryClassifier.predict"""
+        start_time = time.perf_counter()
+        probs = self.predict_proba(text)
+        label_id = int(np.argmax(probs))
+        return {
+            "query_type": self.labels[label_id],
+            "confidence": round(float(probs[label_id]), 4),
+            "inference_time_ms": round((time.perf_counter() - start_time) * 1000, 4),
+            "source": "student",
+        }
+
+    # ===== Persistence =====
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Only non-zero weight rows are stored
+        rows = np.flatnonzero(np.any(self.weights != 0, axis=1))
+        np.savez_compressed(
+            path,
+            rows=rows,
+            weights=self.weights[rows],
+            bias=self.bias,
+            config=json.dumps({
+                "labels": self.labels,
+                "n_features": self.n_features,
+                "threshold": self.threshold,
+                "meta": self.meta,
+            }),
+        )
+
+    @classmethod
+    def load(cls, path: str):
+        data = np.load(path)
+        config = json.loads(str(data["config"]))
+        model = cls(config["labels"], config["n_features"], config["threshold"])
+        model.weights[data["rows"]] = data["weights"]
+        model.bias = data["bias"]
+        model.meta = config.get("meta", {})
+        return model
+
+
+# ===== Calibration =====
+def calibrate_threshold(confidences: np.ndarray, correct: np.ndarray, target_precision: float) -> float:
+    """Lowest confidence cut-off whose accepted predictions are at least `target_precision` correct"""
+    order = np.argsort(-confidences)
+    precision = np.cumsum(correct[order]) / np.arange(1, len(order) + 1)
+    ok = np.flatnonzero(precision >= target_precision)
+    if not len(ok):
+        return 1.01  # never trust the student
+    # Largest accepted prefix that still meets the target
+    return float(confidences[order][ok[-1]])
+
+
+def load_training_data(csv_path: str | None = None, traffic_path: str | None = None,
+                       model_version: str | None = None) -> tuple:
+    """Labelled queries plus confident transformer predictions from the traffic log (of `model_version` only, if given)"""
+    csv_path = csv_path or settings.QUERY_DATASET_PATH
+    traffic_path = traffic_path or settings.CASCADE_TRAFFIC_LOG
+    texts, labels = [], []
+    with open(csv_path, newline="") as f:
+        for row in csv.DictReader(f):
+            texts.append(row["Queries"])
+            labels.append(row["labels"].strip())
+    labelled = len(texts)
+
+    seen = {normalize_query(t) for t in texts}
+    for path in traffic_log_files(traffic_path):
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if "query" not in entry:
+                    continue  # logged without its text (CASCADE_TRAFFIC_STORE_QUERIES off)
+                if model_version and entry.get("model_version", "default") != model_version:
+                    continue  # predicted by another transformer version
+                key = normalize_query(entry["query"])
+                if entry["confidence"] >= settings.CASCADE_TRAFFIC_MIN_CONFIDENCE and key not in seen:
+                    seen.add(key)
+                    texts.append(entry["query"])
+                    labels.append(entry["query_type"])
+    return texts, labels, labelled
+
+
+def train_student(folds: int = 5, seed: int = 42, teacher_version: str | None = None) -> dict:
+    """Fit the student, calibrate its threshold on out-of-fold predictions, and save it"""
+    teacher_version = teacher_version or settings.CLASSIFIER_MODEL_VERSION or "default"
+    texts, labels, labelled = load_training_data(model_version=teacher_version)
+    label_set = sorted(set(labels))
+    rng = np.random.default_rng(seed)
+    fold_ids = rng.integers(0, folds, len(texts))
+
+    confidences = np.zeros(len(texts))
+    correct = np.zeros(len(texts), dtype=bool)
+    for fold in range(folds):
+        train = np.flatnonzero(fold_ids != fold)
+        test = np.flatnonzero(fold_ids == fold)
+        model = HashedLinearClassifier(label_set).fit([texts[i] for i in train], [labels[i] for i in train])
+        for i in test:
+            prediction = model.predict(texts[i])
+            confidences[i] = prediction["confidence"]
+            correct[i] = prediction["query_type"] == labels[i]
+
+    threshold = calibrate_threshold(confidences, correct, settings.CASCADE_TARGET_PRECISION)
+    accepted = confidences >= threshold
+
+    model = HashedLinearClassifier(label_set, threshold=threshold).fit(texts, labels)
+    model.meta = {
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "teacher_version": teacher_version,
+        "samples": len(texts),
+        "labelled": labelled,
+        "from_traffic": len(texts) - labelled,
+        "heldout_accuracy": round(float(correct.mean()), 4),
+        "heldout_coverage": round(float(accepted.mean()), 4),
+        "heldout_precision": round(float(correct[accepted].mean()), 4) if accepted.any() else None,
+    }
+    model.save(settings.CASCADE_MODEL_PATH)
+    return {"path": settings.CASCADE_MODEL_PATH, "threshold": round(threshold, 4), **model.meta}
+
+
+# ===== Traffic log =====
+def traffic_log_files(path: str) -> list:
+    """The rotated-out log (oldest) and the live one, whichever exist"""
+    return [p for p in (path + ".1", path) if os.path.exists(p)]
+
+
+class TrafficLog:
+    """
+    Buffered JSONL log of confident transformer predictions, used as
+    distillation data. Only predictions at or above min_confidence are kept;
+    past max_bytes the file is rotated to "<path>.1" (one old file is kept).
+    Without store_queries, entries hold a hash of the query instead of its text.
+    `record` is called on the event loop, so full buffers are appended (and
+    the file rotated) on a worker thread.
+    """
+
+    def __init__(self, path: str, min_confidence: float = 0.8, max_bytes: int = 5_000_000,
+                 store_queries: bool = True, flush_every: int = 20):
+        self.path = path
+        self.min_confidence = min_confidence
+        self.max_bytes = max_bytes
+        self.store_queries = store_queries
+        self.flush_every = flush_every
+        self.buffer = []
+        self.skipped = 0
+        self.rotations = 0
+        self.write_tasks = set()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()   # one append / rotation at a time
+
+    def record(self, query: str, prediction: dict, model_version: str | None = None):
+        if not self.path:
+            return
+        if prediction["confidence"] < self.min_confidence:
+            self.skipped += 1
+            return
+        entry = {"query_type": prediction["query_type"], "confidence": prediction["confidence"]}
+        if model_version:
+            entry["model_version"] = model_version
+        if self.store_queries:
+            entry["query"] = query
+        else:
+            entry["query_hash"] = hashlib.blake2b(normalize_query(query).encode("utf-8"), digest_size=8).hexdigest()
+        line = json.dumps(entry)
+        with self._lock:
+            self.buffer.append(line)
+            if len(self.buffer) < self.flush_every:
+                return
+            lines, self.buffer = self.buffer, []
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(lines)  # no event loop (training scripts)
+            return
+        task = loop.create_task(asyncio.to_thread(self._write, lines))
+        self.write_tasks.add(task)
+        task.add_done_callback(self.write_tasks.discard)
+
+    def flush(self):
+        with self._lock:
+            lines, self.buffer = self.buffer, []
+        if lines:
+            self._write(lines)
+
+    async def aclose(self):
+        """Wait for background writes, then write what is still buffered (server shutdown)"""
+        if self.write_tasks:
+            await asyncio.gather(*self.write_tasks, return_exceptions=True)
+        await asyncio.to_thread(self.flush)
+
+    def _write(self, lines: list):
+        with self._write_lock:
+            self._append(lines)
+
+    def _append(self, lines: list):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                os.replace(self.path, self.path + ".1")
+                self.rotations += 1
+            with open(self.path, "a") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            logger.warning(f"Could not write classifier traffic log: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path or None,
+            "bytes": sum(os.path.getsize(p) for p in traffic_log_files(self.path)) if self.path else 0,
+            "stores_queries": self.store_queries,
+            "skipped_low_confidence": self.skipped,
+            "rotations": self.rotations,
+        }
+
+
+# ===== Stage metrics =====
+STAGES = ("rules", "cache", "student", "model")
+
+class CascadeStats:
+    """Which stage resolved each query, and end-to-end classify latency percentiles"""
+
+    def __init__(self, window: int = 2000):
+        self.resolved = Counter()
+        self.latencies = {stage: deque(maxlen=window) for stage in STAGES}
+        self.overall = deque(maxlen=window)
+        self.student_version_skips = 0
+        self._lock = threading.Lock()
+
+    def skipped_student(self):
+        with self._lock:
+            self.student_version_skips += 1
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self.resolved[stage] += 1
+            self.latencies[stage].append(seconds)
+            self.overall.append(seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = sum(self.resolved.values())
+            student = get_student()
+            return {
+                "enabled": settings.CLASSIFIER_CASCADE,
+                "student_loaded": student is not None,
+                "student_threshold": student.threshold if student else None,
+                "student_meta": student.meta if student else None,
+                "student_skipped_version_mismatch": self.student_version_skips,
+                "queries": total,
+                "resolved_fraction": {
+                    stage: round(self.resolved[stage] / total, 4) if total else 0.0 for stage in STAGES
+                },
+                "latency": latency_summary(self.overall),
+                "latency_by_stage": {stage: latency_summary(self.latencies[stage]) for stage in STAGES},
+                "traffic_log": get_traffic_log().stats(),
+            }
+
+
+# ============================================
+# GLOBAL INSTANCE (Initialize once)
+# ============================================
+
+student = None
+_student_checked = False
+cascade_stats = CascadeStats()
+traffic_log = TrafficLog(
+    settings.CASCADE_TRAFFIC_LOG,
+    min_confidence=settings.CASCADE_TRAFFIC_MIN_CONFIDENCE,
+    max_bytes=settings.CASCADE_TRAFFIC_MAX_BYTES,
+    store_queries=settings.CASCADE_TRAFFIC_STORE_QUERIES,
+)
+
+def get_student(model_version: str | None = None):
+    """
+    Load the student model once; None when it has not been trained yet, or
+    when `model_version` is given and the student was distilled from another one.
+    """
+    global student, _student_checked
+    if not _student_checked:
+        _student_checked = True
+        if os.path.exists(settings.CASCADE_MODEL_PATH):
+            student = HashedLinearClassifier.load(settings.CASCADE_MODEL_PATH)
+            logger.info(f"Cascade student loaded (threshold {student.threshold:.3f}, {len(student.labels)} labels)")
+        else:
+            logger.info(f"No cascade student at '{settings.CASCADE_MODEL_PATH}', every query goes to the model")
+    if student is not None and model_version and student.teacher_version != model_version:
+        cascade_stats.skipped_student()
+        return None
+    return student
+
+def get_cascade_stats() -> CascadeStats:
+    return cascade_stats
+
+def get_traffic_log() -> TrafficLog:
+    return traffic_log
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "train"
+    if command == "train":
+        print(json.dumps(train_student(teacher_version=sys.argv[2] if len(sys.argv) > 2 else None), indent=2))
+    else:
+        print("usage: python -m app.classify.cascade [train [version]]")
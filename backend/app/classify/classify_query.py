@@ -1,45 +1,57 @@
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import json
-from functools import lru_cache
 from typing import Dict, Optional
 import time
 import os 
 
+from app.config import settings
+from app.utilities.cache import TTLCache
+from app.classify.bucketing import EncodingCache, PaddingStats, length_buckets, pad_encodings
+from app.classify.executor import configure_torch_threads
+
+# Normalized query text -> structured prediction; cleared whenever a model is loaded
+classification_cache = TTLCache(
+    maxsize=settings.CLASSIFICATION_CACHE_SIZE,
+    ttl=settings.CLASSIFICATION_CACHE_TTL
+)
+
+def get_classification_cache() -> TTLCache:
+    """Shared cache of classifier predictions"""
+    return classification_cache
+
 class QueryClassifier:
     """
-    Singleton pattern classifier that loads model once and keeps it in memory.
-    Perfect for FastAPI chatbot that handles multiple concurrent requests.
+    Classifier that loads one model version and keeps it in memory.
+    get_classifier() holds the active instance for the whole process; a new
+    version is loaded into a second instance and swapped in (see model_manager.py).
     """
-    _instance = None
-    _initialized = False
     
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(QueryClassifier, cls).__new__(cls)
-        return cls._instance
-    
-    def __init__(self):
-        """Initialize only once"""
-        if not QueryClassifier._initialized:
-            self.model = None
-            self.tokenizer = None
-            self.id2label = None
-            self.device = None
-            self.load_model()
-            QueryClassifier._initialized = True
+    def __init__(self, model_path: str | None = None):
+        self.model = None
+        self.tokenizer = None
+        self.id2label = None
+        self.device = None
+        self.encodings = None
+        self.padding = PaddingStats()
+        self.version = None
+        self.load_model(model_path)
     
     def load_model(self, model_path: str | None = None):
         """Load model, tokenizer, and configurations"""
+        # torch / transformers are imported here, not at module import (ONNX mode never needs them)
+        import torch
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
         try:
             start_time = time.time()
+            configure_torch_threads()
 
             model_dir = model_path or os.getenv("MODEL_DIR")
             if not model_dir:
                 raise RuntimeError("MODEL_DIR not set")
 
-            # Load tokenizer
+            # Load tokenizer (+ per-string cache of its unpadded output)
             self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+            self.encodings = EncodingCache(self.tokenizer, max_length=128, maxsize=settings.TOKENIZER_CACHE_SIZE)
 
             # Load model
             self.model = AutoModelForSequenceClassification.from_pretrained(model_dir)
@@ -68,11 +80,6 @@ class QueryClassifier:
             print(f"❌ Error loading model: {e}")
             raise
     
-    @lru_cache(maxsize=1000)  # Cache recent predictions
-    def predict_cached(self, text: str) -> str:
-        """Cached prediction for identical queries (faster for repeated questions)"""
-        return str(self.predict(text))
-    
     def predict(self, text: str, return_all_probs: bool = False) -> Dict:
         """
         Predict query classification
@@ -86,21 +93,16 @@ class QueryClassifier:
         """
         if self.model is None:
             return {"error": "Model not loaded"}
+        import torch
         
         try:
             start_time = time.time()
             
-            # Tokenize
-            inputs = self.tokenizer(
-                text,
-                return_tensors="pt",
-                padding=True,
-                truncation=True,
-                max_length=128  # Reduced from 512 for faster inference
-            )
+            # Tokenize (cached per string, max_length=128 for faster inference)
+            inputs = pad_encodings(self.encodings.encode([text]), self.tokenizer.pad_token_id)
             
             # Move to device
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            inputs = {k: torch.from_numpy(v).to(self.device) for k, v in inputs.items()}
             
             # Predict
             with torch.no_grad():
@@ -135,33 +137,37 @@ class QueryClassifier:
             }
     
     def predict_batch(self, texts: list) -> list:
-        """Predict multiple queries at once (more efficient)"""
+        """
+        Predict multiple queries at once (more efficient).
+        Inputs are sorted by token length into buckets, each padded only to
+        its own longest item; results come back in the original order.
+        """
         if self.model is None:
             return [{"error": "Model not loaded"}] * len(texts)
+        if not texts:
+            return []
+        import torch
         
         try:
-            # Tokenize all texts at once
-            inputs = self.tokenizer(
-                texts,
-                return_tensors="pt",
-                padding=True,
-                truncation=True,
-                max_length=128
-            )
+            encodings = self.encodings.encode(texts)
+            buckets = length_buckets(encodings, settings.CLASSIFIER_BUCKET_SIZE)
+            self.padding.record(encodings, buckets)
             
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-            
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
-                label_ids = torch.argmax(probs, dim=-1)
-            
-            results = []
-            for i, label_id in enumerate(label_ids):
-                results.append({
-                    "query_type": self.id2label.get(label_id.item(), "unknown"),
-                    "confidence": round(probs[i][label_id].item(), 4)
-                })
+            results = [None] * len(texts)
+            for bucket in buckets:
+                inputs = pad_encodings([encodings[i] for i in bucket], self.tokenizer.pad_token_id, self.tokenizer.padding_side)
+                inputs = {k: torch.from_numpy(v).to(self.device) for k, v in inputs.items()}
+                
+                with torch.no_grad():
+                    outputs = self.model(**inputs)
+                    probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
+                    label_ids = torch.argmax(probs, dim=-1)
+                
+                for row, (i, label_id) in enumerate(zip(bucket, label_ids)):
+                    results[i] = {
+                        "query_type": self.id2label.get(label_id.item(), "unknown"),
+                        "confidence": round(probs[row][label_id].item(), 4)
+                    }
             
             return results
             
@@ -175,9 +181,41 @@ class QueryClassifier:
 
 classifier = None
 
+def resolve_model_dir(version: str | None = None) -> tuple:
+    """(version, directory) for a version under MODEL_REGISTRY_DIR, or the boot default"""
+    version = version or settings.CLASSIFIER_MODEL_VERSION
+    if version:
+        return version, os.path.join(settings.MODEL_REGISTRY_DIR, version)
+    if settings.CLASSIFIER_BACKEND == "onnx":
+        return "default", settings.ONNX_MODEL_DIR
+    return "default", os.getenv("MODEL_DIR")
+
+def load_classifier(version: str | None = None):
+    """In-process classifier for CLASSIFIER_BACKEND (PyTorch, or quantized ONNX Runtime)"""
+    version, model_dir = resolve_model_dir(version)
+    if settings.CLASSIFIER_BACKEND == "onnx":
+        from app.classify.onnx_backend import OnnxQueryClassifier
+        clf = OnnxQueryClassifier(model_dir)
+    else:
+        clf = QueryClassifier(model_dir)
+    clf.version = version
+    return clf
+
+def swap_classifier(new_classifier):
+    """Atomically make `new_classifier` the active one; returns the one it replaced"""
+    global classifier
+    previous, classifier = classifier, new_classifier
+    # Cached predictions came from the previous model
+    classification_cache.clear()
+    return previous
+
 def get_classifier() -> QueryClassifier:
-    """Get or create classifier instance"""
+    """Get or create classifier instance (in-process, or a client of the shared sidecar)"""
     global classifier
     if classifier is None:
-        classifier = QueryClassifier()
+        if settings.CLASSIFIER_SIDECAR_SOCKET:
+            from app.classify.sidecar import SidecarClassifier
+            classifier = SidecarClassifier()
+        else:
+            classifier = load_classifier()
     return classifier
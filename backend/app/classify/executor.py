@@ -0,0 +1,135 @@
+"""
+Dedicated thread pool for model inference (classifier and embeddings).
+Keeps CPU-bound forward passes off the event loop and away from
+FastAPI's default threadpool used by the sync routers.
+
+Submissions are bounded: at most INFERENCE_MAX_PENDING calls may be queued
+or running, further callers wait their turn. Time spent waiting for a
+worker and time spent running are recorded separately.
+"""
+import asyncio
+import time
+import threading
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from app.config import settings
+from app.utilities.latency import latency_summary
+from app.logger.logger import logger
+
+inference_executor = ThreadPoolExecutor(
+    max_workers=settings.INFERENCE_WORKERS,
+    thread_name_prefix="inference"
+)
+
+# ===== CPU threading =====
+_torch_configured = False
+
+def configure_torch_threads():
+    """Apply TORCH_INTRA_OP_THREADS / TORCH_INTER_OP_THREADS once, before the first torch model loads"""
+    global _torch_configured
+    if _torch_configured:
+        return
+    _torch_configured = True
+    import torch
+
+    if settings.TORCH_INTRA_OP_THREADS > 0:
+        torch.set_num_threads(settings.TORCH_INTRA_OP_THREADS)
+    if settings.TORCH_INTER_OP_THREADS > 0:
+        try:
+            torch.set_num_interop_threads(settings.TORCH_INTER_OP_THREADS)
+        except RuntimeError as e:
+            # Only allowed once, before any inter-op parallel work has started
+            logger.warning(f"Could not set torch inter-op threads: {e}")
+    logger.info(
+        f"Inference: {settings.INFERENCE_WORKERS} workers x {torch.get_num_threads()} intra-op threads, "
+        f"{torch.get_num_interop_threads()} inter-op threads"
+    )
+
+# ===== Metrics =====
+class InferenceStats:
+    """Queue-wait vs run time of calls on the inference executor"""
+
+    def __init__(self, window: int = 2000):
+        self.queue_wait = deque(maxlen=window)
+        self.run_time = deque(maxlen=window)
+        self.completed = 0
+        self.failed = 0
+        self.pending = 0
+        self.max_pending = 0
+        self._lock = threading.Lock()
+
+    def submitted(self):
+        with self._lock:
+            self.pending += 1
+            self.max_pending = max(self.max_pending, self.pending)
+
+    def released(self):
+        with self._lock:
+            self.pending -= 1
+
+    def finished(self, queue_wait: float, run_time: float, ok: bool):
+        with self._lock:
+            self.queue_wait.append(queue_wait)
+            self.run_time.append(run_time)
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": settings.INFERENCE_WORKERS,
+                "max_pending": settings.INFERENCE_MAX_PENDING,
+                "pending": self.pending,
+                "peak_pending": self.max_pending,
+                "completed": self.completed,
+                "failed": self.failed,
+                "queue_wait": latency_summary(self.queue_wait, mean=True),
+                "run_time": latency_summary(self.run_time, mean=True),
+            }
+
+
+inference_stats = InferenceStats()
+# asyncio.Semaphore binds to the loop it is first awaited on, so each event
+# loop (the server's, a test's, the warmup script's) gets its own
+_slots = weakref.WeakKeyDictionary()
+
+def _loop_slots(loop) -> asyncio.Semaphore:
+    slots = _slots.get(loop)
+    if slots is None:
+        slots = _slots[loop] = asyncio.Semaphore(settings.INFERENCE_MAX_PENDING)
+    return slots
+
+def _timed(func, submitted_at: float):
+    started = time.perf_counter()
+    ok = False
+    try:
+        result = func()
+        ok = True
+        return result
+    finally:
+        inference_stats.finished(started - submitted_at, time.perf_counter() - started, ok)
+
+async def run_inference(func, *args, **kwargs):
+    """Run a blocking model call on the inference executor and await the result"""
+    loop = asyncio.get_running_loop()
+    submitted_at = time.perf_counter()
+    inference_stats.submitted()
+    try:
+        async with _loop_slots(loop):
+            return await loop.run_in_executor(
+                inference_executor, partial(_timed, partial(func, *args, **kwargs), submitted_at)
+            )
+    finally:
+        inference_stats.released()
+
+def get_inference_stats() -> dict:
+    return inference_stats.stats()
+
+def shutdown_inference_executor():
+    """Stop accepting work and drop queued calls (server shutdown)"""
+    inference_executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,157 @@
+"""
+Hot swapping of versioned classifier models.
+
+Each version lives in its own directory under MODEL_REGISTRY_DIR
+(data/models/<version>/, same layout as MODEL_DIR, or the ONNX export when
+CLASSIFIER_BACKEND=onnx). Activating a version loads it into a second
+classifier instance in the background, warms it on labelled queries, then
+swaps it in with one assignment; requests in flight finish on the model
+they started with. The replaced model is kept in memory for an instant
+rollback.
+
+In sidecar mode the worker forwards these operations to the sidecar,
+which owns the model.
+"""
+import os
+import csv
+import time
+import asyncio
+from datetime import datetime
+
+from app.config import settings
+from app.classify import classify_query
+from app.logger.logger import logger
+
+WARMUP_QUERIES = 32
+FALLBACK_WARMUP_QUERIES = ["What is my attendance?", "Show my marks", "Does the college have a library?"]
+
+def _warmup_texts() -> list:
+    try:
+        with open(settings.QUERY_DATASET_PATH, newline="") as f:
+            return [row["Queries"] for _, row in zip(range(WARMUP_QUERIES), csv.DictReader(f))]
+    except FileNotFoundError:
+        return FALLBACK_WARMUP_QUERIES
+
+def warm_classifier(clf) -> float:
+    """Single and batched forward passes so kernels and the tokenizer are initialized; returns ms"""
+    start_time = time.time()
+    texts = _warmup_texts()
+    clf.predict(texts[0])
+    results = clf.predict_batch(texts)
+    errors = [r["error"] for r in results if "error" in r]
+    if errors:
+        raise RuntimeError(f"Warmup predictions failed: {errors[0]}")
+    return round((time.time() - start_time) * 1000, 2)
+
+
+class ModelManager:
+    """Background load, warm, atomic swap and rollback of classifier versions"""
+
+    def __init__(self):
+        self.previous = None
+        self.task = None
+        self.state = "idle"       # idle | loading | failed
+        self.target = None
+        self.last_error = None
+        self.history = []
+
+    def list_versions(self) -> list:
+        """Version directories available under MODEL_REGISTRY_DIR"""
+        if not os.path.isdir(settings.MODEL_REGISTRY_DIR):
+            return []
+        return sorted(
+            name for name in os.listdir(settings.MODEL_REGISTRY_DIR)
+            if os.path.isfile(os.path.join(settings.MODEL_REGISTRY_DIR, name, "config.json"))
+        )
+
+    def _record(self, action: str, version: str, **details):
+        self.history.append({"action": action, "version": version, "at": datetime.now().isoformat(), **details})
+        self.history = self.history[-20:]
+
+    # ===== Activate =====
+    async def start_activation(self, version: str) -> dict:
+        """Begin loading `version` in the background; returns the manager status"""
+        if version not in self.list_versions():
+            raise ValueError(f"Unknown model version '{version}'")
+        if self.task is not None and not self.task.done():
+            raise RuntimeError(f"Version '{self.target}' is still loading")
+        self.state, self.target, self.last_error = "loading", version, None
+        self.task = asyncio.create_task(self._activate(version))
+        return await self.status()
+
+    async def _activate(self, version: str):
+        try:
+            start_time = time.time()
+            # Loading and warming run off the event loop and off the inference executor
+            clf = await asyncio.to_thread(classify_query.load_classifier, version)
+            warmup_ms = await asyncio.to_thread(warm_classifier, clf)
+            replaced = classify_query.swap_classifier(clf)
+            self.previous = replaced
+            self.state, self.target = "idle", None
+            load_ms = round((time.time() - start_time) * 1000, 2)
+            self._record("activate", version, load_ms=load_ms, warmup_ms=warmup_ms,
+                         replaced=getattr(replaced, "version", None))
+            logger.info(f"Classifier version '{version}' active (loaded + warmed in {load_ms}ms)")
+        except Exception as e:
+            self.state, self.last_error = "failed", str(e)
+            self._record("failed", version, error=str(e))
+            logger.error(f"Could not activate classifier version '{version}': {e}")
+
+    # ===== Rollback =====
+    async def rollback(self) -> dict:
+        """Swap the previously active model back in"""
+        if self.previous is None:
+            raise RuntimeError("No previous model version to roll back to")
+        restored = self.previous
+        self.previous = classify_query.swap_classifier(restored)
+        self._record("rollback", restored.version, replaced=getattr(self.previous, "version", None))
+        logger.info(f"Classifier rolled back to version '{restored.version}'")
+        return await self.status()
+
+    async def status(self) -> dict:
+        active = classify_query.classifier
+        return {
+            "active_version": getattr(active, "version", None),
+            "previous_version": getattr(self.previous, "version", None),
+            "available_versions": self.list_versions(),
+            "state": self.state,
+            "loading_version": self.target,
+            "last_error": self.last_error,
+            "history": self.history,
+        }
+
+
+class SidecarModelManager:
+    """Same operations, forwarded to the classifier sidecar that owns the model"""
+
+    async def _call(self, request: dict) -> dict:
+        response = await asyncio.to_thread(classify_query.get_classifier().call, request)
+        if "error" in response:
+            # Same exception types as ModelManager: ValueError = unknown version, RuntimeError = conflict
+            if response.get("error_type") == "ValueError":
+                raise ValueError(response["error"])
+            raise RuntimeError(response["error"])
+        return response
+
+    async def start_activation(self, version: str) -> dict:
+        return await self._call({"op": "activate", "version": version})
+
+    async def rollback(self) -> dict:
+        return await self._call({"op": "rollback"})
+
+    async def status(self) -> dict:
+        return await self._call({"op": "models"})
+
+
+# ============================================
+# GLOBAL INSTANCE (Initialize once)
+# ============================================
+
+model_manager = None
+
+def get_model_manager():
+    """Local manager, or a forwarder when the model lives in the sidecar"""
+    global model_manager
+    if model_manager is None:
+        model_manager = SidecarModelManager() if settings.CLASSIFIER_SIDECAR_SOCKET else ModelManager()
+    return model_manager
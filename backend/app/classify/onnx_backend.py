@@ -0,0 +1,232 @@
+"""
+Quantized ONNX Runtime backend for the query classifier.
+
+Production runs on CPU only, where the PyTorch model stays in full precision.
+This module exports the fine-tuned model from MODEL_DIR to ONNX, applies
+dynamic int8 quantization, and serves it through ONNX Runtime behind the
+same `predict` / `predict_batch` interface as QueryClassifier.
+
+Usage (from backend/):
+    python -m app.classify.onnx_backend export   # MODEL_DIR -> ONNX_MODEL_DIR
+    python -m app.classify.onnx_backend parity   # compare against data/college_queries.csv
+"""
+import os
+import sys
+import csv
+import json
+import time
+import shutil
+import inspect
+from typing import Dict
+
+import numpy as np
+import onnxruntime as ort
+from transformers import AutoTokenizer
+
+from app.config import settings
+from app.classify.bucketing import EncodingCache, PaddingStats, length_buckets, pad_encodings
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+
+# ===== Export =====
+def export_onnx(model_dir: str | None = None, output_dir: str | None = None, quantize: bool = True) -> str:
+    """Export the fine-tuned classifier to ONNX (+ dynamic int8), returns the model path"""
+    import torch
+    from transformers import AutoModelForSequenceClassification
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    model_dir = model_dir or os.getenv("MODEL_DIR")
+    output_dir = output_dir or settings.ONNX_MODEL_DIR
+    if not model_dir:
+        raise RuntimeError("MODEL_DIR not set")
+    os.makedirs(output_dir, exist_ok=True)
+
+    start_time = time.time()
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+
+    sample = tokenizer(["sample query"], return_tensors="pt")
+    # Graph inputs follow the forward() signature order, not the tokenizer's
+    input_names = [name for name in inspect.signature(model.forward).parameters if name in sample]
+    fp32_path = os.path.join(output_dir, FP32_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (),
+            fp32_path,
+            kwargs={name: sample[name] for name in input_names},
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes={
+                **{name: {0: "batch", 1: "sequence"} for name in input_names},
+                "logits": {0: "batch"},
+            },
+            opset_version=17,
+            dynamo=False,  # TorchScript exporter: dynamic axes + quantize_dynamic friendly
+        )
+
+    # Tokenizer and config (id2label) travel with the ONNX model
+    tokenizer.save_pretrained(output_dir)
+    shutil.copy(os.path.join(model_dir, "config.json"), os.path.join(output_dir, "config.json"))
+
+    model_path = fp32_path
+    if quantize:
+        model_path = os.path.join(output_dir, INT8_FILE)
+        quantize_dynamic(fp32_path, model_path, weight_type=QuantType.QInt8)
+
+    print(f"✅ ONNX model exported to {model_path} in {time.time() - start_time:.2f}s")
+    return model_path
+
+
+# ===== Inference =====
+class OnnxQueryClassifier:
+    """ONNX Runtime classifier with the same interface as QueryClassifier"""
+
+    def __init__(self, model_dir: str | None = None):
+        self.model = None
+        self.tokenizer = None
+        self.id2label = None
+        self.device = "cpu (onnxruntime)"
+        self.encodings = None
+        self.padding = PaddingStats()
+        self.version = None
+        self.load_model(model_dir)
+
+    def load_model(self, model_path: str | None = None):
+        """Load the ONNX session, tokenizer, and label mapping"""
+        try:
+            start_time = time.time()
+            model_dir = model_path or settings.ONNX_MODEL_DIR
+
+            onnx_file = os.path.join(model_dir, INT8_FILE)
+            if not os.path.exists(onnx_file):
+                onnx_file = os.path.join(model_dir, FP32_FILE)
+
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = settings.ONNX_INTRA_OP_THREADS
+            options.inter_op_num_threads = 1
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self.model = ort.InferenceSession(onnx_file, options, providers=["CPUExecutionProvider"])
+            self.input_names = {i.name for i in self.model.get_inputs()}
+
+            self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+            self.encodings = EncodingCache(self.tokenizer, max_length=128, maxsize=settings.TOKENIZER_CACHE_SIZE)
+            with open(os.path.join(model_dir, "config.json"), "r") as f:
+                config = json.load(f)
+                self.id2label = {
+                    int(k): v for k, v in config.get("id2label", {}).items()
+                }
+
+            load_time = time.time() - start_time
+            print(f"✅ ONNX model loaded in {load_time:.2f}s ({os.path.basename(onnx_file)})")
+            print(f"✅ Labels: {list(self.id2label.values())}")
+
+        except Exception as e:
+            print(f"❌ Error loading ONNX model: {e}")
+            raise
+
+    def _forward(self, encodings: list) -> np.ndarray:
+        inputs = pad_encodings(encodings, self.tokenizer.pad_token_id, self.tokenizer.padding_side)
+        feed = {k: v for k, v in inputs.items() if k in self.input_names}
+        logits = self.model.run(["logits"], feed)[0]
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+    def predict(self, text: str, return_all_probs: bool = False) -> Dict:
+        """Predict query classification (same result shape as QueryClassifier.predict)"""
+        if self.model is None:
+            return {"error": "Model not loaded"}
+
+        try:
+            start_time = time.time()
+            probs = self._forward(self.encodings.encode([text]))[0]
+            label_id = int(np.argmax(probs))
+
+            result = {
+                "query_type": self.id2label.get(label_id, f"unknown_{label_id}"),
+                "confidence": round(float(probs[label_id]), 4),
+                "inference_time_ms": round((time.time() - start_time) * 1000, 2)
+            }
+            if return_all_probs:
+                result["all_probabilities"] = {
+                    self.id2label.get(i, f"Label_{i}"): round(float(p), 4)
+                    for i, p in enumerate(probs)
+                }
+            return result
+
+        except Exception as e:
+            return {
+                "error": str(e),
+                "query_type": "unknown"
+            }
+
+    def predict_batch(self, texts: list) -> list:
+        """Predict multiple queries at once (length-bucketed, original order kept)"""
+        if self.model is None:
+            return [{"error": "Model not loaded"}] * len(texts)
+        if not texts:
+            return []
+
+        try:
+            encodings = self.encodings.encode(texts)
+            buckets = length_buckets(encodings, settings.CLASSIFIER_BUCKET_SIZE)
+            self.padding.record(encodings, buckets)
+
+            results = [None] * len(texts)
+            for bucket in buckets:
+                probs = self._forward([encodings[i] for i in bucket])
+                for row, i in enumerate(bucket):
+                    label_id = int(np.argmax(probs[row]))
+                    results[i] = {
+                        "query_type": self.id2label.get(label_id, "unknown"),
+                        "confidence": round(float(probs[row][label_id]), 4)
+                    }
+            return results
+
+        except Exception as e:
+            return [{"error": str(e), "query_type": "unknown"}] * len(texts)
+
+
+# ===== Accuracy parity =====
+def _label_key(label: str) -> str:
+    return label.lower().replace(" ", "_").strip()
+
+def parity_check(reference, candidate, csv_path: str | None = None) -> dict:
+    """
+    Compare two classifiers on the labelled query set: accuracy of each,
+    prediction agreement, and mean batch latency.
+    """
+    csv_path = csv_path or settings.QUERY_DATASET_PATH
+    with open(csv_path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    texts = [row["Queries"] for row in rows]
+    labels = [_label_key(row["labels"]) for row in rows]
+
+    report = {"samples": len(rows)}
+    predictions = {}
+    for name, clf in (("reference", reference), ("candidate", candidate)):
+        start_time = time.time()
+        results = []
+        for i in range(0, len(texts), 32):
+            results.extend(clf.predict_batch(texts[i:i + 32]))
+        elapsed = time.time() - start_time
+        predictions[name] = [_label_key(r.get("query_type", "unknown")) for r in results]
+        report[f"{name}_accuracy"] = round(np.mean([p == l for p, l in zip(predictions[name], labels)]), 4)
+        report[f"{name}_ms_per_query"] = round(elapsed / len(texts) * 1000, 3)
+
+    report["agreement"] = round(np.mean([a == b for a, b in zip(predictions["reference"], predictions["candidate"])]), 4)
+    return report
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "export"
+    if command == "export":
+        export_onnx()
+    elif command == "parity":
+        from app.classify.classify_query import QueryClassifier
+        print(json.dumps(parity_check(QueryClassifier(), OnnxQueryClassifier()), indent=2))
+    else:
+        print("usage: python -m app.classify.onnx_backend [export|parity]")
@@ -0,0 +1,363 @@
+"""
+Rule-based fast path ahead of the transformer classifier.
+
+Short messages such as "my attendance", "fee status" or "notices" are
+routed by a phrase lookup instead of a forward pass. Phrases come from a
+hand-written lexicon plus n-grams mined from data/college_queries.csv that
+only ever occur under one label. A query matches only when every content
+word is covered (longest phrase first) by phrases of a single label, so
+anything with extra intent ("what is the attendance policy") still goes to
+the model.
+
+Mined phrases are at least two words long (a single common word such as
+"pay" or "college" says little about intent) and are mined on a training
+split; phrases whose precision on the held-out split is below
+CLASSIFIER_RULES_MIN_PRECISION are dropped. The lexicon is held to the
+same bar on the labelled queries (none of which it was written from):
+entries below the threshold are dropped, and a single word with fewer
+than MIN_SUPPORT labelled occurrences is demoted to matching only a
+message that is exactly that word ("hi", "results"). At startup the rules
+are cross-validated the same way, and phrase matching is switched off
+(exact labelled queries only) if held-out precision falls below the
+threshold.
+
+Usage (from backend/):
+    python -m app.classify.rules   # held-out coverage / precision on data/college_queries.csv
+"""
+import csv
+import json
+import time
+import random
+import asyncio
+from collections import Counter, defaultdict
+from typing import Optional
+
+from app.config import settings
+from app.utilities.cache import normalize_query
+from app.utilities.stopwords import STOPWORDS
+from app.logger.logger import logger
+
+MAX_NGRAM = 3
+MIN_MINED_TOKENS = 2
+MIN_SUPPORT = 3
+EVAL_FOLDS = 5
+
+# Label names match the classifier's id2label
+LEXICON = {
+    "Attendance": [
+        "attendance", "my attendance", "attendance record", "attendance records",
+        "attendance status", "attendance percentage", "am i present", "absent", "present",
+    ],
+    "Fees": [
+        "fee", "fees", "my fees", "fee status", "fees status", "fee due", "fees due",
+        "due fees", "pending fees", "dues", "my dues", "fee payment", "payment status",
+    ],
+    "Marks": [
+        "marks", "my marks", "mark", "grades", "my grades", "my result", "my results",
+        "results", "gpa", "cgpa", "exam marks", "internal marks",
+    ],
+    "Notices": [
+        "notice", "notices", "latest notice", "latest notices", "announcements",
+        "notice board", "new notices",
+    ],
+    "Assignment": [
+        "assignment", "assignments", "my assignments", "pending assignments",
+        "homework", "assignment deadline", "assignment deadlines",
+    ],
+    "Course": [
+        "my courses", "my course", "my subjects", "enrolled courses", "course list",
+    ],
+    "User Info": [
+        "my profile", "my details", "my info", "my information", "profile",
+        "who am i", "my account",
+    ],
+    "General": [
+        "hi", "hello", "hey", "thanks", "thank you", "bye", "good morning",
+        "good evening", "ok", "okay",
+    ],
+}
+
+# Filler words that may appear around a phrase without changing the intent
+FILLER = {
+    "a", "an", "the", "my", "me", "i", "show", "check", "get", "give", "see",
+    "view", "list", "tell", "about", "what", "whats", "is", "are", "please",
+    "pls", "of", "for", "all", "current", "latest", "any", "do", "have",
+}
+# Function words (STOPWORDS, a superset of FILLER) are never mined as phrases on their own
+
+
+def _ngrams(tokens: list, max_n: int = MAX_NGRAM, min_n: int = 1):
+    for n in range(min_n, max_n + 1):
+        for i in range(len(tokens) - n + 1):
+            yield " ".join(tokens[i:i + n])
+
+def load_labelled(csv_path: str) -> list:
+    """(normalized query, label) rows of the labelled set"""
+    with open(csv_path, newline="") as f:
+        return [(normalize_query(row["Queries"]), row["labels"].strip()) for row in csv.DictReader(f)]
+
+def split_folds(rows: list, folds: int = EVAL_FOLDS, seed: int = 42) -> list:
+    """Shuffle rows deterministically into `folds` disjoint parts (repeated queries stay in one part)"""
+    shuffled = list(dict(rows).items())
+    random.Random(seed).shuffle(shuffled)
+    return [shuffled[i::folds] for i in range(folds)]
+
+
+class RuleMatcher:
+    """Compiled phrase -> label table with single-label, full-coverage matching"""
+
+    def __init__(self, max_tokens: int = 6):
+        self.max_tokens = max_tokens
+        self.phrases = {}     # normalized phrase -> label
+        self.exact = {}       # normalized labelled query -> label
+        self.exact_words = {} # single lexicon words without enough evidence -> label (whole message only)
+        self.dropped_lexicon = []  # lexicon phrases that failed the precision check
+        self.phrase_rules = True   # off when held-out validation fails
+        self.validation = None
+        self.shadow_tasks = set()
+
+        # Stats
+        self.lookups = 0
+        self.hits = 0
+        self.hits_by_label = Counter()
+        self.total_match_time = 0.0
+        self.shadow_checks = 0
+        self.shadow_agreements = 0
+        self.disagreements = Counter()
+
+    # ===== Build =====
+    def add_lexicon(self, lexicon: dict, rows: list = (), min_support: int = MIN_SUPPORT, min_precision: Optional[float] = None):
+        """
+        Add hand-written phrases that hold up on the labelled `rows`: drop any
+        whose precision there is below min_precision, and keep single words
+        seen fewer than min_support times for whole-message matches only
+        """
+        min_precision = settings.CLASSIFIER_RULES_MIN_PRECISION if min_precision is None else min_precision
+        counts = self._label_counts(rows, min_n=1)
+        for label, phrases in lexicon.items():
+            for phrase in phrases:
+                key = normalize_query(phrase)
+                if not key or key in FILLER:
+                    continue
+                seen = counts.get(key)
+                if seen and seen[label] / sum(seen.values()) < min_precision:
+                    self.dropped_lexicon.append(key)
+                elif " " not in key and (not seen or seen[label] < min_support):
+                    self.exact_words[key] = label
+                else:
+                    self.phrases[key] = label
+
+    def add_exact(self, rows: list):
+        """Labelled queries, answered by exact lookup"""
+        for text, label in rows:
+            self.exact[text] = label
+
+    @staticmethod
+    def _label_counts(rows: list, min_n: int = MIN_MINED_TOKENS) -> dict:
+        counts = defaultdict(Counter)
+        for text, label in rows:
+            for gram in set(_ngrams(text.split(), MAX_NGRAM, min_n)):
+                counts[gram][label] += 1
+        return counts
+
+    def mine(self, rows: list, holdout: list = (), min_support: int = MIN_SUPPORT, min_precision: Optional[float] = None):
+        """
+        Add multi-word n-grams seen under only one label in `rows`; with a
+        `holdout` set, drop those whose precision there is below min_precision
+        """
+        min_precision = settings.CLASSIFIER_RULES_MIN_PRECISION if min_precision is None else min_precision
+        held_out = self._label_counts(holdout)
+        mined = 0
+        for gram, counts in self._label_counts(rows).items():
+            if len(counts) != 1 or gram in self.phrases:
+                continue
+            if any(token in STOPWORDS for token in gram.split()):
+                continue
+            (label, support), = counts.items()
+            if support < min_support:
+                continue
+            seen = held_out.get(gram)
+            if seen and seen[label] / sum(seen.values()) < min_precision:
+                continue
+            self.phrases[gram] = label
+            mined += 1
+        return mined
+
+    # ===== Match =====
+    def _match(self, key: str) -> Optional[str]:
+        label = self.exact.get(key)
+        if label or not self.phrase_rules:
+            return label
+        label = self.exact_words.get(key)
+        if label:
+            return label
+
+        tokens = key.split()
+        if not tokens or len(tokens) > self.max_tokens:
+            return None
+
+        # Greedy longest-phrase cover; any content word left unexplained -> no match
+        labels = set()
+        i = 0
+        while i < len(tokens):
+            for n in range(min(MAX_NGRAM, len(tokens) - i), 0, -1):
+                label = self.phrases.get(" ".join(tokens[i:i + n]))
+                if label:
+                    labels.add(label)
+                    i += n
+                    break
+            else:
+                if tokens[i] not in FILLER:
+                    return None
+                i += 1
+
+        return labels.pop() if len(labels) == 1 else None
+
+    def match(self, text: str) -> Optional[dict]:
+        """Return a prediction dict (same shape as the classifier's) or None"""
+        start_time = time.perf_counter()
+        label = self._match(normalize_query(text))
+        elapsed = time.perf_counter() - start_time
+
+        self.lookups += 1
+        self.total_match_time += elapsed
+        if label is None:
+            return None
+        self.hits += 1
+        self.hits_by_label[label] += 1
+        return {
+            "query_type": label,
+            "confidence": 1.0,
+            "inference_time_ms": round(elapsed * 1000, 4),
+            "source": "rules",
+        }
+
+    # ===== Agreement with the model =====
+    def maybe_shadow(self, text: str, label: str):
+        """Re-check a sample of rule hits against the model in the background"""
+        if random.random() >= settings.CLASSIFIER_RULES_SHADOW_RATE:
+            return
+        task = asyncio.create_task(self._shadow_check(text, label))
+        self.shadow_tasks.add(task)
+        task.add_done_callback(self.shadow_tasks.discard)
+
+    async def _shadow_check(self, text: str, label: str):
+        from app.classify.executor import run_inference
+        from app.classify.classify_query import get_classifier
+        try:
+            prediction = await run_inference(get_classifier().predict, text)
+        except Exception as e:
+            logger.warning(f"Rule shadow check failed: {e}")
+            return
+        if "error" in prediction:
+            return
+        self.shadow_checks += 1
+        if prediction["query_type"] == label:
+            self.shadow_agreements += 1
+        else:
+            self.disagreements[f"{label} -> {prediction['query_type']}"] += 1
+            logger.info(f"Rule/model disagreement: '{text[:50]}' rules={label} model={prediction['query_type']}")
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.CLASSIFIER_RULES,
+            "phrase_rules": self.phrase_rules,
+            "phrases": len(self.phrases),
+            "exact_words": len(self.exact_words),
+            "dropped_lexicon": self.dropped_lexicon,
+            "exact_queries": len(self.exact),
+            "validation": self.validation,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+            "hits_by_label": dict(self.hits_by_label),
+            "avg_match_us": round(self.total_match_time / self.lookups * 1e6, 2) if self.lookups else 0.0,
+            "shadow_checks": self.shadow_checks,
+            "model_agreement": round(self.shadow_agreements / self.shadow_checks, 4) if self.shadow_checks else None,
+            "disagreements": dict(self.disagreements.most_common(10)),
+        }
+
+
+def _phrase_matcher(train: list) -> RuleMatcher:
+    """Lexicon checked on `train`, plus phrases mined from it (last fold held out for the precision filter)"""
+    matcher = RuleMatcher(max_tokens=settings.CLASSIFIER_RULES_MAX_TOKENS)
+    matcher.add_lexicon(LEXICON, train)
+    if train:
+        *mine_folds, holdout = split_folds(train)
+        matcher.mine([row for fold in mine_folds for row in fold], holdout)
+    return matcher
+
+
+def evaluate_rows(rows: list, folds: int = EVAL_FOLDS) -> dict:
+    """Cross-validated coverage and precision of the phrase rules: each fold is matched by rules built without it"""
+    hits = correct = 0
+    errors = []
+    parts = split_folds(rows, folds)
+    for i, held_out in enumerate(parts):
+        matcher = _phrase_matcher([row for j, part in enumerate(parts) if j != i for row in part])
+        for text, label in held_out:
+            predicted = matcher._match(text)
+            if predicted is None:
+                continue
+            hits += 1
+            if predicted == label:
+                correct += 1
+            else:
+                errors.append({"query": text, "rules": predicted, "label": label})
+    return {
+        "samples": len(rows),
+        "folds": folds,
+        "hits": hits,
+        "coverage": round(hits / len(rows), 4) if rows else 0.0,
+        "precision": round(correct / hits, 4) if hits else None,
+        "errors": errors,
+    }
+
+
+def build_rule_matcher(csv_path: str | None = None, use_dataset: bool = True) -> RuleMatcher:
+    """Lexicon phrases, plus exact queries and validated mined n-grams from the labelled set"""
+    if not use_dataset:
+        return _phrase_matcher([])
+    csv_path = csv_path or settings.QUERY_DATASET_PATH
+    try:
+        rows = load_labelled(csv_path)
+    except FileNotFoundError:
+        logger.warning(f"Rule matcher: dataset '{csv_path}' not found, using lexicon only")
+        return _phrase_matcher([])
+
+    matcher = _phrase_matcher(rows)
+    matcher.add_exact(rows)
+    report = evaluate_rows(rows)
+    matcher.validation = {key: value for key, value in report.items() if key != "errors"}
+    precision = report["precision"]
+    if precision is not None and precision < settings.CLASSIFIER_RULES_MIN_PRECISION:
+        matcher.phrase_rules = False
+        logger.warning(
+            f"Rule matcher: held-out precision {precision} < {settings.CLASSIFIER_RULES_MIN_PRECISION}, "
+            f"phrase rules disabled (exact labelled queries only)"
+        )
+    logger.info(f"Rule matcher: {len(matcher.phrases)} phrases, {len(matcher.exact)} exact queries, validation {matcher.validation}")
+    return matcher
+
+
+def evaluate(csv_path: str | None = None) -> dict:
+    """Held-out coverage and precision of the phrase rules (exact lookups excluded) on the labelled set"""
+    return evaluate_rows(load_labelled(csv_path or settings.QUERY_DATASET_PATH))
+
+
+# ============================================
+# GLOBAL INSTANCE (Initialize once)
+# ============================================
+
+rule_matcher = None
+
+def get_rule_matcher() -> RuleMatcher:
+    """Get or build the rule matcher"""
+    global rule_matcher
+    if rule_matcher is None:
+        rule_matcher = build_rule_matcher()
+    return rule_matcher
+
+
+if __name__ == "__main__":
+    print(json.dumps(evaluate(), indent=2))
@@ -0,0 +1,252 @@
+"""
+Classifier sidecar: one process holds the model, uvicorn workers call it
+over a Unix domain socket.
+
+uvicorn starts `--workers` by spawning fresh interpreters, so a model
+loaded before the fork is not shared; each worker would otherwise hold its
+own copy of the transformer. With CLASSIFIER_SIDECAR_SOCKET set, workers
+get a SidecarClassifier (same predict / predict_batch interface) and never
+import torch for classification. Requests from all workers are
+micro-batched together inside the sidecar.
+
+Wire format: 4-byte big-endian length + UTF-8 JSON, one request/response
+pair at a time per connection.
+
+Usage (from backend/):
+    python -m app.classify.sidecar                          # serve CLASSIFIER_SIDECAR_SOCKET
+    CLASSIFIER_SIDECAR_SOCKET=/tmp/classifier.sock uvicorn app.main:app --workers 4
+"""
+import os
+import json
+import time
+import socket
+import struct
+import asyncio
+import threading
+
+import psutil
+
+from app.config import settings
+from app.logger.logger import logger
+
+_HEADER = struct.Struct(">I")
+
+# ===== Framing =====
+def _encode(message: dict) -> bytes:
+    payload = json.dumps(message).encode()
+    return _HEADER.pack(len(payload)) + payload
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Classifier sidecar closed the connection")
+        data.extend(chunk)
+    return bytes(data)
+
+async def _read_frame(reader: asyncio.StreamReader) -> dict:
+    (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    return json.loads(await reader.readexactly(size))
+
+
+# ===== Client (in each uvicorn worker) =====
+class SidecarClassifier:
+    """Remote classifier with the same interface as QueryClassifier"""
+
+    def __init__(self, socket_path: str | None = None):
+        self.socket_path = socket_path or settings.CLASSIFIER_SIDECAR_SOCKET
+        self.model = None          # set to the socket address once the sidecar answers
+        self.tokenizer = None
+        self.id2label = None
+        self.encodings = None
+        self.padding = None
+        self.device = f"sidecar (unix:{self.socket_path})"
+        self.version = None
+        self._local = threading.local()
+        self.load_model()
+
+    def load_model(self, model_path: str | None = None):
+        """Wait for the sidecar and fetch its label mapping"""
+        from app.classify.classify_query import get_classification_cache
+
+        deadline = time.time() + settings.CLASSIFIER_SIDECAR_CONNECT_TIMEOUT
+        while True:
+            try:
+                info = self.call({"op": "info"})
+                break
+            except OSError as e:
+                if time.time() > deadline:
+                    print(f"❌ Classifier sidecar not reachable at {self.socket_path}: {e}")
+                    raise
+                time.sleep(0.5)
+
+        self.id2label = {int(k): v for k, v in info["labels"].items()}
+        self.model = f"unix:{self.socket_path}"
+        self.version = info["version"]
+        # Predictions may come from a different model than before
+        get_classification_cache().clear()
+        print(f"✅ Connected to classifier sidecar (pid {info['pid']}, {info['device']}, version {self.version})")
+        print(f"✅ Labels: {list(self.id2label.values())}")
+
+    def _connection(self) -> socket.socket:
+        # One connection per thread: requests on a connection are strictly sequential
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(settings.CLASSIFIER_SIDECAR_TIMEOUT)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _reset(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+        self._local.sock = None
+
+    def call(self, request: dict) -> dict:
+        """One request/response round trip to the sidecar"""
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                sock.sendall(_encode(request))
+                (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+                return json.loads(_recv_exact(sock, size))
+            except (OSError, ConnectionError):
+                self._reset()
+                # Retry once on a fresh connection (sidecar restarted)
+                if attempt:
+                    raise
+
+    def _track_version(self, response: dict):
+        # The sidecar swapped models (possibly at another worker's request)
+        version = response.get("model_version")
+        if version != self.version:
+            from app.classify.classify_query import get_classification_cache
+            get_classification_cache().clear()
+            logger.info(f"Classifier sidecar now serves version '{version}' (was '{self.version}')")
+            self.version = version
+
+    def predict(self, text: str, return_all_probs: bool = False) -> dict:
+        try:
+            response = self.call({"op": "predict", "text": text, "return_all_probs": return_all_probs})
+            if "result" not in response:
+                return response
+            self._track_version(response)
+            return response["result"]
+        except Exception as e:
+            return {"error": f"Classifier sidecar: {e}", "query_type": "unknown"}
+
+    def predict_batch(self, texts: list) -> list:
+        try:
+            response = self.call({"op": "predict_batch", "texts": texts})
+            self._track_version(response)
+            return response["results"]
+        except Exception as e:
+            return [{"error": f"Classifier sidecar: {e}", "query_type": "unknown"}] * len(texts)
+
+    def remote_stats(self) -> dict:
+        """Model process memory, request counts and batching stats"""
+        try:
+            return self.call({"op": "stats"})
+        except Exception as e:
+            return {"error": str(e)}
+
+
+# ===== Server (the sidecar process) =====
+def error_response(error: Exception) -> dict:
+    """Failed request; `error_type` lets workers re-raise ValueError (unknown input) as such"""
+    return {"error": str(error), "error_type": type(error).__name__, "query_type": "unknown"}
+
+
+class SidecarServer:
+    """Serves the in-process classifier to local workers"""
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self.requests = 0
+        self.connections = 0
+        self.started_at = time.time()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    request = await _read_frame(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                self.requests += 1
+                try:
+                    response = await self.dispatch(request)
+                except Exception as e:
+                    logger.error(f"Sidecar request failed: {e}")
+                    response = error_response(e)
+                writer.write(_encode(response))
+                await writer.drain()
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def dispatch(self, request: dict) -> dict:
+        from app.classify.classify_query import get_classifier
+        from app.classify.executor import run_inference, get_inference_stats
+        from app.classify.batcher import get_classify_batcher
+        from app.classify.model_manager import get_model_manager
+
+        clf = get_classifier()
+        op = request.get("op")
+        if op == "predict":
+            # Single predictions from every worker are batched together here
+            if settings.CLASSIFIER_BATCHING and not request.get("return_all_probs"):
+                result = await get_classify_batcher().submit(request["text"])
+            else:
+                result = await run_inference(clf.predict, request["text"], request.get("return_all_probs", False))
+            return {"result": result, "model_version": clf.version}
+        if op == "predict_batch":
+            results = await run_inference(clf.predict_batch, request["texts"])
+            return {"results": results, "model_version": clf.version}
+        if op == "info":
+            return {"labels": clf.id2label, "device": str(clf.device), "pid": os.getpid(), "version": clf.version}
+        if op == "activate":
+            return await get_model_manager().start_activation(request["version"])
+        if op == "rollback":
+            return await get_model_manager().rollback()
+        if op == "models":
+            return await get_model_manager().status()
+        if op == "stats":
+            return {
+                "pid": os.getpid(),
+                "model_version": clf.version,
+                "rss_mb": round(psutil.Process().memory_info().rss / 1024 ** 2, 1),
+                "uptime_s": round(time.time() - self.started_at),
+                "requests": self.requests,
+                "connections": self.connections,
+                "padding": clf.padding.stats(),
+                "batching": get_classify_batcher().stats(),
+                "inference_executor": get_inference_stats(),
+            }
+        raise ValueError(f"Unknown sidecar op: {op}")
+
+    async def serve(self):
+        from app.classify import classify_query, model_manager
+
+        # The sidecar itself always runs (and hot-swaps) the model in-process
+        classify_query.classifier = classify_query.load_classifier()
+        model_manager.model_manager = model_manager.ModelManager()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self.handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        logger.info(f"Classifier sidecar listening on {self.socket_path} (pid {os.getpid()})")
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    path = settings.CLASSIFIER_SIDECAR_SOCKET or "/tmp/college_classifier.sock"
+    try:
+        asyncio.run(SidecarServer(path).serve())
+    except KeyboardInterrupt:
+        pass
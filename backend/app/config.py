@@ -12,6 +12,121 @@ class Settings(BaseSettings):
     google_api_key: str | None = None 
     pinecone_api_key: str | None = None 
 
+    # Async driver URL for the chat path; derived from DATABASE_URL when unset
+    ASYNC_DATABASE_URL: str | None = None
+    # Threads reserved for classifier / embedding inference
+    INFERENCE_WORKERS: int = 2
+    INFERENCE_MAX_PENDING: int = 64 # queued + running calls before callers wait
+    TORCH_INTRA_OP_THREADS: int = 2 # per forward pass; 0 keeps the PyTorch default
+    TORCH_INTER_OP_THREADS: int = 1
+    # Load LLM clients / embeddings / search tooling after the server is up
+    BACKGROUND_WARMUP: bool = True
+
+    # Query classifier: "torch" or "onnx" (int8 ONNX Runtime, see app/classify/onnx_backend.py)
+    CLASSIFIER_BACKEND: str = "torch"
+    ONNX_MODEL_DIR: str = "data/trained_model_onnx"
+    ONNX_INTRA_OP_THREADS: int = 2
+    QUERY_DATASET_PATH: str = "data/college_queries.csv"
+    # Versioned model directories (MODEL_REGISTRY_DIR/<version>/); unset version = MODEL_DIR
+    MODEL_REGISTRY_DIR: str = "data/models"
+    CLASSIFIER_MODEL_VERSION: str | None = None
+    # Unix socket of a shared classifier process (python -m app.classify.sidecar); unset = load in-process
+    CLASSIFIER_SIDECAR_SOCKET: str | None = None
+    CLASSIFIER_SIDECAR_TIMEOUT: float = 5 # seconds per request
+    CLASSIFIER_SIDECAR_CONNECT_TIMEOUT: float = 60 # seconds to wait for the sidecar at startup
+    CLASSIFICATION_CACHE_SIZE: int = 2048
+    CLASSIFICATION_CACHE_TTL: int = 3600 # seconds
+    CLASSIFIER_RULES: bool = True
+    CLASSIFIER_RULES_MAX_TOKENS: int = 6
+    CLASSIFIER_RULES_SHADOW_RATE: float = 0.05 # fraction of rule hits re-checked by the model
+    CLASSIFIER_RULES_MIN_PRECISION: float = 0.95 # held-out precision needed to use (and keep mined) phrase rules
+    CLASSIFIER_CASCADE: bool = True
+    CASCADE_MODEL_PATH: str = "data/cascade_student.npz"
+    CASCADE_TARGET_PRECISION: float = 0.97 # held-out precision the student threshold is calibrated to
+    CASCADE_TRAFFIC_LOG: str = "data/classifier_traffic.jsonl" # "" = no traffic log
+    CASCADE_TRAFFIC_MIN_CONFIDENCE: float = 0.8 # model predictions below this are not logged
+    CASCADE_TRAFFIC_MAX_BYTES: int = 5_000_000 # then rotated to <log>.1
+    CASCADE_TRAFFIC_STORE_QUERIES: bool = True # False = log a hash instead of the query text (no distillation)
+
+    # Classifier micro-batching
+    CLASSIFIER_BATCHING: bool = True
+    CLASSIFIER_MAX_BATCH_SIZE: int = 16
+    CLASSIFIER_MAX_WAIT_MS: float = 5
+    CLASSIFIER_MAX_QUEUE: int = 256
+    CLASSIFIER_BUCKET_SIZE: int = 8 # predict_batch rows per length bucket
+    TOKENIZER_CACHE_SIZE: int = 4096
+
+    # Shared LLM client pools (Groq's httpx pool; Gemini's SDK uses one gRPC channel per client)
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    LLM_KEEPALIVE_EXPIRY: float = 60.0 # seconds
+    LLM_TIMEOUT: float = 30.0 # seconds
+
+    # Hedged / failover LLM calls (app/chat/llm_router.py)
+    LLM_FAILOVER: bool = True # retry a failed call on the alternate provider
+    LLM_HEDGING: bool = True # race the alternate once the primary passes its latency percentile
+    LLM_HEDGE_PERCENTILE: float = 95.0
+    LLM_HEDGE_MIN_SAMPLES: int = 20 # below this, hedge after LLM_HEDGE_DEFAULT_DELAY
+    LLM_HEDGE_DEFAULT_DELAY: float = 4.0 # seconds
+    LLM_HEDGE_MIN_DELAY: float = 0.5 # seconds
+    LLM_HEDGE_MAX_DELAY: float = 10.0 # seconds
+    LLM_EWMA_ALPHA: float = 0.2
+    LLM_STREAM_IDLE_TIMEOUT: float = 15.0 # seconds between streamed tokens before the answer is cut off
+
+    # Deadlines, retries and circuit breakers per external dependency (app/utilities/resilience.py)
+    RESILIENCE_TIMEOUT_PERCENTILE: float = 99.0
+    RESILIENCE_TIMEOUT_MULTIPLIER: float = 2.0 # deadline = multiplier x observed percentile latency
+    RESILIENCE_MIN_SAMPLES: int = 20 # below this, the dependency's max timeout is the deadline
+    RESILIENCE_RETRY_BASE_DELAY: float = 0.2 # seconds, full-jitter backoff base
+    RESILIENCE_BREAKER_FAILURES: int = 5 # consecutive failures that open a breaker
+    RESILIENCE_BREAKER_RESET: float = 30.0 # seconds open before a half-open probe
+
+    # Semantic answer cache (COLLEGE_INFO)
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92 # cosine similarity
+    SEMANTIC_CACHE_MAXSIZE: int = 512
+    SEMANTIC_CACHE_TTL: int = 86400 # seconds
+
+    # Template (LLM-free) answers for simple structured queries
+    TEMPLATE_ANSWERS: bool = True
+    TEMPLATE_ANSWER_BUDGET_MS: float = 50.0 # records load + render, per template
+
+    # GENERAL query web search (app/chat/search.py)
+    SEARCH_TIMEOUT: float = 3.0 # seconds, hard deadline per search
+    SEARCH_MAX_RESULTS: int = 5
+    SEARCH_CACHE_SIZE: int = 1024
+    SEARCH_CACHE_TTL: int = 1800 # seconds
+    SEARCH_LOCAL_BACKEND: str = "" # "lexical" = race the BM25 index at SEARCH_LOCAL_INDEX_PATH
+    SEARCH_LOCAL_INDEX_PATH: str = "data/college_index/bm25.json"
+    SEARCH_LOCAL_MIN_SCORE: float = 8.0 # BM25 score at which a local hit beats the web
+    SEARCH_LOCAL_FALLBACK_SCORE: float = 2.0 # minimum BM25 score to use a local hit when the web fails
+
+    # Compact, token-budgeted structured context in LLM prompts (budgets in app/chat/context_builder.py)
+    COMPACT_PROMPT_CONTEXT: bool = True
+
+    # Per-user formatted DB context for structured QueryTypes, invalidated by crud writes
+    # (across workers through the CacheVersion table)
+    CONTEXT_CACHE_ENABLED: bool = True
+    CONTEXT_CACHE_MAXSIZE: int = 4096
+    CONTEXT_CACHE_TTL: int = 600 # seconds
+
+    # Identical in-flight chat work (same type, normalized query and context) runs once (app/utilities/singleflight.py)
+    CHAT_COALESCING: bool = True
+
+    # College-info vector backend: "pinecone" or "local" (memory-mapped NumPy index)
+    VECTOR_BACKEND: str = "pinecone"
+    LOCAL_INDEX_DIR: str = "data/college_index"
+    LOCAL_INDEX_SEARCH: str = "exact" # "exact" or "ivf"
+    LOCAL_INDEX_NPROBE: int = 4
+
+    # Retrieval: dense top-k, or hybrid BM25 + dense fused by reciprocal rank
+    RETRIEVAL_K: int = 5
+    HYBRID_RETRIEVAL: bool = True
+    HYBRID_K: int = 3 # chunks sent to the LLM after fusion
+    HYBRID_CANDIDATES: int = 10 # per retriever, before fusion
+    RRF_K: int = 60
+    LEXICAL_INDEX_PATH: str = "data/college_index/bm25.json"
+
     model_config = {
         "extra": "allow",
         "env_file": ".env"
@@ -2,6 +2,8 @@
 from typing import Annotated
 from fastapi import Depends
 from sqlmodel import create_engine, SQLModel, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
 from app.config import settings
 
 sqlite_url = settings.DATABASE_URL 
@@ -9,6 +11,17 @@ sqlite_url = settings.DATABASE_URL
 # ==== create engine =====
 engine = create_engine(sqlite_url)
 
+# ==== create async engine (chat path) =====
+def get_async_database_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver"""
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+async_engine = create_async_engine(get_async_database_url(sqlite_url))
+
 # ===== connect to sqlmodel instances ======
 def create_all_db_tables():
     SQLModel.metadata.create_all(engine)
@@ -18,6 +31,11 @@ def get_session():
     with Session(engine) as session:
         yield session
 
+# ====== Create Async Session ======
+async def get_async_session():
+    async with AsyncSession(async_engine) as session:
+        yield session
+
 # ====== Create a Session Dependencies =======
 SessionDep = Annotated[Session, Depends(get_session)]
-
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_session)]
@@ -1,27 +1,74 @@
+import time
+_import_started = time.perf_counter()
+
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI 
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.logger.logger import logger
-from app.db.database import create_all_db_tables
+from app.db.database import create_all_db_tables, async_engine
 from app.routers import (
-    users, auth, attendance, fees, marks, courses, assignments, notices, chat
+    users, auth, attendance, fees, marks, courses, assignments, notices, chat, models
 )
-from app.classify.classify_query import get_classifier
+from app.classify.classify_query import get_classifier, get_classification_cache
+from app.classify.rules import get_rule_matcher
+from app.classify.cascade import get_student, get_cascade_stats, get_traffic_log
+from app.classify.executor import shutdown_inference_executor, get_inference_stats
+from app.classify.batcher import get_classify_batcher
+from app.chat.llm_registry import get_llm_registry
+from app.chat.llm_router import get_llm_router
+from app.chat.vectorstore import get_college_vectorstore
+from app.chat.semantic_cache import get_semantic_cache
+from app.utilities.context_cache import get_context_cache
+from app.chat.templates import get_template_stats
+from app.chat.context_builder import get_prompt_context_stats
+from app.chat.search import get_web_search
+from app.utilities.resilience import get_resilience_stats
+from app.utilities.singleflight import get_single_flight
+from app.config import settings
+from app.warmup import run_warmup, readiness, startup_profile
 
-ml_models = {}
+startup_profile["app_import_ms"] = round((time.perf_counter() - _import_started) * 1000, 2)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    lifespan_started = time.perf_counter()
     create_all_db_tables()
     logger.info("Created and intialize the database")
     # Load the ML model
-    ml_models["query_classify"] = get_classifier()
+    start_time = time.perf_counter()
+    # get_classifier() owns the active model (it can be swapped at runtime, see /api/v1/models)
+    get_classifier()
+    startup_profile["classifier_load_ms"] = round((time.perf_counter() - start_time) * 1000, 2)
     logger.info("Loading the model when server starts")
+    # Compile the rule-based fast path (lexicon + labelled queries)
+    if settings.CLASSIFIER_RULES:
+        get_rule_matcher()
+    # Cascade stage one (hashed n-gram student), if one has been trained
+    if settings.CLASSIFIER_CASCADE:
+        get_student()
+    # Warm every stage (classifier, fast paths, LLM clients + connections, embeddings /
+    # vector store, web search client); /health/ready turns true when it is done
+    warmup_task = None
+    if settings.BACKGROUND_WARMUP:
+        warmup_task = asyncio.create_task(run_warmup())
+    else:
+        await run_warmup()
+    startup_profile["lifespan_ms"] = round((time.perf_counter() - lifespan_started) * 1000, 2)
+    logger.info(f"Startup profile: {startup_profile}")
     yield
     # Clean up the ML models and release the resources
-    ml_models.clear()
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
     logger.info("Deleting Ml model when server shutdown")
+    await get_classify_batcher().stop()
+    await get_traffic_log().aclose()
+    shutdown_inference_executor()
+    await get_llm_registry().aclose()
+    await get_web_search().aclose()
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -53,6 +100,20 @@ app.add_middleware(
 def root():
     return {"message": "College Management System API", "status": "running"}
 
+@app.get("/health/live")
+def liveness():
+    """The process is up and serving requests"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def readiness_check():
+    """200 only after the startup warmup has finished; 503 while warming or if it failed"""
+    body = {
+        "status": "ready" if readiness["ready"] else ("warming" if readiness["warming"] else "not_ready"),
+        "steps": readiness["steps"],
+    }
+    return JSONResponse(body, status_code=200 if readiness["ready"] else 503)
+
 @app.get("/health")
 def health_check():
     """Check if model is loaded and ready"""
@@ -61,8 +122,10 @@ def health_check():
         return {"status": "unhealthy", "reason": "Model not loaded"}
     return {
         "status": "healthy",
+        "model_version": clf.version,
         "device": str(clf.device),
-        "labels": list(clf.id2label.values())
+        "labels": list(clf.id2label.values()),
+        "vectorstore": get_college_vectorstore().health()
     }
 
 @app.get("/stats")
@@ -70,9 +133,26 @@ async def get_stats():
     """Get model statistics"""
     clf = get_classifier()
     return {
-        "cache_info": clf.predict_cached.cache_info()._asdict(),
+        "classification_cache": get_classification_cache().stats(),
+        "classifier_rules": get_rule_matcher().stats(),
+        "classifier_cascade": get_cascade_stats().stats(),
         "device": str(clf.device),
-        "num_labels": len(clf.id2label)
+        "num_labels": len(clf.id2label),
+        "classifier_padding": clf.padding.stats() if clf.padding else None,
+        "tokenizer_cache": clf.encodings.stats() if clf.encodings else None,
+        "llm_pools": get_llm_registry().pool_stats(),
+        "llm_routing": get_llm_router().stats(),
+        "resilience": get_resilience_stats(),
+        "semantic_cache": get_semantic_cache().stats(),
+        "context_cache": get_context_cache().stats(),
+        "coalescing": get_single_flight().stats.stats(),
+        "template_answers": get_template_stats().stats(),
+        "prompt_context": get_prompt_context_stats().stats(),
+        "web_search": get_web_search().get_stats(),
+        "classifier_batching": get_classify_batcher().stats(),
+        "inference_executor": get_inference_stats(),
+        "startup": startup_profile,
+        "classifier_sidecar": await asyncio.to_thread(clf.remote_stats) if settings.CLASSIFIER_SIDECAR_SOCKET else None
     }
 
 # Include all routers
@@ -85,6 +165,7 @@ app.include_router(courses.router)
 app.include_router(assignments.router)
 app.include_router(notices.router)
 app.include_router(chat.router)
+app.include_router(models.router)
 
 if __name__ == "__main__":
     import uvicorn
@@ -154,3 +154,8 @@ class Marks(SQLModel, table=True):
         self.status = "Pass" if self.total_marks >= 24 else "Fail"
 
 
+# ====== Cache Version Model ======
+class CacheVersion(SQLModel, table=True):
+    """Write counter per cached chat context scope, so every worker can tell its cached context is outdated"""
+    scope: str = Field(primary_key=True)
+    version: int = Field(default=0)
@@ -11,6 +11,7 @@ from . import courses
 from . import assignments
 from . import notices
 from . import chat
+from . import models
 
 __all__ = [
     "users", 
@@ -21,5 +22,6 @@ __all__ = [
     "courses", 
     "assignments",
     "notices",
-    "chat"
+    "chat",
+    "models"
 ]
\ No newline at end of file
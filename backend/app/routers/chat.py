@@ -1,32 +1,13 @@
-import logging
-from fastapi import APIRouter, HTTPException, Depends
+import json
+from fastapi import APIRouter, HTTPException, Depends, WebSocket, WebSocketDisconnect, Query
+from fastapi.responses import StreamingResponse
 
-from app.models.schemas import ChatQuery, ChatResponse, QueryType
+from app.models.schemas import ChatQuery, ChatResponse
 from app.models.models import User
-from app.utilities.crud import (
-    get_attendance_by_user_id,
-    get_marks_by_user_id,
-    get_fees_by_user_id,
-    get_courses_for_student,
-    get_recent_assignment_per_course,
-    get_user_by_user_id,
-    get_recent_notices,
-)
-from app.chat.chatbot import (
-    classify_query,
-    format_attendance_data,
-    format_fees_data,
-    format_marks_data,
-    get_conversational_response,
-    get_college_info_response,
-    get_general_search_response,
-    format_course_data,
-    format_assignment_data,
-    format_user_data,
-    format_notice_data,
-)
-from app.auth.OAuth import role_required
-from app.db.database import SessionDep
+from app.chat.chatbot import classify_query
+from app.chat.pipeline import generate_response, stream_events
+from app.auth.OAuth import role_required, get_current_user
+from app.db.database import AsyncSessionDep, SessionDep
 from app.logger.logger import logger
 
 router = APIRouter(
@@ -34,11 +15,13 @@ router = APIRouter(
     tags=["chatbot"]
 )
 
+CHAT_ROLES = ["student", "teacher", "admin"]
+
 @router.post("/", response_model=ChatResponse)
 async def chat(
     message: ChatQuery,
-    session: SessionDep,
-    user: User = Depends(role_required(["student", "teacher", "admin"])),
+    session: AsyncSessionDep,
+    user: User = Depends(role_required(CHAT_ROLES)),
 ):
     """Main chat handler - process user query"""
 
@@ -51,59 +34,11 @@ async def chat(
 
     logger.info(f"Chat query received from user_id={user_id}: {query}")
 
-    query_type = classify_query(query)
+    query_type = await classify_query(query)
     logger.info(f"Query classified as: {query_type}")
 
     try:
-        if query_type == QueryType.ATTENDANCE:
-            attendance_records = get_attendance_by_user_id(session, user_id)
-            formatted_data = format_attendance_data(attendance_records)
-            response = get_conversational_response(formatted_data, query)
-            logger.info(f"Response created using attendance records of user {user.username} by chatbot")
-
-        elif query_type == QueryType.MARKS:
-            marks_records = get_marks_by_user_id(session, user_id)
-            formatted_data = format_marks_data(marks_records)
-            response = get_conversational_response(formatted_data, query)
-            logger.info(f"Response created using marks records of user {user.username} by chatbot")
-
-        elif query_type == QueryType.FEES:
-            fees_records = get_fees_by_user_id(session, user_id)
-            formatted_data = format_fees_data(fees_records)
-            response = get_conversational_response(formatted_data, query)
-            logger.info(f"Response created using fees records of user {user.username} by chatbot")
-
-        elif query_type == QueryType.COLLEGE_INFO:
-            response = get_college_info_response(query)["answer"]
-            logger.info(f"Fetched result from pinecone and given to LLM")
-
-        elif query_type == QueryType.COURSE:
-            user_course_records = get_courses_for_student(session, user_id)
-            formatted_data = format_course_data(user_course_records)
-            response = get_conversational_response(formatted_data, query)
-            logger.info(f"Response created using course records of user {user.username} by chatbot")
-
-        elif query_type == QueryType.ASSIGNMENT:
-            assignment_records = get_recent_assignment_per_course(session)
-            formatted_data = format_assignment_data(assignment_records)
-            response = get_conversational_response(formatted_data, query)
-            logger.info(f"Response created by fetching records of user {user.username} by chatbot")
-
-        elif query_type == QueryType.USER_INFO:
-            user_records = get_user_by_user_id(session, user_id)
-            formatted_data = format_user_data(user_records)
-            response = get_conversational_response(formatted_data, query)
-            logger.info(f"Response created by fetching user record of user {user.username} by chatbot")
-
-        elif query_type == QueryType.NOTICES:
-            notice_records = get_recent_notices(session)
-            formatted_data = format_notice_data(notice_records)
-            response = get_conversational_response(formatted_data, query)
-            logger.info(f"Response created by using notice records of user {user.username} by chatbot")
-
-        else:  # GENERAL
-            response = get_general_search_response(query)
-            logger.info("General query response created")
+        response = await generate_response(session, user, query_type, query)
 
     except Exception as e:
         logger.error(f"Error processing query for user_id={user_id}: {e}")
@@ -114,6 +49,78 @@ async def chat(
     return ChatResponse(response=response, query_type=query_type)
 
 
+# ================= Streaming (SSE) ================= #
+def format_sse(event: str, data: dict) -> str:
+    """Encode one server-sent event frame"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@router.post("/stream")
+async def chat_stream(
+    message: ChatQuery,
+    session: AsyncSessionDep,
+    user: User = Depends(role_required(CHAT_ROLES)),
+):
+    """Stream classification, answer tokens and final metadata as server-sent events"""
+    logger.info(f"Streaming chat query received from user_id={user.id}: {message.query}")
+
+    async def event_source():
+        try:
+            async for event, data in stream_events(session, user, message.query):
+                yield format_sse(event, data)
+        except Exception as e:
+            logger.error(f"Error streaming query for user_id={user.id}: {e}")
+            yield format_sse("error", {"detail": "Internal server error"})
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ================= Streaming (WebSocket) ================= #
+@router.websocket("/ws")
+async def chat_websocket(
+    websocket: WebSocket,
+    session: AsyncSessionDep,
+    sync_session: SessionDep,
+    token: str = Query(...),
+):
+    """
+    WebSocket chat. Browsers cannot set an Authorization header on a socket,
+    so the bearer token is passed as `?token=`. Each `{"query": ...}` message
+    is answered with the same events as the SSE endpoint.
+    """
+    try:
+        user = await get_current_user(token, sync_session)
+    except HTTPException:
+        await websocket.close(code=1008, reason="Could not validate credentials")
+        return
+    if user.role not in CHAT_ROLES:
+        await websocket.close(code=1008, reason="Access denied")
+        return
+
+    await websocket.accept()
+    try:
+        while True:
+            message = await websocket.receive_json()
+            query = (message.get("query") or "").strip()
+            if not query:
+                await websocket.send_json({"event": "error", "detail": "Empty query"})
+                continue
+
+            logger.info(f"WebSocket chat query received from user_id={user.id}: {query}")
+            try:
+                async for event, data in stream_events(session, user, query):
+                    await websocket.send_json({"event": event, **data})
+            except Exception as e:
+                logger.error(f"Error streaming query for user_id={user.id}: {e}")
+                await websocket.send_json({"event": "error", "detail": "Internal server error"})
+
+    except WebSocketDisconnect:
+        logger.info(f"WebSocket chat closed for user_id={user.id}")
+
+
 @router.get("/info")
 async def chat_info():
     """Get chatbot info"""
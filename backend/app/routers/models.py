@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException, Depends
+
+from app.models.models import User
+from app.auth.OAuth import role_required
+from app.classify.model_manager import get_model_manager
+from app.logger.logger import logger
+
+router = APIRouter(
+    prefix="/api/v1/models",
+    tags=["models"]
+)
+
+@router.get("/")
+async def get_model_status(user: User = Depends(role_required(["admin"]))):
+    """Active / previous classifier version, available versions and load state"""
+    try:
+        return await get_model_manager().status()
+    except Exception as e:
+        logger.error(f"Unexpected error while reading model status: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+@router.post("/{version}/activate", status_code=202)
+async def activate_model(version: str, user: User = Depends(role_required(["admin"]))):
+    """Load, warm and swap in a model version in the background"""
+    try:
+        status = await get_model_manager().start_activation(version)
+        logger.info(f"Classifier version '{version}' activation requested by {user.username}")
+        return status
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.post("/rollback")
+async def rollback_model(user: User = Depends(role_required(["admin"]))):
+    """Swap the previously active model version back in"""
+    try:
+        status = await get_model_manager().rollback()
+        logger.info(f"Classifier rolled back to '{status['active_version']}' by {user.username}")
+        return status
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
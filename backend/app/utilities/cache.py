@@ -0,0 +1,118 @@
+# ===== Import necessary libraries =====
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+# ===== Key normalization =====
+def normalize_query(text: str) -> str:
+    """Normalize query text for cache keys: lowercase, drop punctuation, collapse whitespace"""
+    text = _PUNCTUATION.sub(" ", text.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+# ===== TTL + LRU cache =====
+class TTLCache:
+    """
+    Bounded, thread-safe LRU cache whose entries also expire after `ttl` seconds.
+    Tracks hits, misses, expirations and evictions for /stats.
+
+    `clear` bumps `generation`; a value computed before a clear can be stored
+    with the generation read beforehand, and is then dropped instead of
+    repopulating the cache with a result the clear meant to discard.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.generation = 0
+        self.stale_sets = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live value and mark it most recently used"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live value without touching LRU order or counters"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return default
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, generation: Optional[int] = None):
+        """Insert or replace a value, evicting the least recently used entry when full"""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                # Computed before the last clear
+                self.stale_sets += 1
+                return
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a key and return its value"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def items(self) -> list:
+        """Snapshot of live (key, value) pairs, dropping expired entries"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._data.items() if expires_at < now]
+            for key in expired:
+                del self._data[key]
+            self.expirations += len(expired)
+            return [(key, value) for key, (_, value) in self._data.items()]
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+            self.generation += 1
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "stale_sets": self.stale_sets,
+        }
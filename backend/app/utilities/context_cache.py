@@ -0,0 +1,122 @@
+"""
+Cache of the DB context used to answer structured chat queries: the
+records, and their prompt encoding (the formatted text, or the compact
+table from app/chat/context_builder.py). Template answers and the
+LLM-unavailable fallback read the same entries.
+
+Keys are (query_type, user_id); types whose records are shared by everyone
+(assignments, notices) use user_id None. Entries are dropped by the write
+paths in app/utilities/crud.py right after they commit, so a cached context
+is never older than the last write made through this process.
+
+Writes made by other workers are caught with a version counter in the
+database (the CacheVersion table, one row per scope: a query type plus a
+user, or a shared type). Every crud write bumps the counters of the scopes
+it touches; a read fetches its scope's counter first (a primary-key lookup)
+and an entry cached under an older version is a miss. The TTL only bounds
+memory, not staleness.
+
+A load that started before an invalidation is not stored: every
+invalidation bumps a generation counter, and `set` is skipped when the
+counter moved while the records were being fetched.
+"""
+import threading
+from typing import Optional
+
+from app.config import settings
+from app.models.schemas import QueryType
+from app.utilities.cache import TTLCache
+
+# QueryTypes whose context depends on the requesting user
+PER_USER_TYPES = (QueryType.ATTENDANCE, QueryType.MARKS, QueryType.FEES, QueryType.COURSE, QueryType.USER_INFO)
+# QueryTypes whose context is the same for every user
+SHARED_TYPES = (QueryType.ASSIGNMENT, QueryType.NOTICES)
+
+
+def version_scope(query_type: QueryType, user_id: Optional[int]) -> str:
+    """CacheVersion row guarding one cache key: "<type>:<user id>", or "<type>:*" for shared types"""
+    if query_type in PER_USER_TYPES:
+        return f"{query_type.value}:{user_id}"
+    return f"{query_type.value}:*"
+
+
+class ContextCache:
+    """Bounded (query_type, user_id) -> context, with precise invalidation"""
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 600):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.generation = 0
+        self.dropped = 0          # entries removed by invalidation
+        self.stale_fills = 0      # loads discarded because a write landed meanwhile
+        self.version_misses = 0   # entries outdated by a write in another worker
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(query_type: QueryType, user_id: Optional[int]) -> tuple:
+        return (query_type, user_id if query_type in PER_USER_TYPES else None)
+
+    def get(self, query_type: QueryType, user_id: Optional[int], version: int = 0):
+        """Cached context, or None when missing or cached under another DB version"""
+        entry = self.cache.get(self.key(query_type, user_id))
+        if entry is None:
+            return None
+        cached_version, context = entry
+        if cached_version != version:
+            # Another worker wrote since this was cached
+            with self._lock:
+                self.version_misses += 1
+            return None
+        return context
+
+    def set(self, query_type: QueryType, user_id: Optional[int], context, generation: int, version: int = 0):
+        """Store a context loaded while the cache was at `generation` and the DB scope at `version`"""
+        with self._lock:
+            if generation != self.generation:
+                self.stale_fills += 1
+                return
+            self.cache.set(self.key(query_type, user_id), (version, context))
+
+    # ===== Invalidation (called by crud writes) =====
+    def invalidate_user(self, user_id: Optional[int], *query_types: QueryType):
+        """Drop one user's entries, for the given types or all of them"""
+        if user_id is None:
+            return
+        with self._lock:
+            self.generation += 1
+            for query_type in query_types or PER_USER_TYPES:
+                if self.cache.pop((query_type, user_id)) is not None:
+                    self.dropped += 1
+
+    def invalidate_type(self, query_type: QueryType):
+        """Drop every entry of one type (shared types, or writes touching many users)"""
+        with self._lock:
+            self.generation += 1
+            for key, _ in self.cache.items():
+                if key[0] == query_type:
+                    self.cache.pop(key)
+                    self.dropped += 1
+
+    def stats(self) -> dict:
+        by_type = {}
+        for (query_type, _), _ in self.cache.items():
+            by_type[query_type.value] = by_type.get(query_type.value, 0) + 1
+        return {
+            **self.cache.stats(),
+            "entries_by_type": by_type,
+            "invalidated_entries": self.dropped,
+            "stale_fills_skipped": self.stale_fills,
+            "version_misses": self.version_misses,
+        }
+
+
+# ============================================
+# GLOBAL INSTANCE (Initialize once)
+# ============================================
+
+context_cache = ContextCache(
+    maxsize=settings.CONTEXT_CACHE_MAXSIZE,
+    ttl=settings.CONTEXT_CACHE_TTL,
+)
+
+def get_context_cache() -> ContextCache:
+    return context_cache
@@ -1,11 +1,50 @@
 # ===== Import necessary libraries =====
-from sqlmodel import Session, select, desc
+from sqlmodel import Session, select, desc, update
+from sqlalchemy.exc import IntegrityError
 from typing import Optional, List
 from datetime import datetime
 from fastapi import HTTPException 
 
-from app.models.schemas import NoticeCreate, FeesCreate, MarksCreate, CourseCreate, AssignmentCreate, AttendanceCreate, UserResponse
-from app.models.models import User, Attendance, Fees, Marks, Assignment, Course, Notice, UserCourseLink
+from app.models.schemas import NoticeCreate, FeesCreate, MarksCreate, CourseCreate, AssignmentCreate, AttendanceCreate, UserResponse, QueryType
+from app.models.models import User, Attendance, Fees, Marks, Assignment, Course, Notice, UserCourseLink, CacheVersion
+from app.utilities.context_cache import get_context_cache, version_scope, PER_USER_TYPES
+
+# ===== Chat context invalidation =====
+# Every write below drops the cached chat context it affects, after the commit,
+# and bumps the scope's CacheVersion so other workers drop theirs on next read
+def get_cache_version(session: Session, scope: str) -> int:
+    return session.exec(select(CacheVersion.version).where(CacheVersion.scope == scope)).first() or 0
+
+def bump_cache_versions(session: Session, scopes: List[str]):
+    """Increment each scope's version (creating missing rows), in one commit"""
+    for attempt in range(2):
+        for scope in scopes:
+            result = session.execute(
+                update(CacheVersion).where(CacheVersion.scope == scope).values(version=CacheVersion.version + 1)
+            )
+            if result.rowcount == 0:
+                session.add(CacheVersion(scope=scope, version=1))
+        try:
+            session.commit()
+            return
+        except IntegrityError:
+            # Another worker created the row first; increment it instead
+            session.rollback()
+            if attempt:
+                raise
+
+def _invalidate_user(session: Session, user_id: Optional[int], *query_types: QueryType):
+    if user_id is None:
+        return
+    get_context_cache().invalidate_user(user_id, *query_types)
+    bump_cache_versions(session, [version_scope(query_type, user_id) for query_type in query_types or PER_USER_TYPES])
+
+def _invalidate_type(session: Session, query_type: QueryType):
+    get_context_cache().invalidate_type(query_type)
+    bump_cache_versions(session, [version_scope(query_type, None)])
+
+def _course_student_ids(session: Session, course_id: int) -> List[int]:
+    return session.exec(select(UserCourseLink.user_id).where(UserCourseLink.course_id == course_id)).all()
 
 # ====== User Operations =======
 # ==============================
@@ -70,6 +109,7 @@ def delete_user_by_id(session: Session, user_id: int):
 
     session.delete(user)
     session.commit()
+    _invalidate_user(session, user_id)
     return True
 
 # ===== Attendance Operations =====
@@ -77,8 +117,9 @@ def delete_user_by_id(session: Session, user_id: int):
 def create_attendance(session: Session, attendance: Attendance) -> Attendance:
     """Create new attendance"""
     session.add(attendance)
-    session.commit() 
+    session.commit()
     session.refresh(attendance)
+    _invalidate_user(session, attendance.user_id, QueryType.ATTENDANCE)
     return attendance
 
 # ===== update attendance =====
@@ -87,6 +128,7 @@ def update_attendance(session: Session, attendance_id: int, data: AttendanceCrea
     attendance = session.get(Attendance, attendance_id)
     if not attendance:
         return None
+    previous_user_id = attendance.user_id
 
     for field, value in data.dict(exclude_unset=True).items():
         setattr(attendance, field, value)
@@ -95,6 +137,8 @@ def update_attendance(session: Session, attendance_id: int, data: AttendanceCrea
     session.add(attendance)
     session.commit()
     session.refresh(attendance)
+    _invalidate_user(session, previous_user_id, QueryType.ATTENDANCE)
+    _invalidate_user(session, attendance.user_id, QueryType.ATTENDANCE)
     return attendance
 
 # ===== get all attendance ======
@@ -122,6 +166,7 @@ def delete_attendance_by_id(session: Session, attendance_id: int) -> bool:
         return False
     session.delete(attendance_record)
     session.commit()
+    _invalidate_user(session, attendance_record.user_id, QueryType.ATTENDANCE)
     return True
 
 # ===== delete attendance by user_id ====
@@ -136,6 +181,7 @@ def delete_attendance_by_user_id(session: Session, user_id: int) -> int:
     for record in records:
         session.delete(record)
     session.commit()
+    _invalidate_user(session, user_id, QueryType.ATTENDANCE)
     return True
 
 # ===== Fees Operations =====
@@ -145,6 +191,7 @@ def create_fees(session: Session, fees: Fees) -> Fees:
     session.add(fees)
     session.commit()
     session.refresh(fees)
+    _invalidate_user(session, fees.user_id, QueryType.FEES)
     return fees
 
 def update_fees(session: Session, fees_id: int, data: FeesCreate) -> Optional[Fees]:
@@ -152,6 +199,7 @@ def update_fees(session: Session, fees_id: int, data: FeesCreate) -> Optional[Fe
     fees_record = session.get(Fees, fees_id)
     if not fees_record:
         return None
+    previous_user_id = fees_record.user_id
 
     for field, value in data.dict(exclude_unset=True).items():
         setattr(fees_record, field, value)
@@ -160,6 +208,8 @@ def update_fees(session: Session, fees_id: int, data: FeesCreate) -> Optional[Fe
     session.add(fees_record)
     session.commit()
     session.refresh(fees_record)
+    _invalidate_user(session, previous_user_id, QueryType.FEES)
+    _invalidate_user(session, fees_record.user_id, QueryType.FEES)
     return fees_record
 
 def get_all_fees(session: Session) -> List[Fees]:
@@ -183,6 +233,7 @@ def delete_fees_by_id(session: Session, fees_id: int) -> bool:
         return False
     session.delete(record)
     session.commit()
+    _invalidate_user(session, record.user_id, QueryType.FEES)
     return True
 
 def delete_fees_by_user_id(session: Session, user_id: int) -> int:
@@ -195,6 +246,7 @@ def delete_fees_by_user_id(session: Session, user_id: int) -> int:
     for r in records:
         session.delete(r)
     session.commit()
+    _invalidate_user(session, user_id, QueryType.FEES)
     return True
 
 # ===== Marks Operations =====
@@ -203,6 +255,7 @@ def create_marks(session: Session, marks: Marks) -> Marks:
     session.add(marks)
     session.commit()
     session.refresh(marks)
+    _invalidate_user(session, marks.user_id, QueryType.MARKS)
     return marks
 
 def update_marks(session: Session, marks_id: int, data: MarksCreate) -> Optional[Marks]:
@@ -210,6 +263,7 @@ def update_marks(session: Session, marks_id: int, data: MarksCreate) -> Optional
     record = session.get(Marks, marks_id)
     if not record:
         return None
+    previous_user_id = record.user_id
 
     for field, value in data.dict(exclude_unset=True).items():
         setattr(record, field, value)
@@ -218,6 +272,8 @@ def update_marks(session: Session, marks_id: int, data: MarksCreate) -> Optional
     session.add(record)
     session.commit()
     session.refresh(record)
+    _invalidate_user(session, previous_user_id, QueryType.MARKS)
+    _invalidate_user(session, record.user_id, QueryType.MARKS)
     return record
 
 def get_all_marks(session: Session) -> List[Marks]:
@@ -232,7 +288,7 @@ def get_marks_by_id(session: Session, marks_id: int) -> Optional[Marks]:
 def get_marks_by_user_id(session: Session, user_id: int) -> List[Marks]:
     """Fetch all marks for a user"""
     statement = select(Marks).where(Marks.user_id == user_id)
-    return session.exec(statement)
+    return session.exec(statement).all()
 
 def delete_marks_by_id(session: Session, marks_id: int) -> bool:
     """Delete marks record by ID"""
@@ -241,6 +297,7 @@ def delete_marks_by_id(session: Session, marks_id: int) -> bool:
         return False
     session.delete(record)
     session.commit()
+    _invalidate_user(session, record.user_id, QueryType.MARKS)
     return True
 
 def delete_marks_by_user_id(session: Session, user_id: int) -> int:
@@ -252,6 +309,7 @@ def delete_marks_by_user_id(session: Session, user_id: int) -> int:
     for r in records:
         session.delete(r)
     session.commit()
+    _invalidate_user(session, user_id, QueryType.MARKS)
     return True
 
 # COURSE SERVICE FUNCTIONS by ( TEACHER / ADMIN)
@@ -286,6 +344,8 @@ def update_course(session: Session, course_id: int, user: User, course_data: Cou
     session.add(course)
     session.commit()
     session.refresh(course)
+    for student_id in _course_student_ids(session, course_id):
+        _invalidate_user(session, student_id, QueryType.COURSE)
     return course
 
 
@@ -299,8 +359,13 @@ def delete_course(session: Session, course_id: int, user: User):
     if user.role == "teacher" and course.teacher_id != user.id:
         raise HTTPException(403, "You are not authorized to delete this course")
 
+    student_ids = _course_student_ids(session, course_id)
     session.delete(course)
     session.commit()
+    for student_id in student_ids:
+        _invalidate_user(session, student_id, QueryType.COURSE)
+    # The recent-assignments context is built per course
+    _invalidate_type(session, QueryType.ASSIGNMENT)
     return {"message": "Course deleted successfully"}
 
 
@@ -344,6 +409,7 @@ def enroll_student_to_course(session: Session, course_id: int, student_id: int,
     link = UserCourseLink(user_id=student_id, course_id=course_id)
     session.add(link)
     session.commit()
+    _invalidate_user(session, student_id, QueryType.COURSE)
     return {"message": "Student enrolled successfully"}
 
 
@@ -356,6 +422,7 @@ def unenroll_student_from_course(session: Session, course_id: int, student_id: i
 
     session.delete(existing)
     session.commit()
+    _invalidate_user(session, student_id, QueryType.COURSE)
     return {"message": "Student unenrolled successfully"}
 
 
@@ -375,6 +442,7 @@ def create_assignment_records(session: Session, assignment: Assignment) -> Assig
     session.add(assignment)
     session.commit()
     session.refresh(assignment)
+    _invalidate_type(session, QueryType.ASSIGNMENT)
     return assignment
 
 def update_assignment(session: Session, assignment_id: int, data: AssignmentCreate) -> Optional[Assignment]:
@@ -389,6 +457,7 @@ def update_assignment(session: Session, assignment_id: int, data: AssignmentCrea
     session.add(record)
     session.commit()
     session.refresh(record)
+    _invalidate_type(session, QueryType.ASSIGNMENT)
     return record
 
 
@@ -443,6 +512,7 @@ def delete_assignment_by_id(session: Session, assignment_id: int) -> bool:
         return False
     session.delete(record)
     session.commit()
+    _invalidate_type(session, QueryType.ASSIGNMENT)
     return True
 
 # ====== Notice Operations ======
@@ -453,6 +523,7 @@ def create_notice_records(session: Session, notices: Notice) -> Notice:
     session.add(notices) 
     session.commit()
     session.refresh(notices)
+    _invalidate_type(session, QueryType.NOTICES)
     return notices
 
 def get_all_notices(session: Session) -> List[Notice]:
@@ -478,6 +549,7 @@ def update_notice(session: Session, notice_id: int, data: NoticeCreate) -> Optio
     session.add(notice)
     session.commit()
     session.refresh(notice)
+    _invalidate_type(session, QueryType.NOTICES)
     return notice
 
 def get_recent_notices(session: Session, limit: int = 3) -> List[Notice]:
@@ -493,4 +565,5 @@ def delete_notice(session: Session, notice_id: int) -> bool:
 
     session.delete(notice)
     session.commit()
+    _invalidate_type(session, QueryType.NOTICES)
     return True
\ No newline at end of file
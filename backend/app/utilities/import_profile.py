@@ -0,0 +1,64 @@
+"""
+Import-time profile of the application.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and
+summarizes the output: total import time, the slowest modules (cumulative,
+including their own imports) and time per top-level package.
+
+Usage (from backend/):
+    python -m app.utilities.import_profile             # profile app.main
+    python -m app.utilities.import_profile app.chat.chatbot --top 30
+"""
+import re
+import sys
+import argparse
+import subprocess
+from collections import defaultdict
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def profile_imports(module: str = "app.main") -> list:
+    """(self_us, cumulative_us, depth, module) for every module imported"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((int(self_us), int(cumulative_us), len(indent) // 2, name))
+    if proc.returncode != 0 and not rows:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else f"import {module} failed")
+    return rows
+
+
+def report(module: str = "app.main", top: int = 20) -> str:
+    rows = profile_imports(module)
+    target = next((r for r in rows if r[3] == module), None)
+    by_package = defaultdict(int)
+    for self_us, _, _, name in rows:
+        by_package[name.split(".")[0]] += self_us
+
+    lines = [
+        f"import {module}: {target[1] / 1000:.1f} ms total, {len(rows)} modules" if target
+        else f"import {module}: {len(rows)} modules",
+        "",
+        f"Slowest modules (cumulative, top {top}):",
+    ]
+    for self_us, cumulative_us, _, name in sorted(rows, key=lambda r: r[1], reverse=True)[:top]:
+        lines.append(f"  {cumulative_us / 1000:9.1f} ms  {name}")
+    lines += ["", f"By top-level package (self time, top {top}):"]
+    for package, self_us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]:
+        lines.append(f"  {self_us / 1000:9.1f} ms  {package}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import-time profile")
+    parser.add_argument("module", nargs="?", default="app.main")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+    print(report(args.module, args.top))
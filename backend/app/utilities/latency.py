@@ -0,0 +1,20 @@
+"""
+Latency percentiles over the bounded sample windows (deques of seconds)
+kept by the /stats collectors.
+"""
+import numpy as np
+
+
+def latency_percentile(samples, q: float) -> float:
+    """The q-th percentile of a window of latencies, in seconds"""
+    return float(np.percentile(np.fromiter(samples, dtype=float), q))
+
+def latency_summary(samples, percentiles: tuple = (50, 95, 99), mean: bool = False) -> dict:
+    """{"p50_ms": ..., "p95_ms": ..., "p99_ms": ...} for a window of latencies in seconds; {} when empty"""
+    if not samples:
+        return {}
+    values = np.fromiter(samples, dtype=float) * 1000
+    summary = {"avg_ms": round(float(values.mean()), 3)} if mean else {}
+    for q, value in zip(percentiles, np.percentile(values, percentiles)):
+        summary[f"p{q}_ms"] = round(float(value), 3)
+    return summary
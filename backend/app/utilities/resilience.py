@@ -0,0 +1,202 @@
+"""
+Deadlines, retries and circuit breakers around external dependencies
+(Gemini, Groq, Pinecone, DuckDuckGo).
+
+Each dependency gets:
+- an adaptive deadline: RESILIENCE_TIMEOUT_MULTIPLIER x its observed
+  RESILIENCE_TIMEOUT_PERCENTILE latency, clamped to [min_timeout, max_timeout]
+  (max_timeout until enough samples exist)
+- bounded retries with full-jitter exponential backoff
+- a circuit breaker: RESILIENCE_BREAKER_FAILURES consecutive failures open it,
+  calls then fail fast with DependencyUnavailable for
+  RESILIENCE_BREAKER_RESET seconds, after which one probe call is let through
+  (half-open); its outcome closes or re-opens the breaker
+
+Callers catch DependencyUnavailable (or any error after the retries) and
+return a degraded answer instead of a 500. State is on /stats -> resilience.
+"""
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+
+from app.config import settings
+from app.utilities.latency import latency_percentile, latency_summary
+from app.logger.logger import logger
+
+
+class DependencyUnavailable(Exception):
+    """Raised without calling the dependency while its circuit breaker is open"""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} is unavailable (circuit open, retry in {retry_in:.0f}s)")
+        self.name = name
+
+
+# ===== Circuit breaker =====
+class CircuitBreaker:
+    """closed -> open after N consecutive failures -> half-open after a cooldown -> closed / open"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (takes the single half-open probe slot)"""
+        with self._lock:
+            if self.state == "open" and self.retry_in() == 0:
+                self.state = "half_open"
+                self.probe_in_flight = False
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info("Circuit closed after a successful probe")
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+
+    def failure(self) -> bool:
+        """Record a failure; returns True if this opened the breaker"""
+        with self._lock:
+            self.consecutive_failures += 1
+            self.probe_in_flight = False
+            if self.state == "half_open" or (self.state == "closed" and self.consecutive_failures >= self.failure_threshold):
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self.times_opened += 1
+                return True
+            return False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "retry_in_s": round(self.retry_in(), 1) if self.state == "open" else None,
+        }
+
+
+# ===== Dependency =====
+class Dependency:
+    """One external service: adaptive deadline, retries with jitter and a circuit breaker"""
+
+    def __init__(self, name: str, min_timeout: float, max_timeout: float, retries: int, window: int = 500):
+        self.name = name
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.retries = retries
+        self.breaker = CircuitBreaker(settings.RESILIENCE_BREAKER_FAILURES, settings.RESILIENCE_BREAKER_RESET)
+        self.latencies = deque(maxlen=window)
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.retried = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def timeout(self) -> float:
+        """Deadline for the next attempt, derived from observed latency"""
+        with self._lock:
+            if len(self.latencies) < settings.RESILIENCE_MIN_SAMPLES:
+                return self.max_timeout
+            observed = latency_percentile(self.latencies, settings.RESILIENCE_TIMEOUT_PERCENTILE)
+        return min(max(observed * settings.RESILIENCE_TIMEOUT_MULTIPLIER, self.min_timeout), self.max_timeout)
+
+    def check(self):
+        """Fail fast while the breaker is open"""
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise DependencyUnavailable(self.name, self.breaker.retry_in())
+
+    def record(self, seconds: float, ok: bool, timed_out: bool = False, sample: bool = True):
+        with self._lock:
+            self.calls += 1
+            if ok and sample:
+                self.latencies.append(seconds)
+            if not ok:
+                self.failures += 1
+                self.timeouts += timed_out
+        if ok:
+            self.breaker.success()
+        elif self.breaker.failure():
+            logger.warning(f"Circuit for '{self.name}' opened after {self.breaker.consecutive_failures} failures")
+
+    async def call(self, func, *args, retries: int | None = None, **kwargs):
+        """Await `func(*args, **kwargs)` under the deadline, retrying with jitter; never past an open breaker"""
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            self.check()
+            started = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(func(*args, **kwargs), timeout=self.timeout())
+            except asyncio.CancelledError:
+                # Cancelled by the caller (e.g. a lost hedge race): not the dependency's fault
+                self.breaker.probe_in_flight = False
+                raise
+            except Exception as e:
+                self.record(time.perf_counter() - started, ok=False, timed_out=isinstance(e, asyncio.TimeoutError))
+                if attempt == retries or self.breaker.state == "open":
+                    raise
+                self.retried += 1
+                await asyncio.sleep(random.uniform(0, settings.RESILIENCE_RETRY_BASE_DELAY * 2 ** attempt))
+                continue
+            self.record(time.perf_counter() - started, ok=True)
+            return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            latency = latency_summary(self.latencies, (50, 99))
+            counters = {
+                "calls": self.calls,
+                "failures": self.failures,
+                "timeouts": self.timeouts,
+                "retries": self.retried,
+                "rejected_fast": self.rejected,
+            }
+        return {
+            **self.breaker.stats(),
+            "timeout_s": round(self.timeout(), 2),
+            **counters,
+            **latency,
+        }
+
+
+# ============================================
+# GLOBAL INSTANCE (Initialize once)
+# ============================================
+
+# name -> (min timeout, max timeout, retries)
+DEPENDENCIES = {
+    "gemini": (2.0, settings.LLM_TIMEOUT, 1),
+    "groq": (2.0, settings.LLM_TIMEOUT, 1),
+    "pinecone": (0.5, 10.0, 1),
+    "duckduckgo": (0.5, settings.SEARCH_TIMEOUT, 0),
+}
+
+dependencies = {
+    name: Dependency(name, min_timeout, max_timeout, retries)
+    for name, (min_timeout, max_timeout, retries) in DEPENDENCIES.items()
+}
+
+def get_dependency(name: str) -> Dependency:
+    return dependencies[name]
+
+def get_resilience_stats() -> dict:
+    return {name: dependency.stats() for name, dependency in dependencies.items()}
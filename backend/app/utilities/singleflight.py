@@ -0,0 +1,214 @@
+"""
+Single-flight coalescing of identical in-flight chat work.
+
+When a notice goes out, many students ask "what are the latest notices?"
+within seconds. Requests with the same key (query type, normalized query,
+hash of the prompt context) that arrive while an identical one is still
+running do not start their own DB load / LLM completion: they wait on the
+first one and share its result. Streams are fanned out: a late joiner
+replays the tokens produced so far, then follows the live stream.
+
+Only in-flight work is shared; nothing is kept once it finishes (the
+context and semantic caches cover that). Shared work must not capture a
+caller's request-scoped objects (e.g. its DB session), since any caller may
+leave first. A caller that leaves does not cancel work others still wait
+on; when the last one leaves, the work is cancelled. /stats -> coalescing reports, per
+kind of work, how many requests ran and how many were coalesced.
+"""
+import asyncio
+import hashlib
+import threading
+from collections import Counter
+from typing import Optional
+
+from app.config import settings
+from app.utilities.cache import normalize_query
+from app.logger.logger import logger
+
+
+def context_hash(context: Optional[str]) -> str:
+    return hashlib.blake2b((context or "").encode("utf-8"), digest_size=8).hexdigest()
+
+def coalesce_key(query_type, query: str, context: Optional[str] = None) -> tuple:
+    """(query type, normalized query, context hash): requests with equal keys get the same answer"""
+    return (getattr(query_type, "value", query_type), normalize_query(query), context_hash(context))
+
+
+class Call:
+    """One in-flight call: its task, how many callers joined it and how many still wait"""
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.joined = 0
+        self.waiting = 0
+
+
+class Flight:
+    """One in-flight stream: the chunks produced so far, shared by every subscriber"""
+
+    def __init__(self):
+        self.chunks = []
+        self.state = {}           # side results of the producer (e.g. retrieved sources)
+        self.done = False
+        self.error = None
+        self.subscribers = 0      # joined in total
+        self.listening = 0        # still reading
+        self.abandoned = False    # every subscriber left; the producer is being cancelled
+        self.producer = None
+        self._changed = asyncio.Event()
+
+    def publish(self, chunk=None, error: Optional[BaseException] = None, done: bool = False):
+        if chunk is not None:
+            self.chunks.append(chunk)
+        self.error = error or self.error
+        self.done = done or self.done
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def subscribe(self):
+        i = 0
+        try:
+            while True:
+                while i < len(self.chunks):
+                    yield self.chunks[i]
+                    i += 1
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await self._changed.wait()
+        finally:
+            # Closed or cancelled early: stop producing once nobody is reading
+            self.listening -= 1
+            if self.listening == 0 and not self.done and self.producer is not None:
+                self.abandoned = True
+                self.producer.cancel()
+
+
+# ===== Metrics =====
+class CoalescingStats:
+    """Requests, executions and coalesced waiters per kind of work"""
+
+    def __init__(self):
+        self.requests = Counter()
+        self.coalesced = Counter()
+        self.max_waiters = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, coalesced: bool, waiters: int = 1):
+        with self._lock:
+            self.requests[kind] += 1
+            if coalesced:
+                self.coalesced[kind] += 1
+            self.max_waiters[kind] = max(self.max_waiters[kind], waiters)
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = sum(self.requests.values())
+            coalesced = sum(self.coalesced.values())
+            return {
+                "enabled": settings.CHAT_COALESCING,
+                "requests": requests,
+                "coalesced": coalesced,
+                "ratio": round(coalesced / requests, 4) if requests else 0.0,
+                "by_kind": {
+                    kind: {
+                        "requests": n,
+                        "executed": n - self.coalesced[kind],
+                        "coalesced": self.coalesced[kind],
+                        "ratio": round(self.coalesced[kind] / n, 4),
+                        "max_waiters": self.max_waiters[kind],
+                    }
+                    for kind, n in self.requests.items()
+                },
+            }
+
+
+class SingleFlight:
+    """Runs at most one computation per key at a time; duplicates wait on it"""
+
+    def __init__(self):
+        self._calls = {}          # key -> Call
+        self._streams = {}        # key -> Flight
+        self.stats = CoalescingStats()
+
+    async def run(self, kind: str, key: tuple, func):
+        """Result of `await func()`, shared with identical calls already in flight"""
+        if not settings.CHAT_COALESCING:
+            return await func()
+        key = (kind, key)
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = Call(asyncio.ensure_future(func()))
+            call.task.add_done_callback(lambda done: self._finish_call(key, done))
+        call.joined += 1
+        call.waiting += 1
+        self.stats.record(kind, coalesced=call.joined > 1, waiters=call.waiting)
+        try:
+            # A caller that goes away does not cancel the work the others are waiting on
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiting -= 1
+            if call.waiting == 0 and not call.task.done():
+                # Everyone left: stop the work, and let the next caller start afresh
+                call.task.cancel()
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+
+    def _finish_call(self, key: tuple, task: asyncio.Task):
+        call = self._calls.get(key)
+        if call is not None and call.task is task:
+            del self._calls[key]
+            if call.joined > 1:
+                logger.info(f"Coalesced {call.joined} identical '{key[0]}' requests")
+        if not task.cancelled():
+            task.exception()  # retrieved here so an error nobody awaited is not logged as lost
+
+    def stream(self, kind: str, key: tuple, factory) -> tuple[dict, object]:
+        """
+        (shared state, token iterator) for `factory(state)`, an async iterator
+        of chunks; identical streams in flight are joined instead of started
+        """
+        if not settings.CHAT_COALESCING:
+            state = {}
+            return state, factory(state)
+        key = (kind, key)
+        flight = self._streams.get(key)
+        if flight is None or flight.abandoned:
+            flight = self._streams[key] = Flight()
+            tokens = factory(flight.state)
+            flight.producer = asyncio.ensure_future(self._produce(key, flight, tokens))
+            self.stats.record(kind, coalesced=False)
+        else:
+            self.stats.record(kind, coalesced=True, waiters=flight.listening + 1)
+        flight.subscribers += 1
+        flight.listening += 1
+        return flight.state, flight.subscribe()
+
+    async def _produce(self, key: tuple, flight: Flight, tokens):
+        try:
+            async for chunk in tokens:
+                flight.publish(chunk)
+            flight.publish(done=True)
+        except asyncio.CancelledError:
+            flight.publish(error=RuntimeError("Coalesced stream was cancelled"), done=True)
+            if hasattr(tokens, "aclose"):
+                await tokens.aclose()
+            raise
+        except Exception as e:
+            flight.publish(error=e, done=True)
+        finally:
+            if self._streams.get(key) is flight:
+                del self._streams[key]
+            if flight.subscribers > 1:
+                logger.info(f"Coalesced {flight.subscribers} identical '{key[0]}' streams")
+
+
+# ============================================
+# GLOBAL INSTANCE (Initialize once)
+# ============================================
+
+single_flight = SingleFlight()
+
+def get_single_flight() -> SingleFlight:
+    return single_flight
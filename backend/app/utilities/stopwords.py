@@ -0,0 +1,22 @@
+"""
+Words that carry no intent or topic in a chat query ("please show me my
+...", "what is the ..."). Shared by the rule miner (app/classify/rules.py),
+which never mines a phrase of these alone, and the prompt context builder
+(app/chat/context_builder.py), which ignores them when matching query words
+against records. Compared against `normalize_query` tokens.
+"""
+
+STOPWORDS = frozenset({
+    # articles, pronouns, auxiliaries
+    "a", "an", "the", "my", "me", "i", "it", "its", "s", "this", "that", "there",
+    "is", "are", "was", "were", "be", "been", "do", "does", "did", "have",
+    "will", "would", "can", "could", "need",
+    # question words
+    "what", "whats", "which", "who", "when", "where", "why", "how",
+    # prepositions, conjunctions, quantifiers
+    "of", "for", "to", "in", "on", "at", "by", "from", "with", "about", "after", "before",
+    "and", "or", "if", "not", "no", "all", "any", "every", "whole", "much", "many",
+    # request verbs and politeness
+    "show", "check", "get", "give", "see", "view", "list", "tell", "please", "pls",
+    "current", "latest",
+})
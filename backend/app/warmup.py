@@ -0,0 +1,113 @@
+"""
+Startup warmup and readiness gating.
+
+After the classifier is loaded, representative queries from
+data/college_queries.csv are pushed through every stage a chat request
+touches: the classifier (single + batched forward passes, tokenizer), the
+rule matcher and cascade student, the LLM clients and their connection
+pools, the embedding model and vector store, and the web search client.
+The worker reports ready (/health/ready) only once the required steps have
+succeeded, so a load balancer never routes traffic to a cold worker.
+"""
+import csv
+import time
+import asyncio
+import inspect
+
+from app.config import settings
+from app.utilities.cache import normalize_query
+from app.classify.classify_query import get_classifier
+from app.classify.model_manager import warm_classifier
+from app.classify.rules import get_rule_matcher
+from app.classify.cascade import get_student
+from app.chat.llm_registry import get_llm_registry
+from app.chat.vectorstore import get_college_vectorstore
+from app.chat.search import get_web_search
+from app.logger.logger import logger
+
+SAMPLE_SIZE = 16
+
+# Startup phase timings (ms), reported on /stats
+startup_profile = {}
+# Per-step warmup outcome, reported on /health/ready
+readiness = {"ready": False, "warming": False, "steps": {}}
+
+def sample_queries(label: str | None = None, limit: int = SAMPLE_SIZE) -> list:
+    """Up to `limit` labelled queries, optionally of one label"""
+    try:
+        with open(settings.QUERY_DATASET_PATH, newline="") as f:
+            rows = [row for row in csv.DictReader(f) if label is None or row["labels"].strip() == label]
+    except FileNotFoundError:
+        return []
+    return [row["Queries"] for row in rows[:limit]]
+
+# ===== Steps =====
+def warm_classifier_stage():
+    warm_classifier(get_classifier())
+
+def warm_fast_paths():
+    """Rule matcher and cascade student (lookups only, stats untouched)"""
+    queries = sample_queries()
+    if settings.CLASSIFIER_RULES:
+        matcher = get_rule_matcher()
+        for query in queries:
+            matcher._match(normalize_query(query))
+    student = get_student() if settings.CLASSIFIER_CASCADE else None
+    if student is not None:
+        for query in queries:
+            student.predict_proba(query)
+
+def warm_llm_clients():
+    get_llm_registry().startup()
+
+async def warm_llm_connections():
+    await get_llm_registry().warm_connections()
+
+def warm_vectorstore():
+    """Embedding model load + one search, then a batch of real college-info questions"""
+    store = get_college_vectorstore().load()
+    queries = sample_queries("College Info", limit=8)
+    if queries:
+        store.embeddings.embed_documents(queries)
+
+def warm_search_tools():
+    """Search HTTP client and the local search index, if configured"""
+    search = get_web_search()
+    search.client()
+    search.local_index()
+
+# name -> (function, required for readiness)
+WARMUP_STEPS = (
+    ("classifier", warm_classifier_stage, True),
+    ("fast_paths", warm_fast_paths, False),
+    ("llm_clients", warm_llm_clients, False),
+    ("llm_connections", warm_llm_connections, False),
+    ("vectorstore", warm_vectorstore, False),
+    ("search_tools", warm_search_tools, False),
+)
+
+async def run_warmup():
+    """Run every step (blocking work off the event loop), then set readiness"""
+    readiness["warming"] = True
+    start_time = time.perf_counter()
+    for name, func, required in WARMUP_STEPS:
+        step_started = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(func):
+                await func()
+            else:
+                await asyncio.to_thread(func)
+            readiness["steps"][name] = {"ok": True}
+        except Exception as e:
+            readiness["steps"][name] = {"ok": False, "error": str(e)}
+            log = logger.error if required else logger.warning
+            log(f"Warmup step '{name}' failed: {e}")
+        elapsed = round((time.perf_counter() - step_started) * 1000, 2)
+        readiness["steps"][name]["ms"] = elapsed
+        readiness["steps"][name]["required"] = required
+        startup_profile[f"{name}_ms"] = elapsed
+
+    startup_profile["warmup_ms"] = round((time.perf_counter() - start_time) * 1000, 2)
+    readiness["warming"] = False
+    readiness["ready"] = all(readiness["steps"][name]["ok"] for name, _, required in WARMUP_STEPS if required)
+    logger.info(f"Warmup finished (ready={readiness['ready']}): {startup_profile}")
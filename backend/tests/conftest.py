@@ -0,0 +1,58 @@
+import os
+import sys
+import csv
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Settings are read at import time; give the app a throwaway database and secrets
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{Path(tempfile.gettempdir()) / 'college_chatbot_test.db'}")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("FRONTEND_URL", "http://localhost")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+DATASET = Path(__file__).resolve().parents[1] / "data" / "college_queries.csv"
+
+
+@pytest.fixture(scope="session")
+def labelled_queries() -> list:
+    """Rows of data/college_queries.csv: {"Queries": ..., "labels": ...}"""
+    with open(DATASET, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.fixture(scope="session")
+def tiny_model_dir(tmp_path_factory, labelled_queries):
+    """A small, randomly initialized BERT classifier saved the way MODEL_DIR is"""
+    import torch
+    from transformers import BertConfig, BertForSequenceClassification, BertTokenizer
+    from transformers.models.bert.tokenization_bert import BasicTokenizer
+
+    labels = sorted({row["labels"] for row in labelled_queries})
+    words = sorted({word for row in labelled_queries for word in BasicTokenizer().tokenize(row["Queries"])})
+
+    directory = tmp_path_factory.mktemp("tiny_model")
+    vocab = directory / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + words) + "\n")
+
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=len(words) + 5, hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+        intermediate_size=64, max_position_embeddings=128,
+        id2label=dict(enumerate(labels)), label2id={label: i for i, label in enumerate(labels)},
+    )
+    BertForSequenceClassification(config).save_pretrained(directory)
+    BertTokenizer(str(vocab)).save_pretrained(directory)
+    return str(directory)
+
+
+@pytest.fixture(scope="session")
+def tiny_classifier(tiny_model_dir):
+    """QueryClassifier over the tiny model, located through MODEL_DIR like the app's"""
+    from app.classify.classify_query import QueryClassifier
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv("MODEL_DIR", tiny_model_dir)
+        return QueryClassifier()
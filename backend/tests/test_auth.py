@@ -0,0 +1,38 @@
+import asyncio
+import threading
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.auth import OAuth
+from app.auth.OAuth import create_access_token, get_current_user
+from app.models.models import User
+
+
+def test_user_lookup_runs_off_the_event_loop(monkeypatch):
+    lookups = []
+
+    def fake_get_user(username, session):
+        lookups.append((username, threading.get_ident()))
+        return User(username=username, role="student")
+
+    monkeypatch.setattr(OAuth, "get_user", fake_get_user)
+    token = create_access_token({"sub": "alice"}, expire_time=timedelta(minutes=5))
+
+    async def main():
+        return await get_current_user(token, session=None), threading.get_ident()
+
+    user, loop_thread = asyncio.run(main())
+
+    assert user.username == "alice"
+    assert lookups[0][0] == "alice" and lookups[0][1] != loop_thread
+
+
+def test_unknown_user_is_rejected(monkeypatch):
+    monkeypatch.setattr(OAuth, "get_user", lambda username, session: None)
+    token = create_access_token({"sub": "ghost"}, expire_time=timedelta(minutes=5))
+
+    with pytest.raises(HTTPException) as rejected:
+        asyncio.run(get_current_user(token, session=None))
+    assert rejected.value.status_code == 401
@@ -0,0 +1,160 @@
+import asyncio
+import threading
+
+from app.classify.batcher import MicroBatcher
+
+
+class FakeClassifier:
+    """Records the batches it was called with"""
+
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.singles = []
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def predict_batch(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return [{"query_type": f"type-{text}"} for text in texts]
+
+    def predict(self, text):
+        self.singles.append(text)
+        return {"query_type": f"single-{text}"}
+
+
+def new_batcher(model, **kwargs) -> MicroBatcher:
+    return MicroBatcher(model.predict_batch, model.predict, **kwargs)
+
+
+def test_concurrent_calls_share_one_forward_pass():
+    model = FakeClassifier()
+    batcher = new_batcher(model, max_batch_size=8, max_wait_ms=50)
+
+    async def main():
+        results = await asyncio.gather(*(batcher.submit(f"q{i}") for i in range(5)))
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(main())
+
+    # Each caller gets its own prediction back, in its own position
+    assert [r["query_type"] for r in results] == [f"type-q{i}" for i in range(5)]
+    assert model.batches == [[f"q{i}" for i in range(5)]]
+    stats = batcher.stats()
+    assert stats["batches"] == 1 and stats["items"] == 5
+    assert stats["batch_size_histogram"] == {5: 1}
+
+
+def test_batches_are_capped_at_max_batch_size():
+    model = FakeClassifier()
+    batcher = new_batcher(model, max_batch_size=4, max_wait_ms=50)
+
+    async def main():
+        results = await asyncio.gather(*(batcher.submit(f"q{i}") for i in range(10)))
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(main())
+
+    assert [r["query_type"] for r in results] == [f"type-q{i}" for i in range(10)]
+    assert [len(b) for b in model.batches] == [4, 4, 2]
+
+
+def test_window_closes_without_a_full_batch():
+    model = FakeClassifier()
+    batcher = new_batcher(model, max_batch_size=16, max_wait_ms=1)
+
+    async def main():
+        first = await batcher.submit("alone")
+        second = await batcher.submit("later")
+        await batcher.stop()
+        return first, second
+
+    first, second = asyncio.run(main())
+
+    assert first["query_type"] == "type-alone" and second["query_type"] == "type-later"
+    assert model.batches == [["alone"], ["later"]]
+
+
+def test_full_queue_sheds_to_single_predictions():
+    model = FakeClassifier()
+    batcher = new_batcher(model, max_batch_size=2, max_wait_ms=50, max_queue=2)
+
+    async def main():
+        results = await asyncio.gather(*(batcher.submit(f"q{i}") for i in range(4)))
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(main())
+
+    assert sorted(r["query_type"] for r in results) == ["single-q2", "single-q3", "type-q0", "type-q1"]
+    assert model.singles == ["q2", "q3"]
+    assert batcher.stats()["overflow"] == 2
+
+
+def test_failed_batch_answers_every_caller_with_an_error():
+    model = FakeClassifier(fail=True)
+    batcher = new_batcher(model, max_batch_size=8, max_wait_ms=20)
+
+    async def main():
+        results = await asyncio.gather(*(batcher.submit(f"q{i}") for i in range(3)))
+        # The worker survives a failed batch
+        model.fail = False
+        after = await batcher.submit("next")
+        await batcher.stop()
+        return results, after
+
+    results, after = asyncio.run(main())
+
+    assert all(r["query_type"] == "unknown" and "model crashed" in r["error"] for r in results)
+    assert after["query_type"] == "type-next"
+
+
+def test_worker_restarts_on_a_new_event_loop():
+    model = FakeClassifier()
+    batcher = new_batcher(model, max_batch_size=4, max_wait_ms=1)
+
+    async def one(text):
+        return await batcher.submit(text)
+
+    assert asyncio.run(one("a"))["query_type"] == "type-a"
+    assert asyncio.run(one("b"))["query_type"] == "type-b"
+
+
+def test_stop_fails_every_caller_still_waiting():
+    release = threading.Event()
+    model = FakeClassifier()
+    slow_batch = model.predict_batch
+    model.predict_batch = lambda texts: (release.wait(5), slow_batch(texts))[1]
+    batcher = new_batcher(model, max_batch_size=2, max_wait_ms=1)
+
+    async def main():
+        # q0, q1 are in the running batch, q2..q4 are still queued
+        callers = [asyncio.ensure_future(batcher.submit(f"q{i}")) for i in range(5)]
+        await asyncio.sleep(0.05)
+        await asyncio.wait_for(batcher.stop(), 1)
+        release.set()
+        return await asyncio.wait_for(asyncio.gather(*callers, return_exceptions=True), 1)
+
+    results = asyncio.run(main())
+
+    assert all(isinstance(r, RuntimeError) and "stopped" in str(r) for r in results)
+
+
+def test_short_result_list_fails_the_whole_batch():
+    model = FakeClassifier()
+    model.predict_batch = lambda texts: [{"query_type": "x"}] * (len(texts) - 1)
+    batcher = new_batcher(model, max_batch_size=4, max_wait_ms=20)
+
+    async def main():
+        results = await asyncio.wait_for(asyncio.gather(*(batcher.submit(f"q{i}") for i in range(3))), 1)
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(main())
+
+    # Results cannot be matched to callers any more, so nobody gets a possibly wrong label
+    assert all(r["query_type"] == "unknown" and "2 results for 3 inputs" in r["error"] for r in results)
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.classify.bucketing import EncodingCache, PaddingStats, length_buckets, pad_encodings
+
+
+def enc(n: int) -> dict:
+    return {"input_ids": list(range(1, n + 1)), "attention_mask": [1] * n}
+
+
+class CountingTokenizer:
+    """Whitespace tokenizer that records which texts it was asked to encode"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, truncation=True, max_length=128):
+        self.calls.append(list(texts))
+        ids = [[len(word) for word in text.split()][:max_length] for text in texts]
+        return {"input_ids": ids, "attention_mask": [[1] * len(i) for i in ids]}
+
+
+def test_buckets_group_similar_lengths_and_cover_every_index():
+    encodings = [enc(n) for n in (9, 2, 7, 3, 8, 1)]
+    buckets = length_buckets(encodings, bucket_size=2)
+
+    assert buckets == [[5, 1], [3, 2], [4, 0]]
+    assert sorted(i for b in buckets for i in b) == list(range(6))
+
+
+def test_padding_is_only_to_the_longest_item_in_the_bucket():
+    batch = pad_encodings([enc(2), enc(4)], pad_token_id=0)
+    assert batch["input_ids"].shape == (2, 4)
+    assert batch["input_ids"].tolist() == [[1, 2, 0, 0], [1, 2, 3, 4]]
+    assert batch["attention_mask"].tolist() == [[1, 1, 0, 0], [1, 1, 1, 1]]
+    assert batch["input_ids"].dtype == np.int64
+
+    left = pad_encodings([enc(2), enc(4)], pad_token_id=0, padding_side="left")
+    assert left["input_ids"].tolist() == [[0, 0, 1, 2], [1, 2, 3, 4]]
+
+
+def test_encoding_cache_tokenizes_each_string_once():
+    tokenizer = CountingTokenizer()
+    cache = EncodingCache(tokenizer, maxsize=16)
+
+    first = cache.encode(["a bb", "ccc", "a bb"])
+    second = cache.encode(["ccc", "dddd"])
+
+    assert [e["input_ids"] for e in first] == [[1, 2], [3], [1, 2]]
+    assert [e["input_ids"] for e in second] == [[3], [4]]
+    assert sorted(tokenizer.calls[0]) == ["a bb", "ccc"] and tokenizer.calls[1] == ["dddd"]
+
+
+def test_padding_stats_compare_against_a_single_padded_batch():
+    encodings = [enc(n) for n in (1, 1, 10, 10)]
+    stats = PaddingStats()
+    stats.record(encodings, length_buckets(encodings, bucket_size=2))
+
+    summary = stats.stats()
+    assert summary["padding_efficiency"] == 1.0
+    assert summary["tokens_saved_vs_single_pad"] == 4 * 10 - 22
+
+
+def test_bucketed_predict_batch_keeps_the_input_order(tiny_classifier, labelled_queries, monkeypatch):
+    clf = tiny_classifier
+    texts = [row["Queries"] for row in labelled_queries[:24]]
+    # Mix very short and long inputs so buckets reorder them
+    texts = [texts[0], "fees?", texts[1], "hi", texts[2] * 3] + texts[3:]
+
+    monkeypatch.setattr(settings, "CLASSIFIER_BUCKET_SIZE", 4)
+    buckets_before = clf.padding.buckets
+    bucketed = clf.predict_batch(texts)
+    assert clf.padding.buckets - buckets_before == -(-len(texts) // 4)
+    monkeypatch.setattr(settings, "CLASSIFIER_BUCKET_SIZE", len(texts))
+    single_pad = clf.predict_batch(texts)
+
+    assert [r["query_type"] for r in bucketed] == [r["query_type"] for r in single_pad]
+    for text, result in zip(texts, bucketed):
+        expected = clf.predict(text)
+        assert result["query_type"] == expected["query_type"]
+        assert result["confidence"] == pytest.approx(expected["confidence"], abs=1e-4)
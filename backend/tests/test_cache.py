@@ -0,0 +1,103 @@
+import time
+
+from app.utilities.cache import TTLCache, normalize_query
+
+
+def test_normalize_query_ignores_case_punctuation_and_spacing():
+    assert normalize_query("  What's my   ATTENDANCE?? ") == "what s my attendance"
+
+
+def test_entries_expire_after_their_ttl():
+    cache = TTLCache(maxsize=4, ttl=0.02)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+    assert cache.get("a") == 1
+
+    time.sleep(0.03)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.stats()["expirations"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")       # b is now least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_peek_does_not_refresh_lru_order():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.peek("a") == 1
+    cache.set("c", 3)
+
+    assert cache.peek("a") is None
+    assert cache.stats()["hits"] == 0
+
+
+def test_pop_and_clear_invalidate_entries():
+    cache = TTLCache(maxsize=4, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.pop("a") == 1
+    assert cache.get("a") is None
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_items_skips_expired_entries():
+    cache = TTLCache(maxsize=4, ttl=60)
+    cache.set("old", 1, ttl=0.01)
+    cache.set("new", 2)
+    time.sleep(0.02)
+    assert cache.items() == [("new", 2)]
+
+
+def test_value_computed_before_a_clear_is_not_stored():
+    cache = TTLCache(maxsize=4, ttl=60)
+    generation = cache.generation
+    cache.clear()
+
+    cache.set("a", "old model", generation=generation)
+    assert cache.get("a") is None and cache.stats()["stale_sets"] == 1
+
+    cache.set("a", "new model", generation=cache.generation)
+    assert cache.get("a") == "new model"
+
+
+def test_prediction_in_flight_during_a_model_swap_is_not_cached(monkeypatch):
+    import asyncio
+    from types import SimpleNamespace
+    from app.config import settings
+    from app.chat import chatbot
+    from app.classify import classify_query
+
+    monkeypatch.setattr(settings, "CLASSIFIER_RULES", False)
+    monkeypatch.setattr(settings, "CLASSIFIER_CASCADE", False)
+    monkeypatch.setattr(settings, "CLASSIFIER_BATCHING", True)
+    monkeypatch.setattr(classify_query, "classifier", SimpleNamespace(version="v1"))
+    monkeypatch.setattr(chatbot, "get_classifier", lambda: classify_query.classifier)
+    monkeypatch.setattr(chatbot, "get_traffic_log", lambda: SimpleNamespace(record=lambda *args: None))
+
+    class SwappingBatcher:
+        """Old model answers while v2 is swapped in"""
+
+        async def submit(self, text):
+            classify_query.swap_classifier(SimpleNamespace(version="v2"))
+            return {"query_type": "fees", "confidence": 0.9}
+
+    monkeypatch.setattr(chatbot, "get_classify_batcher", lambda: SwappingBatcher())
+    cache = classify_query.get_classification_cache()
+    cache.clear()
+
+    assert asyncio.run(chatbot.classify_query("fee status please")) == chatbot.QueryType.FEES
+    assert cache.peek(normalize_query("fee status please")) is None
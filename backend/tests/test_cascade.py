@@ -0,0 +1,205 @@
+import asyncio
+import json
+
+import numpy as np
+
+from app.config import settings
+from app.chat import chatbot
+from app.classify import cascade
+from app.classify.cascade import TrafficLog, calibrate_threshold, load_training_data
+from app.models.schemas import QueryType
+from app.utilities.cache import TTLCache
+
+
+def prediction(query_type: str, confidence: float) -> dict:
+    return {"query_type": query_type, "confidence": confidence}
+
+
+def read_entries(path) -> list:
+    return [json.loads(line) for line in open(path)]
+
+
+# ===== Traffic log =====
+def test_traffic_log_keeps_only_confident_predictions(tmp_path):
+    log = TrafficLog(str(tmp_path / "traffic.jsonl"), min_confidence=0.8, flush_every=1)
+    log.record("my attendance please", prediction("attendance", 0.95))
+    log.record("hmm what", prediction("general", 0.4))
+
+    entries = read_entries(tmp_path / "traffic.jsonl")
+    assert [e["query"] for e in entries] == ["my attendance please"]
+    assert log.stats()["skipped_low_confidence"] == 1
+
+
+def test_traffic_log_rotates_past_max_bytes(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    log = TrafficLog(str(path), min_confidence=0.0, max_bytes=200, flush_every=1)
+    for i in range(20):
+        log.record(f"what are my fees for semester {i}", prediction("fees", 0.9))
+
+    assert path.stat().st_size < 400
+    assert (tmp_path / "traffic.jsonl.1").exists()
+    assert log.stats()["rotations"] > 0
+
+
+def test_traffic_log_writes_off_the_event_loop(tmp_path, monkeypatch):
+    import threading
+    path = tmp_path / "traffic.jsonl"
+    log = TrafficLog(str(path), min_confidence=0.0, flush_every=2)
+    writer_threads = []
+    append = log._append
+    monkeypatch.setattr(log, "_append", lambda lines: (writer_threads.append(threading.get_ident()), append(lines)))
+
+    async def main():
+        log.record("my attendance please", prediction("attendance", 0.9))
+        log.record("show my marks", prediction("marks", 0.9))   # fills the buffer
+        assert not path.exists()                                # not written inline
+        log.record("fee deadline", prediction("fees", 0.9))
+        await log.aclose()
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+    assert len(read_entries(path)) == 3
+    assert writer_threads and loop_thread not in writer_threads
+
+
+def test_hashed_entries_are_not_used_for_training(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CASCADE_TRAFFIC_MIN_CONFIDENCE", 0.8)
+    dataset = tmp_path / "queries.csv"
+    dataset.write_text("Queries,labels\nshow my marks,marks\n")
+    path = tmp_path / "traffic.jsonl"
+
+    private = TrafficLog(str(path), store_queries=False, flush_every=1)
+    private.record("Ram Bahadur fee receipt 4521", prediction("fees", 0.99))
+    assert "query" not in read_entries(path)[0]
+    assert "Ram" not in path.read_text()
+
+    TrafficLog(str(path), flush_every=1).record("when is the fee deadline", prediction("fees", 0.9))
+    texts, labels, labelled = load_training_data(str(dataset), str(path))
+    assert texts == ["show my marks", "when is the fee deadline"]
+    assert labelled == 1
+
+
+def test_training_only_distils_the_teacher_versions_predictions(tmp_path):
+    dataset = tmp_path / "queries.csv"
+    dataset.write_text("Queries,labels\nshow my marks,marks\n")
+    path = tmp_path / "traffic.jsonl"
+    log = TrafficLog(str(path), flush_every=1)
+    log.record("when is the fee deadline", prediction("fees", 0.9))   # untagged: the boot default
+    log.record("fee due date", prediction("fees", 0.9), model_version="v1")
+    log.record("is the fee due", prediction("notices", 0.9), model_version="v2")
+
+    texts, _, _ = load_training_data(str(dataset), str(path), model_version="v2")
+    assert texts == ["show my marks", "is the fee due"]
+    texts, _, _ = load_training_data(str(dataset), str(path), model_version="default")
+    assert texts == ["show my marks", "when is the fee deadline"]
+
+
+# ===== Student =====
+def test_calibrated_threshold_meets_target_precision():
+    confidences = np.array([0.99, 0.95, 0.9, 0.7, 0.6, 0.5])
+    correct = np.array([True, True, True, False, True, False])
+
+    threshold = calibrate_threshold(confidences, correct, 0.99)
+    assert threshold == 0.9
+    assert correct[confidences >= threshold].all()
+    assert calibrate_threshold(confidences, np.zeros(6, dtype=bool), 0.9) > 1.0
+
+
+def test_student_from_another_teacher_version_is_not_used(monkeypatch):
+    student = cascade.HashedLinearClassifier(["fees", "marks"])
+    student.meta = {"teacher_version": "v1"}
+    stats = cascade.CascadeStats()
+    monkeypatch.setattr(cascade, "student", student)
+    monkeypatch.setattr(cascade, "_student_checked", True)
+    monkeypatch.setattr(cascade, "cascade_stats", stats)
+
+    assert cascade.get_student("v1") is student
+    assert cascade.get_student("v2") is None
+    assert cascade.get_student() is student
+    assert stats.student_version_skips == 1
+
+
+# ===== Routing =====
+class FakeStudent:
+    threshold = 0.9
+
+    def __init__(self, confidence: float):
+        self.confidence = confidence
+
+    def predict(self, query: str) -> dict:
+        return prediction("fees", self.confidence)
+
+
+class FakeClassifier:
+    def predict(self, query: str) -> dict:
+        return prediction("marks", 0.97)
+
+
+class FakeRules:
+    def match(self, query: str):
+        return prediction("attendance", 1.0) if query == "my attendance" else None
+
+    def maybe_shadow(self, query: str, label: str):
+        pass
+
+
+def route(monkeypatch, query: str, student_confidence: float) -> tuple:
+    """(query type, stage that resolved it, queries the transformer saw)"""
+    model_calls = []
+
+    async def run_model(predict, text):
+        model_calls.append(text)
+        return predict(text)
+
+    monkeypatch.setattr(settings, "CLASSIFIER_RULES", True)
+    monkeypatch.setattr(settings, "CLASSIFIER_CASCADE", True)
+    monkeypatch.setattr(settings, "CLASSIFIER_BATCHING", False)
+    monkeypatch.setattr(chatbot, "get_classifier", lambda: FakeClassifier())
+    monkeypatch.setattr(chatbot, "get_rule_matcher", lambda: FakeRules())
+    monkeypatch.setattr(chatbot, "get_student", lambda version=None: FakeStudent(student_confidence))
+    monkeypatch.setattr(chatbot, "get_classification_cache", lambda: TTLCache(maxsize=8, ttl=60))
+    monkeypatch.setattr(chatbot, "run_inference", run_model)
+    monkeypatch.setattr(chatbot, "get_traffic_log", lambda: TrafficLog(""))
+    stats = cascade.CascadeStats()
+    monkeypatch.setattr(chatbot, "get_cascade_stats", lambda: stats)
+
+    query_type = asyncio.run(chatbot.classify_query(query))
+    stage = next(stage for stage, n in stats.resolved.items() if n)
+    return query_type, stage, model_calls
+
+
+def test_rules_answer_before_the_student_and_model(monkeypatch):
+    assert route(monkeypatch, "my attendance", 0.99) == (QueryType.ATTENDANCE, "rules", [])
+
+
+def test_confident_student_skips_the_model(monkeypatch):
+    assert route(monkeypatch, "how much is due", 0.95) == (QueryType.FEES, "student", [])
+
+
+def test_unsure_student_falls_through_to_the_model(monkeypatch):
+    assert route(monkeypatch, "how did I do", 0.5) == (QueryType.MARKS, "model", ["how did I do"])
+
+
+def test_prediction_in_flight_during_a_swap_is_not_logged(monkeypatch, tmp_path):
+    cache = TTLCache(maxsize=8, ttl=60)
+    log = TrafficLog(str(tmp_path / "traffic.jsonl"), flush_every=1)
+
+    async def swap_mid_prediction(predict, text):
+        cache.clear()   # swap_classifier landed while the old model was predicting
+        return predict(text)
+
+    monkeypatch.setattr(settings, "CLASSIFIER_RULES", False)
+    monkeypatch.setattr(settings, "CLASSIFIER_CASCADE", False)
+    monkeypatch.setattr(settings, "CLASSIFIER_BATCHING", False)
+    monkeypatch.setattr(chatbot, "get_classifier", lambda: FakeClassifier())
+    monkeypatch.setattr(chatbot, "get_classification_cache", lambda: cache)
+    monkeypatch.setattr(chatbot, "run_inference", swap_mid_prediction)
+    monkeypatch.setattr(chatbot, "get_traffic_log", lambda: log)
+    monkeypatch.setattr(chatbot, "get_cascade_stats", lambda: cascade.CascadeStats())
+
+    assert asyncio.run(chatbot.classify_query("how did I do")) == QueryType.MARKS
+    assert not (tmp_path / "traffic.jsonl").exists()
+
+    monkeypatch.setattr(chatbot, "run_inference", lambda predict, text: asyncio.sleep(0, predict(text)))
+    asyncio.run(chatbot.classify_query("how did I do"))
+    assert read_entries(tmp_path / "traffic.jsonl")[0]["model_version"] == "default"
@@ -0,0 +1,111 @@
+import json
+from datetime import timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.auth.OAuth import create_access_token, get_current_user
+from app.db.database import create_all_db_tables, engine
+from app.models.models import User
+from app.routers import chat as chat_router
+
+
+async def fake_events(session, user, query):
+    yield "classification", {"query_type": "general"}
+    for text in ("Hello", " there"):
+        yield "token", {"text": text}
+    yield "done", {"query_type": "general", "response": "Hello there", "num_sources": 0, "sources": []}
+
+
+def parse_sse(body: str) -> list:
+    """(event, data) for each frame of a text/event-stream body"""
+    frames = []
+    for block in body.split("\n\n"):
+        if not block:
+            continue
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        frames.append((lines["event"], json.loads(lines["data"])))
+    return frames
+
+
+def get_or_create_user(username: str, role: str) -> User:
+    create_all_db_tables()
+    with Session(engine) as session:
+        user = session.exec(select(User).where(User.username == username)).first()
+        if user is None:
+            user = User(username=username, full_name="Test", email=f"{username}@example.com",
+                        batch="2080", program="BCA", role=role, hashed_password="x")
+            session.add(user)
+            session.commit()
+            session.refresh(user)
+        return user
+
+
+def token_for(user: User) -> str:
+    return create_access_token({"sub": user.username}, expire_time=timedelta(minutes=5))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(chat_router, "stream_events", fake_events)
+    app = FastAPI()
+    app.include_router(chat_router.router)
+    return TestClient(app)
+
+
+def test_format_sse_frames_one_event():
+    frame = chat_router.format_sse("token", {"text": "a\nb"})
+    # The payload is one JSON line, so newlines in tokens cannot break the frame
+    assert frame == 'event: token\ndata: {"text": "a\\nb"}\n\n'
+
+
+def test_sse_endpoint_streams_classification_tokens_then_done(client):
+    client.app.dependency_overrides[get_current_user] = lambda: User(id=1, username="s", role="student")
+
+    response = client.post("/api/v1/chat/stream", json={"query": "hi"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    frames = parse_sse(response.text)
+    assert [event for event, _ in frames] == ["classification", "token", "token", "done"]
+    assert frames[-1][1]["response"] == "Hello there"
+
+
+def test_sse_error_is_sent_as_an_event(client, monkeypatch):
+    async def failing_events(session, user, query):
+        yield "classification", {"query_type": "general"}
+        raise RuntimeError("llm down")
+
+    monkeypatch.setattr(chat_router, "stream_events", failing_events)
+    client.app.dependency_overrides[get_current_user] = lambda: User(id=1, username="s", role="student")
+
+    frames = parse_sse(client.post("/api/v1/chat/stream", json={"query": "hi"}).text)
+
+    assert frames == [("classification", {"query_type": "general"}),
+                      ("error", {"detail": "Internal server error"})]
+
+
+def test_websocket_answers_each_query_with_the_sse_events(client):
+    token = token_for(get_or_create_user("ws-student", "student"))
+
+    with client.websocket_connect(f"/api/v1/chat/ws?token={token}") as ws:
+        ws.send_json({"query": "   "})
+        assert ws.receive_json() == {"event": "error", "detail": "Empty query"}
+
+        for _ in range(2):  # the socket stays open across turns
+            ws.send_json({"query": "hi"})
+            events = [ws.receive_json() for _ in range(4)]
+            assert [e["event"] for e in events] == ["classification", "token", "token", "done"]
+            assert events[1] == {"event": "token", "text": "Hello"}
+
+
+def test_websocket_rejects_an_invalid_token(client):
+    from starlette.websockets import WebSocketDisconnect
+
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client.websocket_connect("/api/v1/chat/ws?token=not-a-jwt") as ws:
+            ws.receive_json()
+    assert closed.value.code == 1008
@@ -0,0 +1,41 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.chat.context_builder import encode_records, estimate_tokens
+from app.classify.rules import FILLER
+from app.models.schemas import QueryType
+from app.utilities.stopwords import STOPWORDS
+
+
+def mark(subject: str, marks: int, day: int):
+    return SimpleNamespace(subject=subject, semester="4th", total_marks=marks, grade=None,
+                           status="Pass", exam_date=datetime(2025, 1, day))
+
+
+def test_rule_filler_words_are_stopwords():
+    assert FILLER <= STOPWORDS
+
+
+def test_rows_matching_the_query_survive_the_budget():
+    records = [mark(f"Subject {i} Theory", 50 + i, i) for i in range(1, 20)] + [mark("Operating System", 70, 1)]
+    table = encode_records(QueryType.MARKS, records, verbose_text="x" * 4000)
+
+    text, dropped = table.render("what are my marks in operating system please", budget=40)
+
+    assert "Operating System" in text
+    assert dropped > 0 and f"+{dropped} less relevant rows omitted" in text
+    assert estimate_tokens(text) <= 40 + estimate_tokens(f"(+{dropped} less relevant rows omitted)")
+
+
+def test_stopwords_in_the_query_do_not_pick_rows():
+    # "the" and "in" appear in the older row only; the newest row must still rank first
+    records = [mark("Theory in the Computation", 60, 1), mark("Numerical Methods", 80, 20)]
+    text, dropped = encode_records(QueryType.MARKS, records, verbose_text="").render("show the marks in", budget=18)
+
+    assert dropped == 1
+    assert "Numerical Methods" in text and "Computation" not in text
+
+
+def test_empty_records_render_as_none():
+    text, dropped = encode_records(QueryType.FEES, [], verbose_text="").render("fees")
+    assert (text, dropped) == ("fees (Rs.): none", 0)
@@ -0,0 +1,78 @@
+from sqlmodel import Session
+
+from app.db.database import engine, create_all_db_tables
+from app.models.models import Attendance, Notice
+from app.models.schemas import QueryType
+from app.utilities import crud
+from app.utilities.context_cache import ContextCache, version_scope
+
+
+def test_invalidate_user_drops_only_that_users_entries():
+    cache = ContextCache()
+    cache.set(QueryType.MARKS, 1, "marks 1", cache.generation)
+    cache.set(QueryType.FEES, 1, "fees 1", cache.generation)
+    cache.set(QueryType.MARKS, 2, "marks 2", cache.generation)
+
+    cache.invalidate_user(1, QueryType.MARKS)
+
+    assert cache.get(QueryType.MARKS, 1) is None
+    assert cache.get(QueryType.FEES, 1) == "fees 1"
+    assert cache.get(QueryType.MARKS, 2) == "marks 2"
+
+
+def test_shared_types_ignore_the_user():
+    cache = ContextCache()
+    cache.set(QueryType.NOTICES, 1, "notices", cache.generation)
+    assert cache.get(QueryType.NOTICES, 2) == "notices"
+
+    cache.invalidate_type(QueryType.NOTICES)
+    assert cache.get(QueryType.NOTICES, 1) is None
+
+
+def test_load_started_before_a_write_is_not_stored():
+    cache = ContextCache()
+    generation = cache.generation
+    cache.invalidate_user(1, QueryType.ATTENDANCE)
+    cache.set(QueryType.ATTENDANCE, 1, "stale", generation)
+
+    assert cache.get(QueryType.ATTENDANCE, 1) is None
+    assert cache.stats()["stale_fills_skipped"] == 1
+
+
+def test_entries_expire_after_the_ttl():
+    cache = ContextCache(ttl=0)
+    cache.set(QueryType.MARKS, 1, "marks", cache.generation)
+    assert cache.get(QueryType.MARKS, 1) is None
+
+
+def test_write_through_another_worker_outdates_the_cached_context():
+    create_all_db_tables()
+    other_worker = ContextCache()
+    with Session(engine) as session:
+        attendance_scope = version_scope(QueryType.ATTENDANCE, 7)
+        version = crud.get_cache_version(session, attendance_scope)
+        other_worker.set(QueryType.ATTENDANCE, 7, "old attendance", other_worker.generation, version)
+        assert other_worker.get(QueryType.ATTENDANCE, 7, version) == "old attendance"
+
+        # Written through this process; the other worker's in-memory cache is never touched
+        crud.create_attendance(session, Attendance(user_id=7, total=20, attendee_status="present"))
+
+        new_version = crud.get_cache_version(session, attendance_scope)
+        assert new_version == version + 1
+        assert other_worker.get(QueryType.ATTENDANCE, 7, new_version) is None
+        assert other_worker.stats()["version_misses"] == 1
+        # Other users' and types' scopes are unaffected
+        assert crud.get_cache_version(session, version_scope(QueryType.ATTENDANCE, 8)) == 0
+
+
+def test_shared_type_writes_bump_one_scope_for_everyone():
+    create_all_db_tables()
+    with Session(engine) as session:
+        scope = version_scope(QueryType.NOTICES, 1)
+        assert scope == version_scope(QueryType.NOTICES, 2)
+        version = crud.get_cache_version(session, scope)
+
+        crud.create_notice_records(session, Notice(title="Exam", content="Exam on Sunday", created_by=1))
+        crud.create_notice_records(session, Notice(title="Holiday", content="Holiday on Monday", created_by=1))
+
+        assert crud.get_cache_version(session, scope) == version + 2
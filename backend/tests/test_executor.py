@@ -0,0 +1,18 @@
+import asyncio
+import time
+
+from app.config import settings
+from app.classify import executor
+from app.classify.executor import run_inference
+
+
+def test_run_inference_works_across_event_loops(monkeypatch):
+    monkeypatch.setattr(settings, "INFERENCE_MAX_PENDING", 1)
+
+    async def contended():
+        # Two calls for one slot, so the second has to wait on the semaphore
+        return await asyncio.gather(run_inference(time.sleep, 0.01), run_inference(lambda: "ok"))
+
+    assert asyncio.run(contended()) == [None, "ok"]
+    assert asyncio.run(contended()) == [None, "ok"]   # a fresh loop is not bound to the first one's semaphore
+    assert executor.inference_stats.pending == 0
@@ -0,0 +1,69 @@
+from langchain_core.documents import Document
+
+from app.chat.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def doc(text: str, source: str = "site") -> Document:
+    return Document(page_content=text, metadata={"source": source})
+
+
+CHUNKS = [
+    doc("The college offers BSc CSIT, BCA and BBA programs.", "programs"),
+    doc("BCA fees are Rs. 4,50,000 for eight semesters.", "bca"),
+    doc("Contact the admission office at 01-5970000.", "contact"),
+    doc("The library opens at 7 am and closes at 6 pm.", "library"),
+]
+
+
+def test_tokenize_joins_dotted_abbreviations():
+    assert tokenize("B.Sc. CSIT, call 01.5970000") == ["bsc", "csit", "call", "015970000"]
+
+
+def test_exact_tokens_rank_their_chunk_first():
+    index = BM25Index.from_documents(CHUNKS)
+
+    assert index.search("BCA fees", k=1)[0][0].metadata["source"] == "bca"
+    assert index.search("B.Sc CSIT", k=1)[0][0].metadata["source"] == "programs"
+    assert index.search("library hours", k=1)[0][0].metadata["source"] == "library"
+    assert index.search("hostel", k=3) == []
+
+
+def test_rare_terms_weigh_more_than_common_ones():
+    index = BM25Index.from_documents(CHUNKS)
+    ranked = [d.metadata["source"] for d, _ in index.search("the admission", k=4)]
+    assert ranked[0] == "contact"
+
+
+def test_saved_index_searches_the_same(tmp_path):
+    index = BM25Index.from_documents(CHUNKS)
+    path = str(tmp_path / "bm25.json")
+    index.save(path)
+    loaded = BM25Index.load(path)
+
+    assert loaded.stats() == index.stats()
+    assert [(d.page_content, round(s, 6)) for d, s in loaded.search("BCA fees")] == \
+           [(d.page_content, round(s, 6)) for d, s in index.search("BCA fees")]
+
+
+def test_rrf_rewards_documents_ranked_by_both_retrievers():
+    a, b, c, d = (doc(f"chunk {name}", name) for name in "abcd")
+    dense = [a, b, c]
+    lexical = [c, d, b]
+
+    fused = reciprocal_rank_fusion([dense, lexical], k=60, limit=3)
+
+    # b and c are in both lists; a (dense #1) beats d (lexical #2)
+    assert [x.metadata["source"] for x in fused] == ["c", "b", "a"]
+
+
+def test_rrf_deduplicates_by_source_and_content():
+    dense = [doc("same text", "x"), doc("other", "y")]
+    lexical = [doc("same text", "x")]
+    fused = reciprocal_rank_fusion([dense, lexical], limit=5)
+    assert [x.page_content for x in fused] == ["same text", "other"]
+
+
+def test_rrf_with_one_empty_list_keeps_the_other_order():
+    docs = [doc(f"chunk {i}", str(i)) for i in range(4)]
+    assert reciprocal_rank_fusion([[], docs], limit=3) == docs[:3]
+
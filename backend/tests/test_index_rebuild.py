@@ -0,0 +1,145 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from app.config import settings
+from app.chat import vectorstore as vectorstore_module
+from app.chat.local_index import LocalVectorIndex, current_generation_dir, CURRENT_FILE
+from app.chat.lexical_index import BM25Index
+from app.chat.vectorstore import CollegeVectorStore
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic bag-of-letters vectors, enough to tell documents apart"""
+
+    def _embed(self, text):
+        vector = np.zeros(26, dtype=np.float32)
+        for char in text.lower():
+            if "a" <= char <= "z":
+                vector[ord(char) - 97] += 1
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def build(directory, texts):
+    index = LocalVectorIndex.from_texts(texts, embedding=HashEmbeddings(), metadatas=[{"i": i} for i in range(len(texts))])
+    index.save(directory)
+    return index
+
+
+def test_rebuild_does_not_touch_a_mapped_generation(tmp_path):
+    directory = str(tmp_path / "index")
+    build(directory, ["bca fees", "bba fees", "hostel rules"])
+    old = LocalVectorIndex.load(directory, embedding=HashEmbeddings())
+    old_vectors = np.array(old.vectors)
+
+    build(directory, ["library hours", "exam routine"])
+    # The old memory map still reads the old build, whole
+    assert np.array_equal(np.array(old.vectors), old_vectors)
+    assert len(old.documents) == 3
+
+    new = LocalVectorIndex.load(directory, embedding=HashEmbeddings())
+    assert len(new) == 2 and len(new.documents) == 2
+    assert os.path.basename(current_generation_dir(directory)).startswith("gen-")
+
+
+def test_old_generations_are_pruned(tmp_path):
+    directory = str(tmp_path / "index")
+    for i in range(4):
+        build(directory, [f"document {i}", "another"])
+    generations = [name for name in os.listdir(directory) if name.startswith("gen-")]
+    assert len(generations) == 2
+    assert not [name for name in os.listdir(directory) if name.startswith(".")]
+    assert os.path.exists(os.path.join(directory, CURRENT_FILE))
+
+
+def test_bm25_save_replaces_whole_file(tmp_path):
+    path = str(tmp_path / "bm25.json")
+    BM25Index.from_documents([Document(page_content="BSc CSIT admission")]).save(path)
+    BM25Index.from_documents([Document(page_content="BCA fees"), Document(page_content="BBA fees")]).save(path)
+    assert len(BM25Index.load(path)) == 2
+    assert os.listdir(tmp_path) == ["bm25.json"]
+
+
+def new_store() -> CollegeVectorStore:
+    """A fresh, unloaded store (bypassing the process singleton)"""
+    store = object.__new__(CollegeVectorStore)
+    store.__dict__.update(embeddings=None, vectorstore=None, lexical=None, index_name="test", stats={},
+                          index_version=None, reloads=0, _last_version_check=0.0)
+    return store
+
+
+def use_local_index(tmp_path, monkeypatch, embeddings=HashEmbeddings):
+    """Point the store at a local index under tmp_path; returns a rebuild(texts) function"""
+    directory = str(tmp_path / "index")
+    lexical_path = str(tmp_path / "index" / "bm25.json")
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "local")
+    monkeypatch.setattr(settings, "LOCAL_INDEX_DIR", directory)
+    monkeypatch.setattr(settings, "LEXICAL_INDEX_PATH", lexical_path)
+    monkeypatch.setattr(settings, "HYBRID_RETRIEVAL", True)
+    monkeypatch.setattr(vectorstore_module, "INDEX_VERSION_FILE", str(tmp_path / "college_index.version"))
+    monkeypatch.setattr(vectorstore_module, "INDEX_VERSION_CHECK_INTERVAL", 0)
+    monkeypatch.setattr(vectorstore_module, "load_embeddings", embeddings)
+
+    def rebuild(texts):
+        build(directory, texts)
+        BM25Index.from_documents([Document(page_content=text) for text in texts]).save(lexical_path)
+        vectorstore_module.mark_index_rebuilt()
+    return rebuild
+
+
+def test_concurrent_loads_open_the_store_once(tmp_path, monkeypatch):
+    loads = []
+
+    def slow_embeddings():
+        loads.append(1)
+        time.sleep(0.05)
+        return HashEmbeddings()
+
+    rebuild = use_local_index(tmp_path, monkeypatch, slow_embeddings)
+    rebuild(["bca fees", "bba fees"])
+    store = new_store()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: store.load(warmup=False), range(8)))
+
+    assert len(loads) == 1
+    assert all(result is store for result in results)
+    assert len(store.vectorstore) == 2
+
+
+def test_concurrent_reloads_reopen_the_indexes_once(tmp_path, monkeypatch):
+    rebuild = use_local_index(tmp_path, monkeypatch)
+    rebuild(["bca fees", "bba fees"])
+    store = new_store().load(warmup=False)
+
+    rebuild(["library hours", "exam routine", "hostel rules"])
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: store.reload_indexes(), range(8)))
+
+    assert store.reloads == 1
+    assert len(store.vectorstore) == 3 and len(store.lexical) == 3
+
+
+def test_store_reloads_both_indexes_on_version_change(tmp_path, monkeypatch):
+    rebuild = use_local_index(tmp_path, monkeypatch)
+
+    rebuild(["bca fees", "bba fees"])
+    store = new_store()
+    store.load(warmup=False)
+    assert len(store.vectorstore) == 2 and len(store.lexical) == 2
+    assert not store.index_changed()
+
+    rebuild(["library hours", "exam routine", "hostel rules"])
+    assert store.index_changed()
+    store.reload_indexes()
+    assert len(store.vectorstore) == 3 and len(store.lexical) == 3
+    assert store.stats["index_reloads"] == 1
@@ -0,0 +1,17 @@
+from collections import deque
+
+from app.utilities.latency import latency_percentile, latency_summary
+
+
+def test_latency_summary_reports_milliseconds():
+    samples = deque([0.001 * i for i in range(1, 101)], maxlen=100)
+
+    summary = latency_summary(samples)
+    assert list(summary) == ["p50_ms", "p95_ms", "p99_ms"]
+    assert summary["p50_ms"] == 50.5
+    assert latency_summary(samples, (50, 99), mean=True) == {"avg_ms": 50.5, "p50_ms": 50.5, "p99_ms": 99.01}
+    assert round(latency_percentile(samples, 50), 4) == 0.0505
+
+
+def test_empty_window_has_no_percentiles():
+    assert latency_summary(deque()) == {}
@@ -0,0 +1,22 @@
+from app.chat.llm_registry import LLMRegistry, GEMINI_TRANSPORT
+
+
+def test_groq_gets_the_shared_httpx_pool(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    registry = LLMRegistry()
+    client = registry.client("groq")
+
+    assert client is registry.client("groq")
+    assert client.http_async_client is registry.http_clients["groq"]
+    assert "open" in registry.pool_stats()["groq"]["pool"]
+
+
+def test_gemini_reports_its_grpc_channel_instead_of_a_pool(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    registry = LLMRegistry()
+    registry.client("gemini")
+
+    assert "gemini" not in registry.http_clients
+    pool = registry.pool_stats()["gemini"]["pool"]
+    assert pool["transport"] == GEMINI_TRANSPORT
+    assert "do not apply" in pool["note"]
@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.chat import llm_router
+from app.chat.llm_router import LLMRouter
+from app.utilities.resilience import Dependency
+
+
+class Message:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class FakeChain:
+    """A provider's chain: answers `text` after `delay` seconds, or raises `error`"""
+
+    def __init__(self, text: str, delay: float = 0.0, error: Exception | None = None, stall_after: int | None = None):
+        self.text = text
+        self.delay = delay
+        self.error = error
+        self.stall_after = stall_after
+        self.calls = 0
+
+    async def ainvoke(self, inputs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return Message(self.text)
+
+    async def astream(self, inputs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        for i, word in enumerate(self.text.split()):
+            if self.stall_after is not None and i == self.stall_after:
+                if self.error:
+                    raise self.error
+                await asyncio.sleep(3600)
+            yield Message(word + " ")
+
+
+class FakeRegistry:
+    def __init__(self, chains: dict):
+        self.chains = chains
+
+    def chain(self, name, provider):
+        return self.chains[provider]
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    """Install fake chains per provider; returns (router, dependencies)"""
+    monkeypatch.setattr(settings, "LLM_FAILOVER", True)
+    monkeypatch.setattr(settings, "LLM_HEDGING", True)
+    monkeypatch.setattr(settings, "LLM_HEDGE_DEFAULT_DELAY", 0.05)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_DELAY", 0.05)
+    dependencies = {name: Dependency(name, 0.5, 5.0, retries=0) for name in ("gemini", "groq")}
+    monkeypatch.setattr(llm_router, "get_dependency", dependencies.__getitem__)
+
+    def install(**chains):
+        monkeypatch.setattr(llm_router, "get_llm_registry", lambda: FakeRegistry(chains))
+        return LLMRouter(), dependencies
+    return install
+
+
+def test_failed_primary_fails_over_to_the_alternate(providers):
+    router, dependencies = providers(gemini=FakeChain("", error=RuntimeError("503")), groq=FakeChain("from groq"))
+
+    result = asyncio.run(router.ainvoke("conversational", {}))
+
+    assert result.content == "from groq"
+    assert router.health["gemini"].failovers == 1
+    assert router.health["gemini"].errors == 1
+    assert dependencies["gemini"].failures == 1
+
+
+def test_slow_primary_is_hedged_and_the_faster_answer_wins(providers):
+    gemini = FakeChain("from gemini", delay=1.0)
+    router, _ = providers(gemini=gemini, groq=FakeChain("from groq", delay=0.0))
+
+    result = asyncio.run(router.ainvoke("conversational", {}))
+
+    assert result.content == "from groq"
+    assert router.health["gemini"].hedges == 1
+    assert router.health["groq"].hedge_wins == 1
+    assert router.health["gemini"].cancelled == 1
+
+
+def test_stream_commits_to_the_first_provider_to_yield(providers):
+    router, _ = providers(gemini=FakeChain("slow answer", delay=1.0), groq=FakeChain("fast answer"))
+
+    async def collect():
+        return "".join([text async for text in router.astream("conversational", {})])
+
+    assert asyncio.run(collect()).strip() == "fast answer"
+
+
+def test_mid_stream_error_is_a_provider_failure(providers):
+    router, dependencies = providers(
+        gemini=FakeChain("one two three", error=ConnectionError("reset"), stall_after=1),
+        groq=FakeChain("unused"),
+    )
+    received = []
+
+    async def collect():
+        async for text in router.astream("conversational", {}):
+            received.append(text)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(collect())
+    assert received == ["one "]
+    assert router.health["gemini"].stream_failures == 1
+    assert dependencies["gemini"].failures == 1
+    assert dependencies["gemini"].breaker.consecutive_failures == 1
+
+
+def test_stalled_stream_is_cut_off_after_the_idle_timeout(providers, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_STREAM_IDLE_TIMEOUT", 0.05)
+    router, dependencies = providers(gemini=FakeChain("one two three", stall_after=2), groq=FakeChain("unused"))
+    received = []
+
+    async def collect():
+        async for text in router.astream("conversational", {}):
+            received.append(text)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(asyncio.wait_for(collect(), timeout=5))
+    assert received == ["one ", "two "]
+    assert dependencies["gemini"].timeouts == 1
+    assert router.health["gemini"].stream_failures == 1
+
+
+def test_callers_end_a_broken_stream_with_the_degraded_tail(providers):
+    from app.chat.chatbot import STREAM_INTERRUPTED, stream_with_fallback
+
+    router, _ = providers(gemini=FakeChain("one two", error=ConnectionError("reset"), stall_after=1), groq=FakeChain("unused"))
+
+    async def fallback():
+        return "records"
+
+    async def collect():
+        return [text async for text in stream_with_fallback(router.astream("conversational", {}), fallback)]
+
+    assert asyncio.run(collect()) == ["one ", STREAM_INTERRUPTED]
@@ -0,0 +1,52 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.auth.OAuth import get_current_user
+from app.classify import classify_query
+from app.classify.model_manager import ModelManager, SidecarModelManager
+from app.classify.sidecar import error_response
+from app.models.models import User
+from app.routers import models as models_router
+
+
+class FakeSidecarClient:
+    """Answers model-management requests the way SidecarServer does"""
+
+    def __init__(self, manager: ModelManager):
+        self.manager = manager
+
+    def call(self, request: dict) -> dict:
+        try:
+            if request["op"] == "activate":
+                if request["version"] not in self.manager.list_versions():
+                    raise ValueError(f"Unknown model version '{request['version']}'")
+            raise RuntimeError("No previous model version to roll back to")
+        except Exception as e:
+            return error_response(e)
+
+
+@pytest.fixture(params=["local", "sidecar"])
+def client(request, monkeypatch):
+    local = ModelManager()
+    monkeypatch.setattr(local, "list_versions", lambda: ["v1"])
+    manager = local
+    if request.param == "sidecar":
+        monkeypatch.setattr(classify_query, "get_classifier", lambda: FakeSidecarClient(local))
+        manager = SidecarModelManager()
+    monkeypatch.setattr(models_router, "get_model_manager", lambda: manager)
+
+    app = FastAPI()
+    app.include_router(models_router.router)
+    app.dependency_overrides[get_current_user] = lambda: User(username="admin", role="admin")
+    return TestClient(app)
+
+
+def test_unknown_version_is_404_with_either_manager(client):
+    response = client.post("/api/v1/models/v9/activate")
+    assert response.status_code == 404
+    assert "v9" in response.json()["detail"]
+
+
+def test_rollback_without_a_previous_version_is_409(client):
+    assert client.post("/api/v1/models/rollback").status_code == 409
@@ -0,0 +1,54 @@
+import os
+import csv
+
+import pytest
+
+from app.classify.onnx_backend import FP32_FILE, INT8_FILE, OnnxQueryClassifier, export_onnx, parity_check
+
+
+@pytest.fixture(scope="module")
+def queries(labelled_queries):
+    return [row["Queries"] for row in labelled_queries[:40]]
+
+
+def test_fp32_export_matches_pytorch(tiny_model_dir, tiny_classifier, queries, tmp_path):
+    export_onnx(tiny_model_dir, str(tmp_path), quantize=False)
+    candidate = OnnxQueryClassifier(str(tmp_path))
+
+    for text in queries[:10]:
+        expected, actual = tiny_classifier.predict(text), candidate.predict(text)
+        assert actual["query_type"] == expected["query_type"]
+        assert actual["confidence"] == pytest.approx(expected["confidence"], abs=1e-3)
+    assert [r["query_type"] for r in candidate.predict_batch(queries)] == \
+           [r["query_type"] for r in tiny_classifier.predict_batch(queries)]
+
+
+def test_int8_export_is_preferred_and_passes_the_parity_check(tiny_model_dir, tiny_classifier, labelled_queries, tmp_path):
+    path = export_onnx(tiny_model_dir, str(tmp_path))
+    assert path.endswith(INT8_FILE) and os.path.exists(tmp_path / FP32_FILE)
+    assert os.path.getsize(path) < os.path.getsize(tmp_path / FP32_FILE)
+
+    csv_path = tmp_path / "sample.csv"
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["Queries", "labels"])
+        writer.writeheader()
+        writer.writerows(labelled_queries[:40])
+    report = parity_check(tiny_classifier, OnnxQueryClassifier(str(tmp_path)), str(csv_path))
+
+    assert report["samples"] == 40
+    assert report["agreement"] >= 0.9
+    assert {"reference_accuracy", "candidate_accuracy", "candidate_ms_per_query"} <= set(report)
+
+
+def test_falls_back_to_the_fp32_graph_without_an_int8_file(tiny_model_dir, queries, tmp_path):
+    export_onnx(tiny_model_dir, str(tmp_path), quantize=False)
+    assert not os.path.exists(tmp_path / INT8_FILE)
+
+    clf = OnnxQueryClassifier(str(tmp_path))
+
+    assert clf.predict(queries[0])["query_type"] in clf.id2label.values()
+
+
+def test_missing_model_directory_fails_loudly(tmp_path):
+    with pytest.raises(Exception):
+        OnnxQueryClassifier(str(tmp_path / "missing"))
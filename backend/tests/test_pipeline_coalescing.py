@@ -0,0 +1,49 @@
+import asyncio
+
+from app.config import settings
+from app.chat import pipeline
+from app.models.schemas import QueryType
+from app.utilities.context_cache import get_context_cache
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class RequestSession:
+    """A caller's session: only used to read the context cache version"""
+
+    async def run_sync(self, func, *args):
+        return 0
+
+
+def test_coalesced_context_load_uses_its_own_session(monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_COALESCING", True)
+    monkeypatch.setattr(settings, "COMPACT_PROMPT_CONTEXT", False)
+    monkeypatch.setattr(pipeline, "AsyncSession", lambda engine: FakeSession())
+    get_context_cache().invalidate_type(QueryType.NOTICES)
+    seen_sessions = []
+
+    async def load_records(session, query_type, user_id):
+        seen_sessions.append(session)
+        await asyncio.sleep(0.02)
+        return []
+
+    monkeypatch.setattr(pipeline, "load_structured_records", load_records)
+    request_sessions = [RequestSession() for _ in range(5)]
+
+    async def main():
+        return await asyncio.gather(*[
+            pipeline.load_structured_context(session, QueryType.NOTICES, i, "latest notices")
+            for i, session in enumerate(request_sessions)
+        ])
+
+    contexts = asyncio.run(main())
+    assert len(set(contexts)) == 1
+    assert len(seen_sessions) == 1
+    assert isinstance(seen_sessions[0], FakeSession)
+    assert not set(seen_sessions) & set(request_sessions)
@@ -0,0 +1,91 @@
+import json
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import warmup
+from app.main import app, readiness_check
+
+
+@pytest.fixture(autouse=True)
+def fresh_readiness():
+    saved = dict(warmup.readiness)
+    warmup.readiness.update({"ready": False, "warming": False, "steps": {}})
+    yield
+    warmup.readiness.clear()
+    warmup.readiness.update(saved)
+
+
+def ready_status() -> tuple:
+    response = readiness_check()
+    return response.status_code, json.loads(response.body)["status"]
+
+
+def test_not_ready_before_warmup_but_alive():
+    client = TestClient(app)  # no lifespan: warmup never ran
+    assert client.get("/health/live").status_code == 200
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "not_ready"
+
+
+def test_ready_only_after_every_step_has_run(monkeypatch):
+    release = None
+    seen = []
+
+    async def slow_step():
+        seen.append(ready_status())
+        await release.wait()
+
+    def blocking_step():
+        seen.append(ready_status())
+
+    monkeypatch.setattr(warmup, "WARMUP_STEPS", (
+        ("classifier", blocking_step, True),
+        ("llm_connections", slow_step, False),
+    ))
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        task = asyncio.create_task(warmup.run_warmup())
+        await asyncio.sleep(0.05)
+        during = ready_status()
+        release.set()
+        await task
+        return during
+
+    during = asyncio.run(main())
+
+    assert seen == [(503, "warming"), (503, "warming")]
+    assert during == (503, "warming")
+    assert ready_status() == (200, "ready")
+    assert set(warmup.readiness["steps"]) == {"classifier", "llm_connections"}
+    assert "warmup_ms" in warmup.startup_profile
+
+
+def test_failed_optional_step_is_reported_but_not_gating(monkeypatch):
+    def broken():
+        raise ConnectionError("groq unreachable")
+
+    monkeypatch.setattr(warmup, "WARMUP_STEPS", (
+        ("classifier", lambda: None, True),
+        ("llm_clients", broken, False),
+    ))
+    asyncio.run(warmup.run_warmup())
+
+    status, body = TestClient(app).get("/health/ready").status_code, warmup.readiness
+    assert status == 200
+    assert body["steps"]["llm_clients"]["ok"] is False
+    assert "groq unreachable" in body["steps"]["llm_clients"]["error"]
+
+
+def test_failed_required_step_keeps_the_worker_out_of_rotation(monkeypatch):
+    def broken():
+        raise RuntimeError("MODEL_DIR not set")
+
+    monkeypatch.setattr(warmup, "WARMUP_STEPS", (("classifier", broken, True),))
+    asyncio.run(warmup.run_warmup())
+
+    assert ready_status() == (503, "not_ready")
@@ -0,0 +1,155 @@
+import asyncio
+import time
+
+import pytest
+
+from app.config import settings
+from app.utilities.resilience import CircuitBreaker, Dependency, DependencyUnavailable
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.failure()
+    breaker.success()    # a success resets the count
+    assert not breaker.failure() and not breaker.failure()
+    assert breaker.allow()
+
+    assert breaker.failure()
+    assert breaker.state == "open" and breaker.times_opened == 1
+    assert not breaker.allow()
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.failure()
+    time.sleep(0.02)
+
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()    # only one probe at a time
+
+
+def test_probe_outcome_closes_or_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.failure()
+    time.sleep(0.02)
+    breaker.allow()
+    breaker.success()
+    assert breaker.state == "closed" and breaker.allow()
+
+    assert breaker.failure()
+    time.sleep(0.02)
+    breaker.allow()
+    assert breaker.failure()    # the probe failed: open again
+    assert breaker.state == "open" and breaker.times_opened == 3
+
+
+@pytest.fixture
+def fast_settings(monkeypatch):
+    monkeypatch.setattr(settings, "RESILIENCE_BREAKER_FAILURES", 2)
+    monkeypatch.setattr(settings, "RESILIENCE_BREAKER_RESET", 30)
+    monkeypatch.setattr(settings, "RESILIENCE_RETRY_BASE_DELAY", 0.001)
+
+
+def test_call_retries_then_succeeds(fast_settings):
+    dependency = Dependency("test", min_timeout=0.1, max_timeout=1.0, retries=2)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 2:
+            raise ConnectionError("reset")
+        return "ok"
+
+    assert asyncio.run(dependency.call(flaky)) == "ok"
+    assert len(attempts) == 2
+    assert dependency.retried == 1 and dependency.breaker.state == "closed"
+
+
+def test_open_breaker_fails_fast_without_calling(fast_settings):
+    dependency = Dependency("test", min_timeout=0.1, max_timeout=1.0, retries=0)
+    calls = []
+
+    async def down():
+        calls.append(1)
+        raise ConnectionError("refused")
+
+    async def main():
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await dependency.call(down)
+        with pytest.raises(DependencyUnavailable):
+            await dependency.call(down)
+
+    asyncio.run(main())
+    assert len(calls) == 2
+    assert dependency.rejected == 1 and dependency.breaker.state == "open"
+
+
+def test_slow_call_times_out_at_the_deadline(fast_settings):
+    dependency = Dependency("test", min_timeout=0.01, max_timeout=0.05, retries=0)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(dependency.call(slow))
+    assert dependency.timeouts == 1
+
+
+def test_deadline_adapts_to_observed_latency(fast_settings, monkeypatch):
+    monkeypatch.setattr(settings, "RESILIENCE_MIN_SAMPLES", 5)
+    monkeypatch.setattr(settings, "RESILIENCE_TIMEOUT_MULTIPLIER", 2.0)
+    dependency = Dependency("test", min_timeout=0.1, max_timeout=10.0, retries=0)
+    assert dependency.timeout() == 10.0    # too few samples
+
+    for _ in range(10):
+        dependency.record(0.2, ok=True)
+    assert dependency.timeout() == pytest.approx(0.4)
+
+    for _ in range(10):
+        dependency.record(0.01, ok=True)
+    assert dependency.timeout() >= 0.1     # clamped to min_timeout
+
+
+def test_cancelled_call_frees_the_probe_slot(fast_settings):
+    dependency = Dependency("test", min_timeout=0.1, max_timeout=1.0, retries=0)
+    dependency.breaker.state, dependency.breaker.opened_at = "open", time.monotonic() - 60
+
+    async def main():
+        task = asyncio.create_task(dependency.call(asyncio.sleep, 1))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(main())
+    assert dependency.breaker.state == "half_open"
+    assert dependency.breaker.allow()      # a lost hedge race does not keep the probe slot
+
+
+def test_dense_search_failure_falls_back_to_bm25(monkeypatch):
+    from types import SimpleNamespace
+    from langchain_core.documents import Document
+    from app.chat import chatbot
+    from app.chat.lexical_index import BM25Index
+
+    lexical = BM25Index.from_documents([
+        Document(page_content="BCA fees are Rs. 4,50,000 for eight semesters.", metadata={"source": "bca"}),
+        Document(page_content="The library opens at 7 am.", metadata={"source": "library"}),
+    ])
+
+    async def loaded_vectorstore():
+        return object()
+
+    async def failing_search(vectorstore, query_vector, k):
+        raise DependencyUnavailable("pinecone", retry_in=30)
+
+    monkeypatch.setattr(chatbot, "get_loaded_vectorstore", loaded_vectorstore)
+    monkeypatch.setattr(chatbot, "dense_search", failing_search)
+    monkeypatch.setattr(chatbot, "get_college_vectorstore", lambda: SimpleNamespace(lexical=lexical))
+    monkeypatch.setattr(settings, "HYBRID_K", 1)
+
+    context, doc_info = asyncio.run(chatbot.retrieve_college_context("BCA fees", query_vector=[0.0]))
+
+    assert [d["metadata"]["source"] for d in doc_info] == ["bca"]
+    assert "Rs. 4,50,000" in context
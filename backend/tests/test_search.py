@@ -0,0 +1,48 @@
+import asyncio
+
+from app.chat.search import WebSearch, NO_RESULTS, format_results
+from app.utilities.resilience import get_dependency
+
+
+def fresh_search(monkeypatch, fetch):
+    search = WebSearch()
+    monkeypatch.setattr(search, "_fetch_web", fetch)
+    dependency = get_dependency("duckduckgo")
+    monkeypatch.setattr(dependency, "breaker", type(dependency.breaker)(2, 30))
+    return search, dependency
+
+
+def test_format_results():
+    hits = [{"title": "MBMC", "body": "Admissions open", "href": "https://x"}]
+    assert format_results(hits) == "MBMC: Admissions open"
+    assert format_results([]) == ""
+
+
+def test_no_results_is_not_a_dependency_failure(monkeypatch):
+    search, dependency = fresh_search(monkeypatch, lambda query: [])
+    for i in range(5):
+        assert asyncio.run(search.search(f"obscure query {i}")) == NO_RESULTS
+    assert dependency.breaker.state == "closed"
+    assert search.stats.web_empty == 5
+    assert search.stats.web_errors == 0
+
+
+def test_transport_errors_open_the_breaker(monkeypatch):
+    def fail(query):
+        raise ConnectionError("reset by peer")
+    search, dependency = fresh_search(monkeypatch, fail)
+    for i in range(3):
+        assert asyncio.run(search.search(f"query {i}")) == NO_RESULTS
+    assert dependency.breaker.state == "open"
+
+
+def test_results_are_cached(monkeypatch):
+    calls = []
+    def fetch(query):
+        calls.append(query)
+        return [{"title": "Fees", "body": "Rs. 50,000 per semester"}]
+    search, _ = fresh_search(monkeypatch, fetch)
+    first = asyncio.run(search.search("What are the fees?"))
+    second = asyncio.run(search.search("what are the fees"))
+    assert first == second == "Fees: Rs. 50,000 per semester"
+    assert len(calls) == 1
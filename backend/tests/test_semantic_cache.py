@@ -0,0 +1,89 @@
+import time
+
+import numpy as np
+
+from app.chat.semantic_cache import SemanticCache, key_terms
+
+# Unit vectors: the fee questions sit close together, the hostel one far away
+FEES = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+FEES_PARAPHRASE = np.array([0.99, 0.14, 0.0], dtype=np.float32) / np.linalg.norm([0.99, 0.14, 0.0])
+HOSTEL = np.array([0.0, 0.0, 1.0], dtype=np.float32)
+
+
+def answer(text: str) -> dict:
+    return {"answer": text, "source_documents": []}
+
+
+def new_cache(**kwargs) -> SemanticCache:
+    options = {"threshold": 0.9, "maxsize": 4, "ttl": 60, **kwargs}
+    return SemanticCache(**options)
+
+
+def test_key_terms_are_numbers_and_acronyms():
+    assert key_terms("What are the BCA fees for the 2080 batch?") == {"bca", "2080"}
+    assert key_terms("Is B.Sc CSIT offered?") == {"bsc", "csit"}
+    assert key_terms("What are the hostel rules?") == set()
+
+
+def test_paraphrase_is_a_hit_and_unrelated_question_a_miss():
+    cache = new_cache()
+    cache.store("How much are the BCA fees?", FEES, answer("BCA fees"))
+
+    hit = cache.lookup("What does BCA cost in fees", FEES_PARAPHRASE)
+    assert hit["answer"] == "BCA fees" and 0.9 <= hit["similarity"] < 1.0
+    assert cache.lookup("How much are the BCA fees", HOSTEL)["similarity"] == 1.0  # exact key
+    assert cache.lookup("Hostel rules?", HOSTEL) is None
+
+
+def test_similar_question_about_another_program_is_a_miss():
+    cache = new_cache()
+    cache.store("How much are the BCA fees?", FEES, answer("BCA fees"))
+
+    assert cache.lookup("How much are the BBA fees?", FEES_PARAPHRASE) is None
+    # Known acronyms are matched in lowercase questions too
+    assert cache.lookup("how much are the bba fees", FEES_PARAPHRASE) is None
+    assert cache.stats()["key_term_mismatches"] == 2
+
+
+def test_different_numbers_are_a_miss():
+    cache = new_cache()
+    cache.store("Fees for the 2080 batch", FEES, answer("2080"))
+
+    assert cache.lookup("Fees for the 2081 batch", FEES_PARAPHRASE) is None
+    assert cache.lookup("Fees for the batch", FEES_PARAPHRASE) is None
+    assert cache.lookup("What are fees for the 2080 batch", FEES_PARAPHRASE)["answer"] == "2080"
+
+
+def test_full_cache_reuses_the_least_recently_used_row():
+    cache = new_cache(maxsize=2)
+    cache.store("first", FEES, answer("first"))
+    vectors_before = cache.vectors
+    cache.store("second", HOSTEL, answer("second"))
+    cache.lookup("first", FEES)  # first is now the most recently used
+    cache.store("third", FEES_PARAPHRASE, answer("third"))
+
+    assert cache.vectors is vectors_before and cache.vectors.shape == (2, 3)
+    assert cache.lookup("second", HOSTEL) is None
+    assert cache.lookup("first", FEES)["answer"] == "first"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_rows_are_skipped_and_reclaimed():
+    cache = new_cache(maxsize=2, ttl=0.01)
+    cache.store("first", FEES, answer("first"))
+    cache.store("second", HOSTEL, answer("second"))
+    time.sleep(0.02)
+
+    assert cache.lookup("a paraphrase of first", FEES_PARAPHRASE) is None
+    cache.store("third", HOSTEL, answer("third"))
+    assert cache.stats()["evictions"] == 0
+    assert cache.stats()["expirations"] == 2
+    assert len(cache) == 1
+
+
+def test_invalidate_drops_everything():
+    cache = new_cache()
+    cache.store("first", FEES, answer("first"))
+    cache.invalidate("test")
+    assert len(cache) == 0
+    assert cache.lookup("first", FEES) is None
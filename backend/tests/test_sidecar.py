@@ -0,0 +1,145 @@
+import os
+import json
+import shutil
+import socket
+import asyncio
+import tempfile
+import threading
+
+import pytest
+
+from app.config import settings
+from app.classify import classify_query
+from app.classify.sidecar import SidecarClassifier, SidecarServer, _HEADER, _encode, _recv_exact
+
+
+class FakeClassifier:
+    """In-process model as the sidecar sees it"""
+
+    id2label = {0: "Fees", 1: "General"}
+    device = "cpu"
+    version = "default"
+    padding = None
+
+    def predict(self, text, return_all_probs=False):
+        result = {"query_type": "Fees" if "fee" in text else "General", "confidence": 0.9}
+        if return_all_probs:
+            result["all_probabilities"] = {"Fees": 0.9, "General": 0.1}
+        return result
+
+    def predict_batch(self, texts):
+        return [self.predict(text) for text in texts]
+
+
+class RunningSidecar:
+    """SidecarServer.handle on a Unix socket, served from its own thread and event loop"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.server = SidecarServer(path)
+        self.loop = asyncio.new_event_loop()
+        self.writers = []
+
+        async def handle(reader, writer):
+            self.writers.append(writer)
+            await self.server.handle(reader, writer)
+
+        async def serve():
+            self.listener = await asyncio.start_unix_server(handle, path=path)
+
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(serve(), self.loop).result(5)
+
+    def stop(self):
+        """Like the process exiting: open connections are closed too"""
+        async def close():
+            for writer in self.writers:
+                writer.close()
+            self.listener.close()
+            await self.listener.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(close(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+
+
+@pytest.fixture
+def socket_path(monkeypatch):
+    monkeypatch.setattr(classify_query, "classifier", FakeClassifier())
+    monkeypatch.setattr(settings, "CLASSIFIER_BATCHING", False)
+    monkeypatch.setattr(settings, "CLASSIFIER_SIDECAR_CONNECT_TIMEOUT", 2)
+    # AF_UNIX paths are limited to ~100 bytes, so not under pytest's tmp_path
+    directory = tempfile.mkdtemp(prefix="sidecar-")
+    yield os.path.join(directory, "classifier.sock")
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@pytest.fixture
+def sidecar(socket_path):
+    running = RunningSidecar(socket_path)
+    yield running
+    running.stop()
+
+
+def test_frames_are_length_prefixed_json():
+    frame = _encode({"op": "info", "text": "fée"})
+    (size,) = _HEADER.unpack(frame[:_HEADER.size])
+    assert size == len(frame) - _HEADER.size
+    assert json.loads(frame[_HEADER.size:]) == {"op": "info", "text": "fée"}
+
+
+def test_recv_exact_reassembles_partial_reads():
+    left, right = socket.socketpair()
+    try:
+        frame = _encode({"results": ["x" * 5000]})
+        for i in range(0, len(frame), 1000):
+            left.sendall(frame[i:i + 1000])
+        (size,) = _HEADER.unpack(_recv_exact(right, _HEADER.size))
+        assert json.loads(_recv_exact(right, size)) == {"results": ["x" * 5000]}
+
+        left.close()
+        with pytest.raises(ConnectionError):
+            _recv_exact(right, 1)
+    finally:
+        right.close()
+
+
+def test_client_round_trips_through_the_sidecar(sidecar):
+    client = SidecarClassifier(sidecar.path)
+
+    assert client.id2label == {0: "Fees", 1: "General"}
+    assert client.predict("what is my fee")["query_type"] == "Fees"
+    assert "all_probabilities" in client.predict("hello", return_all_probs=True)
+    assert [r["query_type"] for r in client.predict_batch(["fee due", "hello", "fees"])] == ["Fees", "General", "Fees"]
+    assert sidecar.server.requests == 4  # info + 3 predictions
+
+
+def test_unknown_op_is_answered_with_an_error(sidecar):
+    client = SidecarClassifier(sidecar.path)
+    response = client.call({"op": "reboot"})
+    assert "Unknown sidecar op" in response["error"]
+    # The connection is still usable afterwards
+    assert client.predict("fee")["query_type"] == "Fees"
+
+
+def test_client_reconnects_after_the_sidecar_restarts(socket_path):
+    first = RunningSidecar(socket_path)
+    client = SidecarClassifier(socket_path)
+    first.stop()
+    os.unlink(socket_path)
+
+    second = RunningSidecar(socket_path)
+    try:
+        # The old per-thread connection is dead; one retry on a fresh connection succeeds
+        assert client.predict("fee")["query_type"] == "Fees"
+        assert second.server.requests == 1
+    finally:
+        second.stop()
+
+
+def test_client_gives_up_when_no_sidecar_answers(socket_path, monkeypatch):
+    monkeypatch.setattr(settings, "CLASSIFIER_SIDECAR_CONNECT_TIMEOUT", 0)
+    with pytest.raises(OSError):
+        SidecarClassifier(socket_path)
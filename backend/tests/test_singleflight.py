@@ -0,0 +1,177 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.models.schemas import QueryType
+from app.utilities.singleflight import SingleFlight, coalesce_key
+
+
+@pytest.fixture(autouse=True)
+def coalescing_on(monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_COALESCING", True)
+
+
+def test_key_uses_normalized_query_and_context():
+    key = coalesce_key(QueryType.NOTICES, "What are the latest notices?", "ctx")
+    assert key == coalesce_key(QueryType.NOTICES, "what are the latest notices", "ctx")
+    assert key != coalesce_key(QueryType.NOTICES, "what are the latest notices", "other ctx")
+    assert key != coalesce_key(QueryType.GENERAL, "what are the latest notices", "ctx")
+
+
+def test_concurrent_duplicates_run_once():
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def main():
+        return await asyncio.gather(*[flights.run("notices", ("k",), work) for _ in range(10)])
+
+    assert asyncio.run(main()) == ["answer"] * 10
+    assert len(calls) == 1
+    stats = flights.stats.stats()["by_kind"]["notices"]
+    assert stats == {"requests": 10, "executed": 1, "coalesced": 9, "ratio": 0.9, "max_waiters": 10}
+
+
+def test_sequential_calls_are_not_coalesced():
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        return len(calls)
+
+    async def main():
+        return [await flights.run("x", ("k",), work) for _ in range(3)]
+
+    assert asyncio.run(main()) == [1, 2, 3]
+
+
+def test_errors_reach_every_waiter():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("llm down")
+
+    async def main():
+        return await asyncio.gather(*[flights.run("x", ("k",), work) for _ in range(3)], return_exceptions=True)
+
+    assert [str(result) for result in asyncio.run(main())] == ["llm down"] * 3
+
+
+def test_leader_leaving_does_not_cancel_the_others():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def main():
+        leader = asyncio.create_task(flights.run("x", ("k",), work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.run("x", ("k",), work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == "answer"
+
+
+def test_work_is_cancelled_when_the_last_waiter_leaves():
+    flights = SingleFlight()
+    cancelled = []
+
+    async def work():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return "late"
+
+    async def quick():
+        return "fresh"
+
+    async def main():
+        waiters = [asyncio.create_task(flights.run("x", ("k",), work)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+        # The abandoned call is gone: the next caller starts its own work
+        return await flights.run("x", ("k",), quick)
+
+    assert asyncio.run(main()) == "fresh"
+    assert cancelled == [True]
+
+
+def test_streams_fan_out_to_late_joiners():
+    flights = SingleFlight()
+    produced = []
+
+    async def tokens(state):
+        produced.append(1)
+        state.setdefault("sources", []).append("doc")
+        for text in ("a", "b", "c"):
+            await asyncio.sleep(0.02)
+            yield text
+
+    async def consume(delay):
+        await asyncio.sleep(delay)
+        state, stream = flights.stream("college_info", ("k",), tokens)
+        return "".join([text async for text in stream]), state["sources"]
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(*[consume(d) for d in (0, 0.005, 0.03, 0.05)]), 2)
+
+    results = asyncio.run(main())
+    assert results == [("abc", ["doc"])] * 4
+    assert len(produced) == 1
+
+
+def test_stream_producer_stops_when_every_subscriber_leaves():
+    flights = SingleFlight()
+    closed = []
+
+    async def endless(state):
+        try:
+            while True:
+                await asyncio.sleep(0.01)
+                yield "x"
+        finally:
+            closed.append(True)
+
+    async def main():
+        _, first = flights.stream("general", ("k",), endless)
+        _, second = flights.stream("general", ("k",), endless)
+        assert await anext(first) == "x"
+        assert await anext(second) == "x"
+        await first.aclose()
+        await second.aclose()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(main())
+    assert closed == [True]
+    assert not flights._streams
+
+
+def test_disabled_coalescing_runs_every_call(monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_COALESCING", False)
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*[flights.run("x", ("k",), work) for _ in range(3)])
+
+    asyncio.run(main())
+    assert len(calls) == 3
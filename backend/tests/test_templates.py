@@ -0,0 +1,140 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.chat import pipeline
+from app.chat.templates import TemplateStats, match_template, render_fees_due
+from app.models.schemas import QueryType
+from app.utilities.context_cache import ContextCache
+
+
+@pytest.mark.parametrize("query_type, query, name", [
+    (QueryType.ATTENDANCE, "What is my attendance?", "attendance_summary"),
+    (QueryType.ATTENDANCE, "can you tell me my attendance percentage please", "attendance_summary"),
+    (QueryType.FEES, "How much fee is due?", "fees_due"),
+    (QueryType.FEES, "do I owe any fees", "fees_due"),
+    (QueryType.FEES, "show my fee status", "fees_status"),
+    (QueryType.MARKS, "show my marks", "marks_summary"),
+    (QueryType.NOTICES, "latest notices", "notices_recent"),
+    (QueryType.USER_INFO, "who am i", "profile"),
+])
+def test_simple_queries_match_their_template(query_type, query, name):
+    assert match_template(query_type, query).name == name
+
+
+@pytest.mark.parametrize("query_type, query", [
+    (QueryType.ATTENDANCE, "why is my attendance low?"),
+    (QueryType.FEES, "can I pay my fees in installments"),
+    (QueryType.MARKS, "how can I improve my marks in DSA"),
+    (QueryType.FEES, "what is my attendance"),  # pattern of another type
+])
+def test_open_ended_queries_go_to_the_llm(query_type, query):
+    assert match_template(query_type, query) is None
+
+
+def test_fees_due_lists_only_semesters_with_dues():
+    records = [
+        SimpleNamespace(semester=3, amount_due=0, payment_status="Paid"),
+        SimpleNamespace(semester=4, amount_due=15000, payment_status="Pending"),
+    ]
+    answer = render_fees_due(records)
+    assert answer.startswith("You have Rs. 15000 due in total")
+    assert "Semester 3" not in answer
+
+
+def test_failed_template_falls_back_to_the_llm(monkeypatch):
+    monkeypatch.setattr(settings, "TEMPLATE_ANSWERS", True)
+    monkeypatch.setattr(settings, "CONTEXT_CACHE_ENABLED", False)
+    stats = TemplateStats()
+    monkeypatch.setattr(pipeline, "get_template_stats", lambda: stats)
+
+    async def broken_load(session, query_type, user_id):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(pipeline, "load_structured_records", broken_load)
+    user = SimpleNamespace(id=1, username="student")
+
+    answer = asyncio.run(pipeline.answer_from_template(None, user, QueryType.MARKS, "show my marks"))
+
+    assert answer is None
+    assert stats.stats()["templates"]["marks_summary"]["errors"] == 1
+
+
+def test_answered_templates_are_counted_per_query_type(monkeypatch):
+    monkeypatch.setattr(settings, "TEMPLATE_ANSWERS", True)
+    monkeypatch.setattr(settings, "CONTEXT_CACHE_ENABLED", False)
+    stats = TemplateStats()
+    monkeypatch.setattr(pipeline, "get_template_stats", lambda: stats)
+
+    async def load(session, query_type, user_id):
+        return []
+
+    monkeypatch.setattr(pipeline, "load_structured_records", load)
+    user = SimpleNamespace(id=1, username="student")
+
+    async def main():
+        await pipeline.answer_from_template(None, user, QueryType.MARKS, "show my marks")
+        await pipeline.answer_from_template(None, user, QueryType.MARKS, "why did I fail")
+
+    asyncio.run(main())
+    summary = stats.stats()
+    assert summary["hit_rate"]["marks"] == 0.5
+    assert summary["templates"]["marks_summary"]["answered"] == 1
+    assert "p50_ms" in summary["templates"]["marks_summary"]
+
+
+def test_answers_over_budget_are_counted_per_template():
+    stats = TemplateStats()
+    template = match_template(QueryType.MARKS, "show my marks")
+    stats.record(template, template.budget_ms / 2000)
+    stats.record(template, template.budget_ms * 2 / 1000)
+
+    summary = stats.stats()["templates"]["marks_summary"]
+    assert summary["answered"] == 2
+    assert summary["over_budget"] == 1
+    assert summary["budget_ms"] == settings.TEMPLATE_ANSWER_BUDGET_MS
+
+
+class RequestSession:
+    """A caller's session: only used to read the context cache version"""
+
+    async def run_sync(self, func, *args):
+        return 0
+
+
+class LoadSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def test_templates_and_the_fallback_read_through_the_context_cache(monkeypatch):
+    monkeypatch.setattr(settings, "TEMPLATE_ANSWERS", True)
+    monkeypatch.setattr(settings, "CONTEXT_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "COMPACT_PROMPT_CONTEXT", False)
+    monkeypatch.setattr(pipeline, "AsyncSession", lambda engine: LoadSession())
+    cache = ContextCache()
+    monkeypatch.setattr(pipeline, "get_context_cache", lambda: cache)
+    loads = []
+
+    async def load(session, query_type, user_id):
+        loads.append(query_type)
+        return [SimpleNamespace(semester=4, total_paid=5000, amount_due=15000, payment_status="Pending")]
+
+    monkeypatch.setattr(pipeline, "load_structured_records", load)
+    user = SimpleNamespace(id=1, username="student")
+    session = RequestSession()
+
+    async def main():
+        answer = await pipeline.answer_from_template(session, user, QueryType.FEES, "how much fee is due")
+        fallback = await pipeline.degraded_structured_response(session, user, QueryType.FEES)
+        return answer, fallback
+
+    answer, fallback = asyncio.run(main())
+    assert answer.startswith("You have Rs. 15000 due")
+    assert "15000" in fallback
+    assert loads == [QueryType.FEES]
@@ -1,6 +1,9 @@
  // Configuration
         const API_BASE_URL = 'http://localhost:8000'; // Change to your API URL
         const CHAT_ENDPOINT = '/api/v1/chat/'; // Must match FastAPI route with trailing slash
+        const STREAM_ENDPOINT = '/api/v1/chat/stream'; // Server-sent events
+        const WS_ENDPOINT = '/api/v1/chat/ws'; // WebSocket, token passed as ?token=
+        const CHAT_TRANSPORT = 'sse'; // 'sse' | 'websocket' | 'json'
 
         // Enhanced token retrieval function - checks multiple possible locations
         function getAuthToken() {
@@ -157,6 +160,143 @@
             if (typingIndicator) typingIndicator.remove();
         }
 
+        // Bot message that is filled in token by token
+        function addStreamingMessage() {
+            const messageDiv = document.createElement('div');
+            messageDiv.className = 'message bot';
+
+            const time = new Date().toLocaleTimeString('en-US', { 
+                hour: 'numeric', 
+                minute: '2-digit' 
+            });
+
+            messageDiv.innerHTML = `
+                <div class="message-avatar">🤖</div>
+                <div class="message-content">
+                    <div class="message-bubble"><span class="message-text"></span></div>
+                    <div class="message-time">${time}</div>
+                </div>
+            `;
+            chatMessages.appendChild(messageDiv);
+
+            const bubble = messageDiv.querySelector('.message-bubble');
+            const textSpan = messageDiv.querySelector('.message-text');
+            return {
+                append(text) {
+                    textSpan.textContent += text;
+                    chatMessages.scrollTop = chatMessages.scrollHeight;
+                },
+                finish(queryType) {
+                    if (queryType) {
+                        bubble.insertAdjacentHTML('beforeend', `<br><span class="query-type-badge">${queryType}</span>`);
+                    }
+                    chatMessages.scrollTop = chatMessages.scrollHeight;
+                }
+            };
+        }
+
+        // Apply one streamed event (shared by SSE and WebSocket)
+        function handleStreamEvent(event, data, state) {
+            if (event === 'classification') {
+                removeTypingIndicator();
+                state.message = addStreamingMessage();
+            } else if (event === 'token') {
+                state.message.append(data.text);
+            } else if (event === 'done') {
+                state.message.finish(data.query_type);
+                state.done = true;
+            } else if (event === 'error') {
+                removeTypingIndicator();
+                throw new Error(data.detail || 'Stream error');
+            }
+        }
+
+        // Stream over server-sent events (fetch + ReadableStream so we can send the bearer token)
+        async function streamMessageSSE(query, token) {
+            const response = await fetch(`${API_BASE_URL}${STREAM_ENDPOINT}`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'Authorization': `Bearer ${token}`,
+                    'Accept': 'text/event-stream'
+                },
+                body: JSON.stringify({ query: query })
+            });
+
+            if (!response.ok) {
+                removeTypingIndicator();
+                if (response.status === 401) {
+                    addMessage('⚠️ Authentication failed. Your session may have expired. Please login again.', true);
+                    return;
+                }
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            const state = { message: null, done: false };
+            let buffer = '';
+
+            while (!state.done) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    const frame = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+
+                    let event = 'message';
+                    let data = '';
+                    for (const line of frame.split('\n')) {
+                        if (line.startsWith('event: ')) event = line.slice(7);
+                        else if (line.startsWith('data: ')) data += line.slice(6);
+                    }
+                    handleStreamEvent(event, data ? JSON.parse(data) : {}, state);
+                }
+            }
+        }
+
+        // Stream over a WebSocket (one socket per page, reused across messages)
+        let chatSocket = null;
+
+        function getChatSocket(token) {
+            if (chatSocket && chatSocket.readyState <= WebSocket.OPEN) {
+                return Promise.resolve(chatSocket);
+            }
+            const wsBase = API_BASE_URL.replace(/^http/, 'ws');
+            chatSocket = new WebSocket(`${wsBase}${WS_ENDPOINT}?token=${encodeURIComponent(token)}`);
+            return new Promise((resolve, reject) => {
+                chatSocket.addEventListener('open', () => resolve(chatSocket), { once: true });
+                chatSocket.addEventListener('close', () => reject(new Error('WebSocket closed')), { once: true });
+            });
+        }
+
+        async function streamMessageWebSocket(query, token) {
+            const socket = await getChatSocket(token);
+            const state = { message: null, done: false };
+
+            await new Promise((resolve, reject) => {
+                function onMessage(e) {
+                    const { event, ...data } = JSON.parse(e.data);
+                    try {
+                        handleStreamEvent(event, data, state);
+                    } catch (err) {
+                        socket.removeEventListener('message', onMessage);
+                        reject(err);
+                        return;
+                    }
+                    if (state.done) {
+                        socket.removeEventListener('message', onMessage);
+                        resolve();
+                    }
+                }
+                socket.addEventListener('message', onMessage);
+                socket.send(JSON.stringify({ query: query }));
+            });
+        }
+
         // Send message
         async function sendMessage(query) {
             const token = getAuthToken();
@@ -170,6 +310,22 @@
             //.substring(0, 20)
             console.log('Sending request with token:', token + '...');
             
+            if (CHAT_TRANSPORT !== 'json') {
+                try {
+                    showTypingIndicator();
+                    if (CHAT_TRANSPORT === 'websocket') {
+                        await streamMessageWebSocket(query, token);
+                    } else {
+                        await streamMessageSSE(query, token);
+                    }
+                } catch (error) {
+                    removeTypingIndicator();
+                    console.error('Error streaming message:', error);
+                    addMessage('⚠️ Failed to get response. Check console for details.', true);
+                }
+                return;
+            }
+            
             try {
                 showTypingIndicator();
                 